@@ -0,0 +1,9 @@
+"""
+================================================================================
+WAREHOUSE OPTIMIZATION - ANALYSIS ENGINE UTILITIES
+================================================================================
+Post-processing and modelling helpers that work on the files written to
+`results/` by the optimization engine. The Streamlit dashboard imports these
+modules to read pre-aggregated data instead of recomputing it on every rerun.
+================================================================================
+"""
@@ -0,0 +1,312 @@
+"""
+================================================================================
+PRODUCT AGGREGATION FOR FAST APPROXIMATE SOLVES
+================================================================================
+Answers strategic what-if questions from a much smaller model in which
+products are replaced by product clusters:
+
+    1. Cluster    categories (category_name) are the building blocks; they are
+                  merged by Ward linkage on their volume and price profile
+                  (log demand and log price per product) and on the share of
+                  products with an inventory record at each warehouse.
+    2. Aggregate  one demand point per (region, cluster) with the summed demand
+                  and demand-weighted penalty; one stocking pair per
+                  (warehouse, cluster) with the summed flow capacity and
+                  holding cost. Members without an inventory record at the
+                  warehouse add their total demand as capacity, since their
+                  supply there is unlimited in the SKU model.
+    3. Solve      the aggregated MILP.
+    4. Disaggregate
+                  proportional: cluster flows and shortfalls are split over
+                  members by their share of the (region, cluster) demand, and
+                  every member pair takes its cluster's stocking decision.
+                  repaired: the same stocking decisions with SKU-level
+                  shipments re-optimized by the recourse LP (always feasible).
+
+Error bounds: the repaired plan is feasible, so its cost is an upper bound on
+the SKU-level optimum; the LP relaxation of the SKU model is a lower bound.
+The full SKU-level MILP then runs after the estimates are written and the
+files are rewritten with the exact errors once it finishes (--no-full skips
+it).
+
+Usage:
+    python -m analysis_engine.aggregate [results_dir] [--scenario NAME ...]
+        [--clusters 10] [--no-full]
+================================================================================
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+from scipy.cluster.hierarchy import fcluster, linkage
+
+from analysis_engine.cubes import load_category_map
+from analysis_engine.inventory import scenario_names
+from analysis_engine.model import (build_model, load_model_inputs, plan_kpis, solve_model, solve_recourse,
+                                   variable_values)
+from analysis_engine.sensitivity import scenario_network
+
+AGGREGATE_DIR = 'Aggregated'
+ESTIMATES_FILE = 'aggregate_kpis.csv'
+CLUSTERS_FILE = 'product_clusters.csv'
+
+DEFAULT_CLUSTERS = 10
+
+LANE_COLUMNS = ['warehouse_id', 'region', 'unit_cost', 'transit_time_days', 'on_time']
+
+
+def product_profiles(network, categories):
+    """Demand, price, category and inventory footprint (one 0/1 column per warehouse) per product"""
+    points, pairs = network['points'], network['pairs']
+
+    profiles = points.groupby('product_id').agg(
+        demand=('demand', 'sum'),
+        unit_price=('unit_price', 'mean')
+    )
+    profiles['category_name'] = profiles.index.map(categories)
+
+    footprint = pd.crosstab(pairs['product_id'], pairs['warehouse_id']).clip(upper=1)
+    warehouses = network['arcs']['warehouse_id'].unique()
+    footprint = footprint.reindex(index=profiles.index, columns=sorted(warehouses), fill_value=0)
+
+    return profiles.join(footprint)
+
+
+def cluster_products(profiles, n_clusters=DEFAULT_CLUSTERS):
+    """Cluster id per product; products of one category always share a cluster"""
+    warehouses = profiles.columns.drop(['demand', 'unit_price', 'category_name'])
+    features = pd.DataFrame({
+        'log_demand': np.log1p(profiles['demand']),
+        'log_price': np.log(profiles['unit_price']),
+        **{warehouse: profiles[warehouse] for warehouse in warehouses}
+    }).groupby(profiles['category_name']).mean()
+
+    spread = features.std().replace(0, 1)
+    standardized = ((features - features.mean()) / spread).to_numpy()
+
+    n_clusters = min(n_clusters, len(features))
+    labels = pd.Series(fcluster(linkage(standardized, method='ward'), n_clusters, criterion='maxclust'),
+                       index=features.index)
+
+    return profiles[['category_name', 'demand', 'unit_price']].assign(
+        cluster=profiles['category_name'].map(labels).astype(int)
+    )
+
+
+def aggregate_network(network, clusters):
+    """Network over (region, cluster) points and (warehouse, cluster) pairs
+
+    The cluster id takes the place of product_id, so build_model() and
+    plan_kpis() work on the result unchanged.
+    """
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    cluster = clusters['cluster']
+
+    members = points.assign(
+        product_id=points['product_id'].map(cluster),
+        weighted_penalty=points['penalty'] * points['demand']
+    ).groupby(['region', 'product_id'], as_index=False).agg(
+        demand=('demand', 'sum'),
+        demand_std_dev=('demand_std_dev', 'sum'),
+        unit_price=('unit_price', 'mean'),
+        penalty=('penalty', 'mean'),
+        weighted_penalty=('weighted_penalty', 'sum')
+    )
+    members['penalty'] = np.where(members['demand'] > 0,
+                                  members['weighted_penalty'] / members['demand'].where(members['demand'] > 0, 1),
+                                  members['penalty'])
+    agg_points = members.drop(columns='weighted_penalty')
+
+    # Members without an inventory record are uncapacitated at that warehouse
+    held = pairs.assign(cluster=pairs['product_id'].map(cluster))
+    footprint = held.groupby(['warehouse_id', 'cluster'])['product_id'].agg(set)
+    product_demand = clusters['demand']
+
+    rows = []
+    for (warehouse_id, cluster_id), stocked in footprint.items():
+        group = held[(held['warehouse_id'] == warehouse_id) & (held['cluster'] == cluster_id)]
+        unrecorded = cluster.index[(cluster == cluster_id) & ~cluster.index.isin(stocked)]
+        rows.append({
+            'warehouse_id': warehouse_id,
+            'product_id': cluster_id,
+            'flow_capacity': group['flow_capacity'].sum() + product_demand[unrecorded].sum(),
+            'holding_cost': group['holding_cost'].sum()
+        })
+    agg_pairs = pd.DataFrame(rows, columns=['warehouse_id', 'product_id', 'flow_capacity', 'holding_cost'])
+
+    lanes = arcs[LANE_COLUMNS].drop_duplicates(['warehouse_id', 'region'])
+    demand_bearing = (agg_points['demand'] > 0) | (agg_points['demand_std_dev'] > 0)
+    agg_arcs = agg_points.loc[demand_bearing, ['region', 'product_id']].rename_axis('point').reset_index().merge(
+        lanes, on='region'
+    ).merge(
+        agg_pairs[['warehouse_id', 'product_id']].rename_axis('pair').reset_index(),
+        on=['warehouse_id', 'product_id'], how='left'
+    )
+    agg_arcs['pair'] = agg_arcs['pair'].fillna(-1).astype(int)
+    agg_arcs = agg_arcs.sort_values(['point', 'warehouse_id'], ignore_index=True)
+
+    return {**network, 'points': agg_points, 'pairs': agg_pairs, 'arcs': agg_arcs}
+
+
+def disaggregate(network, aggregated, clusters, values):
+    """Proportional SKU-level x, s and y from an aggregated solution"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    cluster = clusters['cluster']
+
+    agg_points = aggregated['points'].assign(x_index=np.arange(len(aggregated['points'])))
+    point_cluster = points.assign(product_id=points['product_id'].map(cluster))
+    point_index = point_cluster.merge(agg_points[['region', 'product_id', 'x_index', 'demand']],
+                                      on=['region', 'product_id'], how='left', suffixes=('', '_cluster'))
+    share = np.divide(points['demand'].to_numpy(), point_index['demand_cluster'].to_numpy(),
+                      out=np.zeros(len(points)), where=point_index['demand_cluster'].to_numpy() > 0)
+    s = values['s'][point_index['x_index'].to_numpy()] * share
+
+    agg_arcs = aggregated['arcs'][['warehouse_id', 'region', 'product_id']].assign(k=np.arange(len(aggregated['arcs'])))
+    arc_index = arcs[['warehouse_id', 'region']].assign(
+        product_id=arcs['product_id'].map(cluster).to_numpy()
+    ).merge(agg_arcs, on=['warehouse_id', 'region', 'product_id'], how='left')['k']
+    matched = arc_index.notna().to_numpy()
+    x = np.zeros(len(arcs))
+    x[matched] = values['x'][arc_index[matched].astype(int).to_numpy()] * share[arcs['point'].to_numpy()[matched]]
+
+    agg_pairs = aggregated['pairs'].assign(y=np.rint(values['y'])).set_index(['warehouse_id', 'product_id'])['y']
+    y = pd.MultiIndex.from_arrays([pairs['warehouse_id'], pairs['product_id'].map(cluster)]).map(
+        agg_pairs.get
+    ).to_numpy(dtype=float)
+
+    return {'x': x, 's': s, 'y': np.nan_to_num(y)}
+
+
+def capacity_violation(network, x, y):
+    """Units shipped above flow_capacity * y summed over stocked pairs"""
+    pairs, arcs = network['pairs'], network['arcs']
+    capped = arcs['pair'].to_numpy() >= 0
+    flow = np.bincount(arcs['pair'].to_numpy()[capped], weights=x[capped], minlength=len(pairs))
+    return float(np.clip(flow - pairs['flow_capacity'].to_numpy() * np.rint(y), 0, None).sum())
+
+
+def estimate(network, clusters):
+    """Aggregated solve, both disaggregations and the SKU-level LP lower bound"""
+    start = time.perf_counter()
+
+    aggregated = aggregate_network(network, clusters)
+    prob, variables = build_model(aggregated, name='warehouse_allocation_aggregated')
+    status, seconds = solve_model(prob)
+    values = variable_values(variables)
+    aggregated_cost = plan_kpis(aggregated, values['x'], values['s'], values['y'])['total_cost']
+
+    proportional = disaggregate(network, aggregated, clusters, values)
+    proportional_kpis = plan_kpis(network, proportional['x'], proportional['s'], proportional['y'])
+
+    x, s = solve_recourse(network, proportional['y'], network['points']['demand'].to_numpy())
+    repaired = plan_kpis(network, x, s, proportional['y'])
+    answer_seconds = time.perf_counter() - start
+
+    relaxed, relaxed_variables = build_model(network, relax=True, name='warehouse_allocation_relaxed')
+    solve_model(relaxed)
+    lower_bound = pulp.value(relaxed.objective)
+
+    return {
+        'clusters': int(clusters['cluster'].nunique()),
+        'products': len(clusters),
+        'aggregated_points': len(aggregated['points']),
+        'aggregated_pairs': len(aggregated['pairs']),
+        'aggregated_arcs': len(aggregated['arcs']),
+        'optimization_status': status,
+        'aggregated_solve_seconds': seconds,
+        'answer_seconds': answer_seconds,
+        'aggregated_cost': aggregated_cost,
+        'proportional_cost': proportional_kpis['total_cost'],
+        'proportional_capacity_violation': capacity_violation(network, proportional['x'], proportional['y']),
+        **{f'estimated_{key}': value for key, value in repaired.items()},
+        'lower_bound': lower_bound,
+        'error_bound_pct': (repaired['total_cost'] - lower_bound) / lower_bound * 100
+    }
+
+
+def full_solve(network):
+    """SKU-level MILP cost and solve time"""
+    prob, variables = build_model(network)
+    status, seconds = solve_model(prob)
+    values = variable_values(variables)
+    kpis = plan_kpis(network, values['x'], values['s'], values['y'])
+    return {'full_status': status, 'full_solve_seconds': seconds, 'full_cost': kpis['total_cost']}
+
+
+def add_full_results(estimates, full):
+    """Exact errors of the aggregated answers once the full solves are in"""
+    estimates = estimates.merge(pd.DataFrame(full), on='scenario_name')
+    estimates['estimate_error_pct'] = (estimates['estimated_total_cost'] / estimates['full_cost'] - 1) * 100
+    estimates['aggregated_error_pct'] = (estimates['aggregated_cost'] / estimates['full_cost'] - 1) * 100
+    estimates['speedup'] = estimates['full_solve_seconds'] / estimates['answer_seconds']
+    return estimates
+
+
+def write_aggregate(estimates, clusters, results_dir='./results/'):
+    """Write the per-scenario estimates, product clusters and kpis.json to results/Aggregated/"""
+    out_dir = Path(results_dir) / AGGREGATE_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    estimates.to_csv(out_dir / ESTIMATES_FILE, index=False)
+    clusters.rename_axis('product_id').reset_index().to_csv(out_dir / CLUSTERS_FILE, index=False)
+
+    kpis = {
+        'scenario_name': AGGREGATE_DIR,
+        'clusters': int(clusters['cluster'].nunique()),
+        'products': len(clusters),
+        'scenarios': len(estimates),
+        'max_error_bound_pct': float(estimates['error_bound_pct'].max()),
+        'total_answer_seconds': float(estimates['answer_seconds'].sum()),
+        'full_solved': 'full_cost' in estimates
+    }
+    if 'full_cost' in estimates:
+        kpis.update(
+            max_estimate_error_pct=float(estimates['estimate_error_pct'].abs().max()),
+            total_full_solve_seconds=float(estimates['full_solve_seconds'].sum())
+        )
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump(kpis, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fast approximate solves on product clusters, with error bounds")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', nargs='*', help="scenarios to estimate (default: all)")
+    parser.add_argument('--clusters', type=int, default=DEFAULT_CLUSTERS, help="number of product clusters")
+    parser.add_argument('--no-full', action='store_true', help="skip the SKU-level solves")
+    args = parser.parse_args()
+
+    inputs = load_model_inputs(args.results_dir)
+    scenarios = args.scenario or scenario_names(args.results_dir)
+    networks = {name: scenario_network(inputs, Path(args.results_dir) / name)[0] for name in scenarios}
+
+    clusters = cluster_products(product_profiles(networks[scenarios[0]], load_category_map(args.results_dir)),
+                                args.clusters)
+
+    estimates = pd.DataFrame([
+        {'scenario_name': name, **estimate(network, clusters)} for name, network in networks.items()
+    ])
+    out_dir = write_aggregate(estimates, clusters, args.results_dir)
+
+    for row in estimates.itertuples():
+        print(f"{row.scenario_name:<32} ${row.estimated_total_cost / 1e6:6.2f}M "
+              f"(<= {row.error_bound_pct:.2f}% above optimum) in {row.answer_seconds:.2f}s")
+    print(f"Wrote {out_dir}")
+
+    if not args.no_full:
+        full = [{'scenario_name': name, **full_solve(network)} for name, network in networks.items()]
+        estimates = add_full_results(estimates, full)
+        write_aggregate(estimates, clusters, args.results_dir)
+
+        for row in estimates.itertuples():
+            print(f"{row.scenario_name:<32} full ${row.full_cost / 1e6:6.2f}M, estimate error "
+                  f"{row.estimate_error_pct:+.3f}% ({row.full_solve_seconds:.2f}s)")
+        print(f"Updated {out_dir}")
@@ -0,0 +1,46 @@
+"""
+================================================================================
+SERVER-SIDE HISTOGRAM BINNING
+================================================================================
+Pre-bins large columns with NumPy so charts only ship bin counts to the
+browser instead of one value (and one marker colour) per row.
+================================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def unit_bin_edges(values):
+    """Bin edges of width 1 centred on each integer value in the data range"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+
+    if len(values) == 0:
+        return np.array([-0.5, 0.5])
+
+    return np.arange(np.floor(values.min()) - 0.5, np.ceil(values.max()) + 1.0, 1.0)
+
+
+def histogram_bins(values, bins=20, weights=None):
+    """Histogram of values as a small DataFrame (bin_left, bin_right, bin_center, width, count)
+
+    bins is anything np.histogram accepts (a bin count or explicit edges). When
+    weights are given (e.g. shipment quantity) each row contributes its weight
+    instead of 1.
+    """
+    values = np.asarray(values, dtype=float)
+    mask = np.isfinite(values)
+
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[mask]
+
+    counts, edges = np.histogram(values[mask], bins=bins, weights=weights)
+
+    return pd.DataFrame({
+        'bin_left': edges[:-1],
+        'bin_right': edges[1:],
+        'bin_center': (edges[:-1] + edges[1:]) / 2,
+        'width': np.diff(edges),
+        'count': counts
+    })
@@ -0,0 +1,133 @@
+"""
+================================================================================
+RESULTS BUNDLE EXPORT
+================================================================================
+Packs a chosen subset of result files (scenarios x tables) into a zip or
+tar.gz archive. Files are read in fixed-size chunks and compressed on the
+fly, so only one chunk of input and the compressed output produced so far
+are held at a time; nothing is read until a bundle is actually requested.
+
+Usage:
+    python -m analysis_engine.bundle results_dir output.zip|output.tar.gz [scenario ...]
+================================================================================
+"""
+
+import io
+import sys
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+# Bundles larger than this spill from memory to a temporary file
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+BUNDLE_FORMATS = {
+    'zip': ('application/zip', '.zip'),
+    'tar.gz': ('application/gzip', '.tar.gz')
+}
+
+# Label used for files written directly to results/ (not in a scenario folder)
+SHARED_GROUP = 'Shared'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that hands back what was written since the last take()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def group_of(relpath):
+    """Scenario folder of a results-relative path, or SHARED_GROUP for top-level files"""
+    parts = Path(relpath).parts
+    return parts[0] if len(parts) > 1 else SHARED_GROUP
+
+
+def select_files(relpaths, groups, tables):
+    """Relative paths whose scenario group and file name were both selected"""
+    groups, tables = set(groups), set(tables)
+    return sorted(
+        relpath for relpath in relpaths
+        if group_of(relpath) in groups and Path(relpath).name in tables
+    )
+
+
+def iter_bundle(results_dir, relpaths, fmt='zip', chunk_size=CHUNK_SIZE):
+    """Yield the compressed archive of relpaths as a sequence of byte chunks"""
+    if fmt not in BUNDLE_FORMATS:
+        raise ValueError(f"Unknown bundle format: {fmt}")
+
+    results_dir = Path(results_dir)
+    sink = _ChunkSink()
+
+    if fmt == 'zip':
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for relpath in relpaths:
+                with open(results_dir / relpath, 'rb') as src, \
+                        archive.open(relpath, 'w', force_zip64=True) as dst:
+                    while chunk := src.read(chunk_size):
+                        dst.write(chunk)
+                        if data := sink.take():
+                            yield data
+    else:
+        # Stream mode ('w|gz') never seeks; tarfile copies each member in blocks
+        with tarfile.open(fileobj=sink, mode='w|gz', bufsize=chunk_size) as archive:
+            for relpath in relpaths:
+                archive.add(results_dir / relpath, arcname=relpath, recursive=False)
+                if data := sink.take():
+                    yield data
+
+    if data := sink.take():
+        yield data
+
+
+def write_bundle(results_dir, relpaths, fileobj, fmt='zip', chunk_size=CHUNK_SIZE):
+    """Write the archive to an open binary file and return the number of bytes written"""
+    written = 0
+    for chunk in iter_bundle(results_dir, relpaths, fmt, chunk_size):
+        fileobj.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def bundle_file(results_dir, relpaths, fmt='zip', spool_max_bytes=SPOOL_MAX_BYTES):
+    """Build the archive into a spooled temporary file, rewound and ready to read"""
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    write_bundle(results_dir, relpaths, spool, fmt)
+    spool.seek(0)
+    return spool
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+
+    source, target = Path(sys.argv[1]), Path(sys.argv[2])
+    bundle_format = 'tar.gz' if target.name.endswith('.tar.gz') else 'zip'
+    scenarios = set(sys.argv[3:])
+
+    files = sorted(
+        path.relative_to(source).as_posix() for path in source.rglob('*')
+        if path.is_file() and (not scenarios or group_of(path.relative_to(source)) in scenarios)
+    )
+
+    with open(target, 'wb') as out:
+        size = write_bundle(source, files, out, bundle_format)
+
+    print(f"Wrote {len(files)} files to {target} ({size / 1024:,.1f} KB)")
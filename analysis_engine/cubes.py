@@ -0,0 +1,136 @@
+"""
+================================================================================
+SCENARIO AGGREGATE CUBES
+================================================================================
+Small pre-aggregated tables written next to each scenario's raw results so the
+dashboard can render the Transportation and Stockout tabs without touching the
+full shipments / stockouts tables.
+
+Usage:
+    python -m analysis_engine.cubes [results_dir]
+================================================================================
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Transit buckets used by the Performance Analysis page (right-inclusive)
+TRANSIT_BINS = [0, 3, 5, 7, 100]
+TRANSIT_LABELS = ['0-3 days (On-Time)', '3-5 days', '5-7 days', '>7 days']
+
+TOP_N = 10
+
+CUBE_FILES = {
+    'transit_cube': 'cube_transit.csv',
+    'stockout_cube': 'cube_stockouts.csv',
+    'top_routes': 'top_routes.csv',
+    'top_stockouts': 'top_stockouts.csv'
+}
+
+
+def build_transit_cube(shipments):
+    """Aggregate shipments by warehouse x region x transit bucket"""
+    buckets = pd.cut(shipments['transit_time_days'], bins=TRANSIT_BINS, labels=TRANSIT_LABELS)
+
+    cube = shipments.assign(transit_bucket=buckets).groupby(
+        ['warehouse_id', 'region', 'transit_bucket'], observed=True
+    ).agg(
+        routes=('quantity', 'size'),
+        quantity=('quantity', 'sum'),
+        transport_cost=('transport_cost', 'sum')
+    ).reset_index()
+
+    cube['transit_bucket'] = cube['transit_bucket'].astype(str)
+    return cube
+
+
+def build_stockout_cube(stockouts, category_map):
+    """Aggregate stockouts by region x product category"""
+    categories = stockouts['product_id'].map(category_map).fillna('Unknown')
+
+    return stockouts.assign(category_name=categories).groupby(
+        ['region', 'category_name']
+    ).agg(
+        instances=('stockout_quantity', 'size'),
+        stockout_quantity=('stockout_quantity', 'sum'),
+        stockout_penalty_cost=('stockout_penalty_cost', 'sum'),
+        total_demand=('total_demand', 'sum')
+    ).reset_index()
+
+
+def build_scenario_cubes(shipments, stockouts, category_map, top_n=TOP_N):
+    """Build all cubes and top-N lists for one scenario"""
+    return {
+        'transit_cube': build_transit_cube(shipments),
+        'stockout_cube': build_stockout_cube(stockouts, category_map),
+        'top_routes': shipments.nlargest(top_n, 'transport_cost')[
+            ['warehouse_id', 'region', 'product_id', 'quantity', 'transport_cost', 'transit_time_days']
+        ].reset_index(drop=True),
+        'top_stockouts': stockouts.nlargest(top_n, 'stockout_quantity')[
+            ['region', 'product_id', 'stockout_quantity', 'stockout_penalty_cost', 'total_demand']
+        ].reset_index(drop=True)
+    }
+
+
+def transit_distribution(transit_cube):
+    """Collapse the transit cube to route counts per bucket, in bucket order"""
+    dist = transit_cube.groupby('transit_bucket')['routes'].sum()
+    dist = dist.reindex(TRANSIT_LABELS, fill_value=0).reset_index()
+    dist.columns = ['Transit Time', 'Routes']
+    return dist
+
+
+def load_category_map(results_dir):
+    """Product -> category lookup from the enriched demand table"""
+    demand = pd.read_csv(Path(results_dir) / 'demand_enriched.csv',
+                         usecols=['product_id', 'category_name'])
+    return demand.drop_duplicates('product_id').set_index('product_id')['category_name']
+
+
+def load_scenario_cubes(scenario_dir, **read_kwargs):
+    """Read previously written cubes, or None if any are missing
+
+    Extra keyword arguments (e.g. dtype_backend='pyarrow') go to pd.read_csv.
+    """
+    scenario_dir = Path(scenario_dir)
+    paths = {key: scenario_dir / name for key, name in CUBE_FILES.items()}
+
+    if not all(path.exists() for path in paths.values()):
+        return None
+
+    return {key: pd.read_csv(path, **read_kwargs) for key, path in paths.items()}
+
+
+def write_scenario_cubes(scenario_dir, category_map, top_n=TOP_N):
+    """Build cubes from a scenario directory's raw CSVs and write them alongside"""
+    scenario_dir = Path(scenario_dir)
+    shipments = pd.read_csv(scenario_dir / 'shipments.csv')
+    stockouts = pd.read_csv(scenario_dir / 'stockouts.csv')
+
+    cubes = build_scenario_cubes(shipments, stockouts, category_map, top_n)
+    for key, name in CUBE_FILES.items():
+        cubes[key].to_csv(scenario_dir / name, index=False)
+
+    return cubes
+
+
+def write_all_cubes(results_dir='./results/', top_n=TOP_N):
+    """Write cubes for every scenario directory under results/"""
+    results_dir = Path(results_dir)
+    category_map = load_category_map(results_dir)
+
+    written = []
+    for scenario_dir in sorted(results_dir.iterdir()):
+        if (scenario_dir / 'shipments.csv').exists() and (scenario_dir / 'stockouts.csv').exists():
+            write_scenario_cubes(scenario_dir, category_map, top_n)
+            written.append(scenario_dir.name)
+
+    return written
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else './results/'
+    for name in write_all_cubes(target):
+        print(f"Wrote cubes for {name}")
@@ -0,0 +1,271 @@
+"""
+================================================================================
+RUN-TO-RUN DIFF OF SCENARIO OUTPUTS
+================================================================================
+Shows which lanes, stocking decisions and stockouts moved between two runs of
+a scenario (or between two scenarios). Each plan table is joined on its keys
+
+    shipments  (warehouse_id, region, product_id)  quantity, transport_cost
+    stocking   (warehouse_id, product_id)          stocked, flow_capacity
+    stockouts  (region, product_id)                stockout_quantity, stockout_penalty_cost
+
+without a pandas merge: the key columns are factorized over both runs and
+packed into one int64 per row (mixed radix), duplicate keys are summed with a sort /
+reduceat and the two sorted key arrays are merged into their union. Only
+rows that were added, removed or changed (|delta| > tolerance) are decoded
+back into columns, so the change tables stay compact.
+
+Tables whose checksums recorded in kpis.json (analysis_engine.reproducible)
+match on both sides are skipped without being read.
+
+Usage:
+    python -m analysis_engine.diff OLD_SCENARIO_DIR NEW_SCENARIO_DIR
+        [--out results/Run_Diff] [--tolerance 1e-4]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.model import CHECKSUM_KEY, COST_COMPONENTS
+
+DIFF_DIR = 'Run_Diff'
+
+DIFF_TABLES = {
+    'shipments': (['warehouse_id', 'region', 'product_id'], ['quantity', 'transport_cost']),
+    'stocking': (['warehouse_id', 'product_id'], ['stocked', 'flow_capacity']),
+    'stockouts': (['region', 'product_id'], ['stockout_quantity', 'stockout_penalty_cost'])
+}
+
+# Above the rounding noise of tables written with CANONICAL_DECIMALS
+DEFAULT_TOLERANCE = 1e-4
+
+# Integer key columns spanning at most this many ids per row are not hashed
+INTEGER_RANGE_FACTOR = 4
+
+CHANGE_TYPES = ['added', 'removed', 'changed']
+KPI_KEYS = ['total_cost', *COST_COMPONENTS, 'order_fulfillment_rate', 'on_time_delivery_rate', 'total_stockouts']
+
+
+def factorize_pair(old_column, new_column):
+    """Shared integer codes for two columns
+
+    Dense integer ids (product_id) are offset by their minimum instead of
+    hashed. Other columns are factorized per side (no copy of the concatenated
+    rows) and only the new side's uniques are mapped into the old side's.
+    """
+    if pd.api.types.is_integer_dtype(old_column) and pd.api.types.is_integer_dtype(new_column):
+        bounds = pd.Series([old_column.min(), new_column.min(), old_column.max(), new_column.max()]).dropna()
+        low, high = (int(bounds.min()), int(bounds.max())) if len(bounds) else (0, 0)
+        if high - low < INTEGER_RANGE_FACTOR * max(len(old_column) + len(new_column), 1):
+            return (old_column.to_numpy(dtype=np.int64) - low, new_column.to_numpy(dtype=np.int64) - low,
+                    pd.Index(np.arange(low, high + 1)))
+
+    old_codes, old_values = pd.factorize(old_column)
+    new_codes, new_values = pd.factorize(new_column)
+    values = old_values.append(new_values[~new_values.isin(old_values)])
+    return old_codes, values.get_indexer(new_values)[new_codes], values
+
+
+def encode_keys(old, new, keys):
+    """int64 key per row of old and new, plus the per-column uniques and radices to decode them"""
+    old_codes = np.zeros(len(old), dtype=np.int64)
+    new_codes = np.zeros(len(new), dtype=np.int64)
+    uniques, radices = [], []
+
+    for column in keys:
+        old_column, new_column, values = factorize_pair(old[column], new[column])
+        radix = max(len(values), 1)
+        old_codes = old_codes * radix + old_column
+        new_codes = new_codes * radix + new_column
+        uniques.append(values)
+        radices.append(radix)
+
+    return old_codes, new_codes, uniques, radices
+
+
+def decode_keys(codes, keys, uniques, radices):
+    """Key columns for packed int64 keys"""
+    columns = {}
+    for column, values, radix in reversed(list(zip(keys, uniques, radices))):
+        codes, position = np.divmod(codes, radix)
+        columns[column] = values[position]
+    return pd.DataFrame({column: columns[column] for column in keys})
+
+
+def first_of_run(sorted_codes):
+    """Mask of the first occurrence of every value in a sorted array"""
+    first = np.ones(len(sorted_codes), dtype=bool)
+    first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    return first
+
+
+def collapse(codes, values):
+    """Sorted unique keys and the summed value columns per key"""
+    order = np.argsort(codes)
+    codes = codes[order]
+    starts = np.flatnonzero(first_of_run(codes))
+
+    if len(starts) == len(codes):
+        return codes, [column[order] for column in values]
+    return codes[starts], [np.add.reduceat(column[order], starts) for column in values]
+
+
+def align(old_keys, new_keys):
+    """Sorted union of two sorted unique key arrays and each side's positions in it"""
+    keys = np.concatenate([old_keys, new_keys])
+    # Two sorted runs: the stable (merge) sort only has to merge them
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    first = first_of_run(keys)
+
+    positions = np.empty(len(keys), dtype=np.int64)
+    positions[order] = np.cumsum(first) - 1
+    return keys[first], positions[:len(old_keys)], positions[len(old_keys):]
+
+
+def diff_table(old, new, keys, values, tolerance=DEFAULT_TOLERANCE):
+    """Added, removed and changed rows of one plan table with old / new values and deltas"""
+    old_codes, new_codes, uniques, radices = encode_keys(old, new, keys)
+    old_keys, old_values = collapse(old_codes, [old[v].to_numpy(dtype=float) for v in values])
+    new_keys, new_values = collapse(new_codes, [new[v].to_numpy(dtype=float) for v in values])
+
+    union, old_positions, new_positions = align(old_keys, new_keys)
+    in_old = np.zeros(len(union), dtype=bool)
+    in_new = np.zeros(len(union), dtype=bool)
+    in_old[old_positions] = True
+    in_new[new_positions] = True
+
+    aligned_old, aligned_new = [], []
+    for old_column, new_column in zip(old_values, new_values):
+        a = np.zeros(len(union))
+        b = np.zeros(len(union))
+        a[old_positions] = old_column
+        b[new_positions] = new_column
+        aligned_old.append(a)
+        aligned_new.append(b)
+
+    moved = np.zeros(len(union), dtype=bool)
+    for a, b in zip(aligned_old, aligned_new):
+        moved |= np.abs(b - a) > tolerance
+
+    change = np.select([in_new & ~in_old, in_old & ~in_new, moved], CHANGE_TYPES, default='')
+    selected = change != ''
+
+    table = decode_keys(union[selected], keys, uniques, radices)
+    table['change'] = change[selected]
+    for value, a, b in zip(values, aligned_old, aligned_new):
+        table[f'old_{value}'] = a[selected]
+        table[f'new_{value}'] = b[selected]
+        table[f'{value}_delta'] = b[selected] - a[selected]
+    # Codes follow first appearance; only the compact change table is sorted
+    table = table.sort_values(keys, ignore_index=True)
+
+    summary = {
+        'old_rows': int(len(old_keys)),
+        'new_rows': int(len(new_keys)),
+        **{change_type: int((table['change'] == change_type).sum()) for change_type in CHANGE_TYPES},
+        'unchanged': int((in_old & in_new & ~moved).sum()),
+        **{f'{value}_net_delta': float(table[f'{value}_delta'].sum()) for value in values},
+        **{f'{value}_moved': float(table[f'{value}_delta'].abs().sum()) for value in values}
+    }
+    return table, summary
+
+
+def recorded_checksums(scenario_dir):
+    """Table checksums and KPIs from a scenario's kpis.json (empty if missing)"""
+    path = Path(scenario_dir) / 'kpis.json'
+    if not path.exists():
+        return {}, {}
+    with open(path, 'r') as f:
+        kpis = json.load(f)
+    return kpis.get(CHECKSUM_KEY, {}), kpis
+
+
+def diff_runs(old_dir, new_dir, tolerance=DEFAULT_TOLERANCE, tables=None):
+    """Change tables and summary KPIs for two scenario result directories
+
+    tables maps table name -> (old frame, new frame) to diff frames already
+    in memory instead of reading them from the directories.
+    """
+    old_checksums, old_kpis = recorded_checksums(old_dir)
+    new_checksums, new_kpis = recorded_checksums(new_dir)
+
+    changes, summary = {}, {'old': str(old_dir), 'new': str(new_dir), 'tolerance': tolerance}
+    for name, (keys, values) in DIFF_TABLES.items():
+        file_name = f'{name}.csv'
+        checksum = old_checksums.get(file_name)
+        if checksum is not None and checksum == new_checksums.get(file_name):
+            changes[name] = None
+            summary[name] = {'identical_checksum': True}
+            continue
+
+        if tables is not None and name in tables:
+            old, new = tables[name]
+        else:
+            old = pd.read_csv(Path(old_dir) / file_name)
+            new = pd.read_csv(Path(new_dir) / file_name)
+
+        changes[name], summary[name] = diff_table(old, new, keys, values, tolerance)
+
+    summary['kpi_deltas'] = {
+        key: new_kpis[key] - old_kpis[key]
+        for key in KPI_KEYS if isinstance(old_kpis.get(key), (int, float)) and isinstance(new_kpis.get(key), (int, float))
+    }
+    return changes, summary
+
+
+def lane_changes(shipment_changes):
+    """Net and gross quantity / cost moved per warehouse -> region lane"""
+    return shipment_changes.assign(
+        quantity_moved=shipment_changes['quantity_delta'].abs()
+    ).groupby(['warehouse_id', 'region'], as_index=False).agg(
+        products=('product_id', 'size'),
+        quantity_delta=('quantity_delta', 'sum'),
+        quantity_moved=('quantity_moved', 'sum'),
+        transport_cost_delta=('transport_cost_delta', 'sum')
+    ).sort_values('quantity_moved', ascending=False, ignore_index=True)
+
+
+def write_diff(changes, summary, out_dir):
+    """Write diff_<table>.csv for every changed table and kpis.json"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    for name, table in changes.items():
+        if table is not None:
+            table.to_csv(out_dir / f'diff_{name}.csv', index=False)
+        elif (out_dir / f'diff_{name}.csv').exists():
+            (out_dir / f'diff_{name}.csv').unlink()
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump({'scenario_name': DIFF_DIR, **summary}, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Added / removed / changed shipments, stocking and stockouts")
+    parser.add_argument('old_dir', help="scenario directory of the earlier run")
+    parser.add_argument('new_dir', help="scenario directory of the later run")
+    parser.add_argument('--out', default=str(Path('./results/') / DIFF_DIR))
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    changes, summary = diff_runs(args.old_dir, args.new_dir, args.tolerance)
+    out_dir = write_diff(changes, summary, args.out)
+
+    for name in DIFF_TABLES:
+        counts = summary[name]
+        if counts.get('identical_checksum'):
+            print(f"{name:<10} identical (checksum)")
+        else:
+            print(f"{name:<10} +{counts['added']:,} -{counts['removed']:,} ~{counts['changed']:,} "
+                  f"({counts['unchanged']:,} unchanged)")
+    for key, delta in summary['kpi_deltas'].items():
+        print(f"  {key}: {delta:+,.4f}")
+    print(f"Wrote {out_dir}")
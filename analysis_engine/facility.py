@@ -0,0 +1,332 @@
+"""
+================================================================================
+CAPACITATED FACILITY LOCATION
+================================================================================
+Chooses new regional distribution centres jointly with the allocation. Each
+candidate site c (same columns as warehouses_enriched.csv) is added to the
+allocation network as one extra capacitated "pair" covering all products:
+
+    min  allocation objective + sum_c fixed_operating_cost[c] open[c]
+    s.t. allocation constraints
+         sum_{j,p} x[c,j,p] <= throughput[c] open[c]           (site capacity)
+         sum_j x[c,j,p] <= flow_capacity[p] open[c]             (product capacity)
+         x[c,j,p] <= demand[j,p] open[c]                        (strong linking)
+         sum_c open[c] <= max_sites                             (optional)
+
+throughput = storage_capacity_m3 * 85% / m3 per unit * 12 turns, with the
+m3 per unit taken from the existing warehouses. A new site stocks each product
+like an average existing warehouse that holds it: flow_capacity[p] is the mean
+flow capacity of product p's existing pairs, so a site adds supply on the same
+terms as the warehouses rather than serving any SKU up to its throughput.
+Candidate lanes come from the
+haversine lane matrix. By default they use a rate card calibrated on the
+observed Baseline lanes, so candidates are priced on the same basis as the
+existing network. Each unit shipped from a candidate also pays
+holding_cost_per_unit / 12, the average stock its flow ties up.
+
+Lanes are pruned before the model is built. A candidate only gets arcs to
+regions within max_km, since far lanes are too slow to compete. This keeps
+100+ candidates tractable. Each candidate adds one matrix row and a few
+hundred arcs, not 1,543.
+
+Usage:
+    python -m analysis_engine.facility [results_dir] [--candidates sites.csv | --generate 120]
+        [--max-km 1500] [--max-sites 3] [--rate-card calibrated]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from analysis_engine.lanes import calibrate_rate_card, load_lane_matrix, load_rate_cards
+from analysis_engine.model import (
+    CHECKSUM_KEY,
+    INVENTORY_TURNOVER_RATE,
+    build_model,
+    build_network,
+    load_lanes,
+    load_model_inputs,
+    plan_kpis,
+    solution_tables,
+    solve_model,
+    variable_values,
+    write_tables
+)
+
+FACILITY_DIR = 'Facility_Location'
+
+DEFAULT_CANDIDATES = 120
+DEFAULT_MAX_KM = 1500
+DEFAULT_SEED = 42
+DEFAULT_RATE_CARD = 'calibrated'
+TARGET_UTILIZATION = 0.85
+
+CANDIDATE_COLUMNS = [
+    'warehouse_id', 'warehouse_latitude', 'warehouse_longitude',
+    'storage_capacity_m3', 'holding_cost_per_unit', 'fixed_operating_cost'
+]
+
+
+def volume_per_unit(inputs):
+    """Average m3 per stocked unit across the existing warehouses"""
+    return inputs['warehouses']['current_volume_used_m3'].sum() / inputs['inventory']['current_stock_units'].sum()
+
+
+def generate_candidates(results_dir='./results/', n_candidates=DEFAULT_CANDIDATES, seed=DEFAULT_SEED):
+    """Synthetic candidate sites scattered around demand regions
+
+    Sites are drawn near regions in proportion to regional demand. Size and
+    costs are scaled from the existing warehouses: 25-60% of their average
+    storage, the same fixed cost per m3 (+/-20%) and holding costs from
+    their range.
+    """
+    results_dir = Path(results_dir)
+    rng = np.random.default_rng(seed)
+
+    nodes = pd.read_csv(results_dir / 'network_nodes.csv')
+    regions = nodes[nodes['type'] == 'region'].set_index('id')
+    warehouses = pd.read_csv(results_dir / 'warehouses_enriched.csv')
+    regional = pd.read_csv(results_dir / 'regional_demand_summary.csv').set_index('delivery_region')
+
+    weights = regional['total_demand_units'].reindex(regions.index).fillna(0).to_numpy(dtype=float)
+    anchors = rng.choice(len(regions), size=n_candidates, p=weights / weights.sum())
+
+    storage = warehouses['storage_capacity_m3'].mean() * rng.uniform(0.25, 0.6, n_candidates)
+    fixed_per_m3 = (warehouses['fixed_operating_cost'] / warehouses['storage_capacity_m3']).mean()
+
+    return pd.DataFrame({
+        'warehouse_id': [f'DC{k + 1:03d}' for k in range(n_candidates)],
+        'warehouse_region': regions.index[anchors],
+        'warehouse_latitude': np.clip(regions['latitude'].to_numpy()[anchors] + rng.normal(0, 3, n_candidates), -89, 89),
+        'warehouse_longitude': regions['longitude'].to_numpy()[anchors] + rng.normal(0, 3, n_candidates),
+        'storage_capacity_m3': storage.round(),
+        'holding_cost_per_unit': rng.uniform(warehouses['holding_cost_per_unit'].min(),
+                                             warehouses['holding_cost_per_unit'].max(), n_candidates),
+        'fixed_operating_cost': (storage * fixed_per_m3 * rng.uniform(0.8, 1.2, n_candidates)).round()
+    })
+
+
+def candidate_lanes(matrix, candidates, rate_card, max_km=DEFAULT_MAX_KM):
+    """Candidate -> region lanes within max_km; returns (lanes, pruning stats)
+
+    Each candidate adds one row to the lane matrix.
+    """
+    rows_before = matrix.rows_computed
+    for site in candidates[['warehouse_id', 'warehouse_latitude', 'warehouse_longitude']].itertuples(index=False):
+        matrix.add_warehouse(*site)
+
+    lanes = matrix.lanes(rate_card)
+    lanes = lanes[lanes['warehouse_id'].isin(candidates['warehouse_id'])]
+    kept = lanes[lanes['distance_km'] <= max_km].reset_index(drop=True)
+
+    stats = {
+        'candidates': len(candidates),
+        'matrix_rows_computed': matrix.rows_computed - rows_before,
+        'candidate_lanes': len(lanes),
+        'candidate_lanes_kept': len(kept),
+        'max_km': max_km
+    }
+    return kept, stats
+
+
+def extend_network(network, candidates, lanes, m3_per_unit):
+    """Allocation network plus one capacitated all-product pair and its arcs per candidate"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    offset = len(pairs)
+
+    sites = candidates.reset_index(drop=True).copy()
+    sites['throughput_capacity'] = (sites['storage_capacity_m3'] * TARGET_UTILIZATION / m3_per_unit
+                                    * INVENTORY_TURNOVER_RATE)
+
+    site_pairs = pd.DataFrame({
+        'warehouse_id': sites['warehouse_id'],
+        'product_id': -1,
+        'current_stock_units': 0,
+        'flow_capacity_units': sites['throughput_capacity'],
+        'flow_capacity': sites['throughput_capacity'],
+        'holding_cost': sites['fixed_operating_cost']
+    })
+
+    site_index = pd.Series(np.arange(len(sites)) + offset, index=sites['warehouse_id'])
+    holding_per_unit = sites.set_index('warehouse_id')['holding_cost_per_unit'] / INVENTORY_TURNOVER_RATE
+
+    site_arcs = points[['region', 'product_id']].rename_axis('point').reset_index().merge(lanes, on='region')
+    site_arcs['pair'] = site_arcs['warehouse_id'].map(site_index).to_numpy()
+    site_arcs['unit_cost'] = (site_arcs['unit_cost'] * network['params']['transport_cost_multiplier']
+                              + site_arcs['warehouse_id'].map(holding_per_unit))
+
+    arcs = pd.concat([arcs, site_arcs[arcs.columns.intersection(site_arcs.columns)]], ignore_index=True)
+    arcs = arcs.sort_values(['point', 'warehouse_id'], ignore_index=True)
+
+    return {
+        **network,
+        'pairs': pd.concat([pairs, site_pairs], ignore_index=True),
+        'arcs': arcs,
+        'sites': sites,
+        'site_offset': offset,
+        'site_product_capacity': pairs.groupby('product_id')['flow_capacity'].mean()
+    }
+
+
+def build_location_model(network, max_sites=None, strengthen=True):
+    """Allocation MILP with site-opening binaries (the candidate pairs' y)"""
+    prob, variables = build_model(network, name='facility_location')
+    x, y = variables['x'], variables['y']
+    offset = network['site_offset']
+    demand = network['points']['demand'].to_numpy()
+
+    arcs = network['arcs']
+    site_arcs = arcs[arcs['pair'] >= offset]
+    product_capacity = site_arcs['product_id'].map(network['site_product_capacity']).fillna(0)
+    for (pair, product), positions in site_arcs.groupby(['pair', 'product_id']).indices.items():
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(x[k], 1) for k in site_arcs.index[positions]]
+                                    + [(y[pair], -float(product_capacity.iloc[positions[0]]))]),
+            sense=pulp.LpConstraintLE, rhs=0, name=f'site_product_{pair}_{product}'
+        )
+
+    if strengthen:
+        site_arcs = np.flatnonzero(arcs['pair'].to_numpy() >= offset)
+        for k, point, pair in zip(site_arcs, arcs['point'].to_numpy()[site_arcs], arcs['pair'].to_numpy()[site_arcs]):
+            prob += pulp.LpConstraint(
+                pulp.LpAffineExpression([(x[k], 1), (y[pair], -float(demand[point]))]),
+                sense=pulp.LpConstraintLE, rhs=0, name=f'link_{k}'
+            )
+
+    if max_sites is not None:
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(var, 1) for var in y[offset:]]),
+            sense=pulp.LpConstraintLE, rhs=max_sites, name='max_sites'
+        )
+
+    return prob, variables
+
+
+def site_summary(network, x, y):
+    """Per-candidate open flag, throughput and regions served"""
+    arcs, offset = network['arcs'], network['site_offset']
+    sites = network['sites'].copy()
+
+    is_site = arcs['pair'].to_numpy() >= offset
+    site_arcs = arcs[is_site].assign(quantity=x[is_site])
+    shipped = site_arcs[site_arcs['quantity'] > 1e-6]
+
+    throughput = shipped.groupby('warehouse_id')['quantity'].sum()
+    in_range = site_arcs.groupby('warehouse_id')['region'].nunique()
+    served = shipped.groupby('warehouse_id')['region'].agg(lambda regions: ', '.join(sorted(set(regions))))
+
+    sites['open'] = np.rint(y[offset:]).astype(int)
+    sites['throughput_units'] = sites['warehouse_id'].map(throughput).fillna(0)
+    sites['utilization_pct'] = sites['throughput_units'] / sites['throughput_capacity'] * 100
+    sites['regions_in_range'] = sites['warehouse_id'].map(in_range).fillna(0).astype(int)
+    sites['regions_served'] = sites['warehouse_id'].map(served).fillna('')
+    return sites
+
+
+def run_facility_location(results_dir='./results/', candidates=None, max_km=DEFAULT_MAX_KM, max_sites=None,
+                          rate_card=DEFAULT_RATE_CARD, time_limit=600, gap=0.005, log=None):
+    """Solve location + allocation; returns sites, tables and kpis"""
+    results_dir = Path(results_dir)
+    candidates = generate_candidates(results_dir) if candidates is None else candidates
+    missing = set(CANDIDATE_COLUMNS) - set(candidates.columns)
+    if missing:
+        raise ValueError(f"Candidate sites are missing columns: {sorted(missing)}")
+
+    inputs = load_model_inputs(results_dir)
+    network = build_network(inputs)
+
+    matrix = load_lane_matrix(results_dir)
+    if rate_card == 'calibrated':
+        card, _ = calibrate_rate_card(matrix, load_lanes(results_dir))
+    else:
+        card = load_rate_cards()[rate_card]
+    lanes, pruning = candidate_lanes(matrix, candidates, card, max_km)
+    network = extend_network(network, candidates, lanes, volume_per_unit(inputs))
+
+    prob, variables = build_location_model(network, max_sites)
+    if log:
+        log(f"{pruning['candidate_lanes_kept']:,} of {pruning['candidate_lanes']:,} candidate lanes kept "
+            f"({len(network['arcs']):,} arcs, {len(prob.constraints):,} constraints)")
+
+    status, seconds = solve_model(prob, time_limit=time_limit, gap=gap)
+    if status in ('Infeasible', 'Unbounded', 'Undefined'):
+        raise RuntimeError(f"Facility-location model failed: {status}")
+
+    values = variable_values(variables)
+    x, s, y = values['x'], values['s'], values['y']
+    sites = site_summary(network, x, y)
+    tables = solution_tables(network, x, s, y)
+    tables['stocking'] = tables['stocking'][tables['stocking']['product_id'] >= 0].reset_index(drop=True)
+
+    with open(results_dir / 'Baseline' / 'kpis.json', 'r') as f:
+        baseline = json.load(f)
+
+    kpis = plan_kpis(network, x, s, y)
+    fixed = float(sites.loc[sites['open'] == 1, 'fixed_operating_cost'].sum())
+    kpis['total_holding_cost'] -= fixed
+    kpis.update({
+        'scenario_name': FACILITY_DIR,
+        'total_fixed_cost': fixed,
+        'sites_opened': int(sites['open'].sum()),
+        'opened_sites': sites.loc[sites['open'] == 1, 'warehouse_id'].tolist(),
+        'max_sites': max_sites,
+        'rate_card': rate_card,
+        'baseline_total_cost': baseline['total_cost'],
+        'cost_saving_vs_baseline': baseline['total_cost'] - kpis['total_cost'],
+        # Split of the saving: stockout penalties avoided vs transport + holding + fixed cost
+        'stockout_saving_vs_baseline': baseline['total_stockout_cost'] - kpis['total_stockout_cost'],
+        'operating_saving_vs_baseline': (baseline['total_cost'] - baseline['total_stockout_cost'])
+                                        - (kpis['total_cost'] - kpis['total_stockout_cost']),
+        'optimization_status': status,
+        'solve_time_seconds': seconds,
+        **pruning
+    })
+
+    return {'sites': sites, 'tables': tables, 'kpis': kpis}
+
+
+def write_facility_results(result, results_dir='./results/'):
+    """Write candidate_sites.csv, shipments / stockouts and kpis.json to results/Facility_Location/"""
+    out_dir = Path(results_dir) / FACILITY_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    result['sites'].to_csv(out_dir / 'candidate_sites.csv', index=False)
+    checksums = write_tables({name: result['tables'][name] for name in ('shipments', 'stockouts')}, out_dir)
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump({**result['kpis'], CHECKSUM_KEY: checksums}, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capacitated facility location for new distribution centres")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--candidates', default=None, help="CSV of candidate sites (warehouses_enriched columns)")
+    parser.add_argument('--generate', type=int, default=DEFAULT_CANDIDATES, help="synthetic candidates if no CSV")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--max-km', type=float, default=DEFAULT_MAX_KM, help="prune candidate lanes beyond this")
+    parser.add_argument('--max-sites', type=int, default=None)
+    parser.add_argument('--rate-card', default=DEFAULT_RATE_CARD, help="'calibrated' or a lanes.RATE_CARDS name")
+    parser.add_argument('--time-limit', type=float, default=600)
+    args = parser.parse_args()
+
+    if args.candidates:
+        candidates = pd.read_csv(args.candidates)
+    else:
+        candidates = generate_candidates(args.results_dir, args.generate, args.seed)
+
+    result = run_facility_location(args.results_dir, candidates, args.max_km, args.max_sites,
+                                   args.rate_card, args.time_limit, log=print)
+    out_dir = write_facility_results(result, args.results_dir)
+
+    kpis = result['kpis']
+    print(f"{kpis['optimization_status']} in {kpis['solve_time_seconds']:.0f}s: "
+          f"opened {kpis['sites_opened']} site(s) {kpis['opened_sites']}")
+    print(f"Total cost ${kpis['total_cost']:,.0f} (saving ${kpis['cost_saving_vs_baseline']:,.0f} vs Baseline)")
+    print(f"Wrote {out_dir}")
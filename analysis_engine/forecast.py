@@ -0,0 +1,218 @@
+"""
+================================================================================
+BATCHED DEMAND FORECAST
+================================================================================
+Replaces the flat 5% CAGR projection with Holt's linear exponential smoothing
+fitted to every (region, product) series - or every category - at once. The
+history is pivoted into an n_series x T matrix and the smoothing recursion
+(error-correction form)
+
+    e[t] = y[t] - (level[t-1] + trend[t-1])
+    level[t] = level[t-1] + trend[t-1] + alpha * e[t]
+    trend[t] = trend[t-1] + alpha * beta * e[t]
+
+runs over time only, with all series and the whole (alpha, beta) grid
+updated as one G x n_series array per step. Each series keeps the grid point
+with the lowest one-step-ahead squared error.
+
+The forecast for the planning year is the sum of the next `horizon` periods
+after `lead` skipped periods. Its standard deviation combines the in-sample
+RMSE with Holt's h-step variance factors (periods treated as independent).
+
+Category-level fits are split back to (region, product) by each series'
+share of its category over the last `horizon` periods of history.
+
+Input history is a long CSV with delivery_region, product_id, period and
+units columns (one row per series and period, any sortable period label).
+The forecast is written to results/Forecast/ and is used by the optimizer
+modes when they are run with --forecast.
+
+Usage:
+    python -m analysis_engine.forecast history.csv [results_dir]
+        [--level series|category] [--horizon 12] [--lead 0]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORECAST_DIR = 'Forecast'
+FORECAST_FILE = 'demand_forecast.csv'
+
+SERIES_KEYS = ['delivery_region', 'product_id']
+
+ALPHA_GRID = np.linspace(0.05, 0.95, 10)
+BETA_GRID = np.array([0.0, 0.05, 0.1, 0.2, 0.3])
+
+DEFAULT_HORIZON = 12
+DEFAULT_LEAD = 0
+
+
+def history_matrix(history, keys=SERIES_KEYS):
+    """Long history -> (series keys, n_series x T units matrix, sorted periods)
+
+    Missing (series, period) cells are zero demand.
+    """
+    series_codes, series = pd.MultiIndex.from_frame(history[keys]).factorize()
+    period_codes, periods = pd.factorize(history['period'], sort=True)
+
+    units = np.zeros((len(series), len(periods)))
+    np.add.at(units, (series_codes, period_codes), history['units'].to_numpy(dtype=float))
+
+    return series.set_names(keys).to_frame(index=False), units, np.asarray(periods)
+
+
+def holt_fit(units, alphas=ALPHA_GRID, betas=BETA_GRID):
+    """Per-series Holt parameters and final states from a grid search
+
+    Returns arrays of length n_series: alpha, beta, level, trend, rmse.
+    """
+    alpha_grid, beta_grid = (g.ravel()[:, None] for g in np.meshgrid(alphas, betas))
+    n_series, n_periods = units.shape
+
+    level = np.broadcast_to(units[:, 0], (len(alpha_grid), n_series)).copy()
+    if n_periods > 1:
+        trend = np.broadcast_to(units[:, 1] - units[:, 0], level.shape).copy()
+    else:
+        trend = np.zeros_like(level)
+    sse = np.zeros_like(level)
+
+    for t in range(1, n_periods):
+        error = units[:, t] - (level + trend)
+        sse += error ** 2
+        level += trend + alpha_grid * error
+        trend += alpha_grid * beta_grid * error
+
+    best = sse.argmin(axis=0)
+    columns = np.arange(n_series)
+
+    return {
+        'alpha': alpha_grid[best, 0],
+        'beta': beta_grid[best, 0],
+        'level': level[best, columns],
+        'trend': trend[best, columns],
+        'rmse': np.sqrt(sse[best, columns] / max(n_periods - 1, 1))
+    }
+
+
+def holt_forecast(fit, horizon=DEFAULT_HORIZON, lead=DEFAULT_LEAD):
+    """(total, std) of periods lead+1 .. lead+horizon for every series"""
+    steps = np.arange(lead + 1, lead + horizon + 1)
+    total = horizon * fit['level'] + steps.sum() * fit['trend']
+
+    # h-step variance factor: 1 + sum_{j<h} (alpha * (1 + j * beta))^2
+    j = np.arange(lead + horizon)[:, None]
+    increments = (fit['alpha'] * (1 + j * fit['beta'])) ** 2
+    increments[0] = 0
+    factors = 1 + np.cumsum(increments, axis=0)[steps - 1]
+
+    return np.maximum(total, 0), fit['rmse'] * np.sqrt(factors.sum(axis=0))
+
+
+def forecast_demand(history, categories=None, level='series', horizon=DEFAULT_HORIZON, lead=DEFAULT_LEAD):
+    """Planning-year forecast per (region, product)
+
+    categories maps product_id -> category_name and is required for
+    level='category'.
+    """
+    keys, units, periods = history_matrix(history)
+    recent = units[:, -horizon:].sum(axis=1)
+
+    forecast = keys.copy()
+    if categories is not None:
+        forecast['category_name'] = forecast['product_id'].map(categories)
+
+    if level == 'category':
+        codes, names = pd.factorize(forecast['category_name'])
+        category_units = np.zeros((len(names), units.shape[1]))
+        np.add.at(category_units, codes, units)
+
+        fit = holt_fit(category_units)
+        total, std = holt_forecast(fit, horizon, lead)
+
+        category_recent = np.bincount(codes, weights=recent, minlength=len(names))
+        category_size = np.bincount(codes, minlength=len(names))
+        share = np.divide(recent, category_recent[codes], out=1 / category_size[codes].astype(float),
+                          where=category_recent[codes] > 0)
+
+        forecast['forecast_units'] = total[codes] * share
+        forecast['forecast_std'] = std[codes] * share
+        fit = {key: values[codes] for key, values in fit.items()}
+    elif level == 'series':
+        fit = holt_fit(units)
+        forecast['forecast_units'], forecast['forecast_std'] = holt_forecast(fit, horizon, lead)
+    else:
+        raise ValueError(f"Unknown forecast level: {level}")
+
+    forecast['history_units'] = recent
+    forecast['alpha'] = fit['alpha']
+    forecast['beta'] = fit['beta']
+    forecast['rmse'] = fit['rmse']
+
+    forecast.attrs.update(periods=len(periods), first_period=str(periods[0]), last_period=str(periods[-1]))
+    return forecast
+
+
+def forecast_kpis(forecast, level, horizon, lead):
+    """Totals and the growth implied by the forecast"""
+    history_total = float(forecast['history_units'].sum())
+    forecast_total = float(forecast['forecast_units'].sum())
+
+    return {
+        'level': level,
+        'series': len(forecast),
+        'history_periods': forecast.attrs.get('periods'),
+        'first_period': forecast.attrs.get('first_period'),
+        'last_period': forecast.attrs.get('last_period'),
+        'horizon': horizon,
+        'lead': lead,
+        'history_units': history_total,
+        'forecast_units': forecast_total,
+        'implied_growth': forecast_total / history_total - 1 if history_total else None,
+        'mean_alpha': float(forecast['alpha'].mean()),
+        'mean_beta': float(forecast['beta'].mean())
+    }
+
+
+def write_forecast(forecast, kpis, results_dir='./results/'):
+    """Write demand_forecast.csv and kpis.json to results/Forecast/"""
+    out_dir = Path(results_dir) / FORECAST_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    forecast.to_csv(out_dir / FORECAST_FILE, index=False)
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump(kpis, f, indent=2)
+
+    return out_dir
+
+
+def load_forecast(results_dir='./results/'):
+    """Forecast written by write_forecast (region, product, forecast_units, forecast_std)"""
+    return pd.read_csv(Path(results_dir) / FORECAST_DIR / FORECAST_FILE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched exponential-smoothing demand forecast")
+    parser.add_argument('history', help="CSV with delivery_region, product_id, period, units")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--level', choices=['series', 'category'], default='series')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help="periods in the planning year")
+    parser.add_argument('--lead', type=int, default=DEFAULT_LEAD, help="periods between history and planning year")
+    args = parser.parse_args()
+
+    history = pd.read_csv(args.history)
+    demand = pd.read_csv(Path(args.results_dir) / 'demand_enriched.csv', usecols=['product_id', 'category_name'])
+    categories = demand.drop_duplicates('product_id').set_index('product_id')['category_name']
+
+    forecast = forecast_demand(history, categories, args.level, args.horizon, args.lead)
+    kpis = forecast_kpis(forecast, args.level, args.horizon, args.lead)
+    out_dir = write_forecast(forecast, kpis, args.results_dir)
+
+    print(f"{kpis['series']:,} series · forecast {kpis['forecast_units']:,.0f} units "
+          f"(implied growth {kpis['implied_growth']:+.1%})")
+    print(f"Wrote {out_dir}")
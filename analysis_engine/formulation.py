@@ -0,0 +1,173 @@
+"""
+================================================================================
+FORMULATION BENCHMARK
+================================================================================
+Compares the plain allocation model with the strengthened one
+(build_model(..., strengthen=True)), which adds disaggregated linking rows
+x[i,j,p] <= min(d[j,p], cap[i,p]) y[i,p] and flow cover cuts at the demand
+points. For every instance and formulation:
+
+    root bound   LP relaxation objective (before any CBC cuts)
+    root gap     (best integer cost - root bound) / best integer cost
+    solve time   CBC wall time to optimality (or the time limit)
+
+Instances are the Baseline network and synthetic networks made by copying
+every product `scale` times with lognormal noise on demand, flow capacity and
+holding cost (fixed seed), so the model grows while keeping the lanes and
+cost structure of the real data.
+
+Usage:
+    python -m analysis_engine.formulation [results_dir] [--scales 1 2 4 8]
+        [--time-limit 300] [--gap G] [--seed 42]
+================================================================================
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from analysis_engine.model import build_model, build_network, load_model_inputs, solve_model
+
+BENCHMARK_DIR = 'Formulation_Benchmark'
+BENCHMARK_FILE = 'formulation_benchmark.csv'
+
+DEFAULT_SCALES = [1, 2, 4, 8]
+DEFAULT_TIME_LIMIT = 300
+DEFAULT_SEED = 42
+
+# Lognormal sigma of the multiplicative noise on copied products
+NOISE_SIGMA = 0.25
+
+FORMULATIONS = {'plain': False, 'strengthened': True}
+
+
+def synthetic_network(network, scale, seed=DEFAULT_SEED):
+    """Network with every product copied `scale` times; copy 0 is the original"""
+    if scale == 1:
+        return network
+
+    rng = np.random.default_rng(seed)
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    offset = int(pd.concat([points['product_id'], pairs['product_id']]).max()) + 1
+
+    def noise(size, copy):
+        return np.ones(size) if copy == 0 else rng.lognormal(0, NOISE_SIGMA, size)
+
+    copies = [
+        (
+            points.assign(product_id=points['product_id'] + copy * offset,
+                          demand=np.round(points['demand'] * noise(len(points), copy))),
+            pairs.assign(product_id=pairs['product_id'] + copy * offset,
+                         flow_capacity=np.round(pairs['flow_capacity'] * noise(len(pairs), copy)),
+                         holding_cost=pairs['holding_cost'] * noise(len(pairs), copy)),
+            arcs.assign(product_id=arcs['product_id'] + copy * offset,
+                        point=arcs['point'] + copy * len(points),
+                        pair=np.where(arcs['pair'] >= 0, arcs['pair'] + copy * len(pairs), -1))
+        )
+        for copy in range(scale)
+    ]
+
+    return {
+        **network,
+        'points': pd.concat([c[0] for c in copies], ignore_index=True),
+        'pairs': pd.concat([c[1] for c in copies], ignore_index=True),
+        'arcs': pd.concat([c[2] for c in copies], ignore_index=True)
+    }
+
+
+def solve_formulation(network, strengthen, time_limit=DEFAULT_TIME_LIMIT, gap=None):
+    """Root bound and MILP result of one formulation"""
+    relaxed, _ = build_model(network, relax=True, strengthen=strengthen, name='root_relaxation')
+    start = time.perf_counter()
+    solve_model(relaxed)
+    root_seconds = time.perf_counter() - start
+
+    prob, _ = build_model(network, strengthen=strengthen)
+    status, seconds = solve_model(prob, time_limit=time_limit, gap=gap)
+
+    return {
+        'rows': len(prob.constraints),
+        'columns': len(prob.variables()),
+        'linking_rows': sum(name.startswith('link_') for name in prob.constraints),
+        'cover_cuts': sum(name.startswith('cover_') for name in prob.constraints),
+        'root_bound': pulp.value(relaxed.objective),
+        'root_seconds': root_seconds,
+        'optimization_status': status,
+        'objective': pulp.value(prob.objective),
+        'solve_time_seconds': seconds,
+        'hit_time_limit': time_limit is not None and seconds >= time_limit
+    }
+
+
+def benchmark_instance(network, instance, time_limit=DEFAULT_TIME_LIMIT, gap=None):
+    """One row per formulation; root gaps are measured against the best integer cost found"""
+    rows = [
+        {'instance': instance, 'formulation': label, 'products': network['points']['product_id'].nunique(),
+         'binaries': len(network['pairs']), **solve_formulation(network, strengthen, time_limit, gap)}
+        for label, strengthen in FORMULATIONS.items()
+    ]
+    best = min(row['objective'] for row in rows)
+    for row in rows:
+        row['root_gap_pct'] = (best - row['root_bound']) / best * 100
+    return rows
+
+
+def run_benchmark(results_dir='./results/', scales=DEFAULT_SCALES, time_limit=DEFAULT_TIME_LIMIT, gap=None,
+                  seed=DEFAULT_SEED):
+    """Benchmark table over the Baseline network and its scaled copies"""
+    network = build_network(load_model_inputs(results_dir))
+
+    rows = []
+    for scale in scales:
+        instance = 'Baseline' if scale == 1 else f'Synthetic_x{scale}'
+        rows += benchmark_instance(synthetic_network(network, scale, seed), instance, time_limit, gap)
+
+    return pd.DataFrame(rows)
+
+
+def write_benchmark(benchmark, results_dir='./results/', time_limit=DEFAULT_TIME_LIMIT, seed=DEFAULT_SEED):
+    """Write formulation_benchmark.csv and kpis.json to results/Formulation_Benchmark/"""
+    out_dir = Path(results_dir) / BENCHMARK_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    benchmark.to_csv(out_dir / BENCHMARK_FILE, index=False)
+
+    by_formulation = benchmark.groupby('formulation')
+    kpis = {
+        'scenario_name': BENCHMARK_DIR,
+        'instances': int(benchmark['instance'].nunique()),
+        'time_limit_seconds': time_limit,
+        'seed': seed,
+        **{f'{label}_max_root_gap_pct': float(gap) for label, gap in by_formulation['root_gap_pct'].max().items()},
+        **{f'{label}_total_solve_seconds': float(seconds)
+           for label, seconds in by_formulation['solve_time_seconds'].sum().items()},
+        **{f'{label}_time_limit_hits': int(hits) for label, hits in by_formulation['hit_time_limit'].sum().items()}
+    }
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump(kpis, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Root gap and solve time: plain vs strengthened formulation")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scales', type=int, nargs='*', default=DEFAULT_SCALES, help="product copies per instance")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help="per-solve limit (seconds)")
+    parser.add_argument('--gap', type=float, default=None, help="relative MIP gap")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    benchmark = run_benchmark(args.results_dir, args.scales, args.time_limit, args.gap, args.seed)
+    out_dir = write_benchmark(benchmark, args.results_dir, args.time_limit, args.seed)
+
+    for row in benchmark.itertuples():
+        print(f"{row.instance:<14} {row.formulation:<13} {row.rows:>7,} rows  root gap {row.root_gap_pct:6.3f}%  "
+              f"{row.optimization_status} ${row.objective / 1e6:,.2f}M in {row.solve_time_seconds:6.1f}s")
+    print(f"Wrote {out_dir}")
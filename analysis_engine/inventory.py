@@ -0,0 +1,195 @@
+"""
+================================================================================
+INVENTORY POLICY ENGINE
+================================================================================
+Recomputes EOQ, safety stock and reorder points for every warehouse/product
+pair from a scenario's optimized flows instead of the static values in
+inventory_flow_capacity.csv. For a pair (i, p) serving regions j:
+
+    D[i,p]       = sum_j x[i,j,p]                                   (annual units)
+    sigma[i,p]^2 = sum_j (x[i,j,p] / demand[j,p] * demand_std_dev[j,p])^2
+    EOQ          = sqrt(2 * D * S[i] / H[i])     S = handling cost per order,
+                                                 H = holding cost per unit-year
+    safety stock = z * sigma / sqrt(365) * sqrt(L)
+    reorder pt   = D / 365 * L + safety stock
+
+with z from the scenario's service-level target and L the replenishment lead
+time in days. Regions are treated as independent, so their variances add. Pairs
+shipped from without an inventory record get a policy too, but as the model
+replenishes them on demand they carry no stockout risk.
+
+All pairs are computed in one pass: flows and variances are summed per pair
+with np.bincount and the policy formulas are plain array expressions.
+
+Usage:
+    python -m analysis_engine.inventory [results_dir] [--scenario NAME ...]
+        [--lead-time 7] [--service-level 0.95]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+POLICY_FILE = 'inventory_policy.csv'
+
+DAYS_PER_YEAR = 365
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_SERVICE_LEVEL = 0.95
+
+PAIR_KEYS = ['warehouse_id', 'product_id']
+
+
+def load_policy_inputs(results_dir='./results/'):
+    """Static inventory records, warehouse costs and regional demand"""
+    results_dir = Path(results_dir)
+
+    inventory = pd.read_csv(results_dir / 'inventory_flow_capacity.csv', usecols=[
+        'warehouse_id', 'product_id', 'current_stock_units', 'reorder_point', 'economic_order_qty'
+    ])
+    warehouses = pd.read_csv(results_dir / 'warehouses_enriched.csv', usecols=[
+        'warehouse_id', 'holding_cost_per_unit', 'handling_cost_per_order'
+    ])
+    demand = pd.read_csv(results_dir / 'demand_enriched.csv', usecols=[
+        'delivery_region', 'product_id', 'total_demand_units', 'demand_std_dev'
+    ]).rename(columns={'delivery_region': 'region'})
+
+    with open(results_dir / 'analysis_metadata.json', 'r') as f:
+        service_level = json.load(f).get('model_assumptions', {}).get('service_level_target', DEFAULT_SERVICE_LEVEL)
+
+    return {'inventory': inventory, 'warehouses': warehouses, 'demand': demand, 'service_level': service_level}
+
+
+def compute_policy(shipments, inputs, lead_time_days=DEFAULT_LEAD_TIME_DAYS, service_level=None):
+    """One row per warehouse/product pair with flows, EOQ, safety stock and reorder point"""
+    service_level = service_level or inputs['service_level']
+    inventory = inputs['inventory']
+
+    flows = shipments[['warehouse_id', 'region', 'product_id', 'quantity']].merge(
+        inputs['demand'], on=['region', 'product_id'], how='left'
+    )
+
+    # Pair index over shipped pairs and inventory records
+    keys = pd.concat([flows[PAIR_KEYS], inventory[PAIR_KEYS]], ignore_index=True)
+    codes, pairs = pd.MultiIndex.from_frame(keys).factorize()
+    pairs = pairs.set_names(PAIR_KEYS).to_frame(index=False)
+    flow_codes, inventory_codes = codes[:len(flows)], codes[len(flows):]
+    n_pairs = len(pairs)
+
+    quantity = flows['quantity'].to_numpy(dtype=float)
+    region_demand = flows['total_demand_units'].to_numpy(dtype=float)
+    share = np.divide(quantity, region_demand, out=np.zeros_like(quantity), where=region_demand > 0)
+    region_std = share * flows['demand_std_dev'].fillna(0).to_numpy(dtype=float)
+
+    annual = np.bincount(flow_codes, weights=quantity, minlength=n_pairs)
+    annual_std = np.sqrt(np.bincount(flow_codes, weights=region_std ** 2, minlength=n_pairs))
+
+    current = np.zeros(n_pairs)
+    current[inventory_codes] = inventory['current_stock_units'].to_numpy(dtype=float)
+    has_record = np.zeros(n_pairs, dtype=bool)
+    has_record[inventory_codes] = True
+
+    costs = inputs['warehouses'].set_index('warehouse_id')
+    holding = pairs['warehouse_id'].map(costs['holding_cost_per_unit']).to_numpy(dtype=float)
+    ordering = pairs['warehouse_id'].map(costs['handling_cost_per_order']).to_numpy(dtype=float)
+
+    # Policy
+    z = norm.ppf(service_level)
+    daily = annual / DAYS_PER_YEAR
+    daily_std = annual_std / np.sqrt(DAYS_PER_YEAR)
+    lead_std = daily_std * np.sqrt(lead_time_days)
+
+    eoq = np.sqrt(2 * annual * ordering / holding)
+    safety = z * lead_std
+    reorder = daily * lead_time_days + safety
+    orders = np.divide(annual, eoq, out=np.zeros_like(annual), where=eoq > 0)
+
+    # P(lead-time demand > stock on hand), only where stock is actually held
+    stockout_probability = np.where(
+        lead_std > 0,
+        norm.sf((current - daily * lead_time_days) / np.where(lead_std > 0, lead_std, 1)),
+        (current < daily * lead_time_days).astype(float)
+    )
+    stockout_probability[~has_record] = np.nan
+
+    policy = pairs.assign(
+        has_inventory_record=has_record,
+        annual_flow_units=annual,
+        annual_flow_std=annual_std,
+        daily_demand=daily,
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        safety_stock=safety,
+        reorder_point=reorder,
+        economic_order_qty=eoq,
+        orders_per_year=orders,
+        avg_inventory=eoq / 2 + safety,
+        annual_holding_cost=holding * (eoq / 2 + safety),
+        annual_ordering_cost=ordering * orders,
+        current_stock_units=current,
+        days_of_cover=np.divide(current, daily, out=np.full(n_pairs, np.nan), where=daily > 0),
+        stockout_probability=stockout_probability,
+        stockout_risk=(has_record & (current < reorder)).astype(int)
+    )
+
+    # Static inputs alongside for comparison
+    static = inventory.set_index(PAIR_KEYS)[['reorder_point', 'economic_order_qty']].add_suffix('_input')
+    policy = policy.join(static, on=PAIR_KEYS)
+
+    return policy.sort_values(PAIR_KEYS, ignore_index=True)
+
+
+def policy_summary(policy):
+    """Headline totals for the dashboard / CLI"""
+    active = policy['annual_flow_units'] > 0
+    held = active & policy['has_inventory_record']
+    return {
+        'pairs': len(policy),
+        'active_pairs': int(active.sum()),
+        'pairs_below_reorder_point': int(policy['stockout_risk'].sum()),
+        'total_safety_stock': float(policy['safety_stock'].sum()),
+        'total_annual_holding_cost': float(policy['annual_holding_cost'].sum()),
+        'total_annual_ordering_cost': float(policy['annual_ordering_cost'].sum()),
+        'mean_stockout_probability': float(policy.loc[held, 'stockout_probability'].mean())
+    }
+
+
+def write_policy(policy, results_dir='./results/', scenario='Baseline'):
+    """Write the recomputed policy next to the scenario's shipments"""
+    path = Path(results_dir) / scenario / POLICY_FILE
+    policy.to_csv(path, index=False)
+    return path
+
+
+def scenario_names(results_dir='./results/'):
+    """Scenarios listed in analysis_metadata.json"""
+    with open(Path(results_dir) / 'analysis_metadata.json', 'r') as f:
+        return json.load(f)['scenario_names']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute EOQ / safety stock / reorder points from optimized flows")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', nargs='*', help="scenarios to process (default: all)")
+    parser.add_argument('--lead-time', type=float, default=DEFAULT_LEAD_TIME_DAYS, help="replenishment lead time (days)")
+    parser.add_argument('--service-level', type=float, default=None, help="default: each scenario's service_level_target")
+    args = parser.parse_args()
+
+    inputs = load_policy_inputs(args.results_dir)
+
+    for scenario in args.scenario or scenario_names(args.results_dir):
+        scenario_dir = Path(args.results_dir) / scenario
+        with open(scenario_dir / 'kpis.json', 'r') as f:
+            service_level = args.service_level or json.load(f).get('service_level_target')
+
+        shipments = pd.read_csv(scenario_dir / 'shipments.csv')
+        policy = compute_policy(shipments, inputs, args.lead_time, service_level)
+        path = write_policy(policy, args.results_dir, scenario)
+
+        summary = policy_summary(policy)
+        print(f"{scenario}: {summary['pairs']} pairs, {summary['pairs_below_reorder_point']} below reorder point, "
+              f"safety stock {summary['total_safety_stock']:,.0f} units -> {path}")
@@ -0,0 +1,97 @@
+"""
+================================================================================
+SCENARIO KPI MATRIX
+================================================================================
+Derives every comparison metric the scenario pages need (min-max scores,
+ranks, deltas against Baseline, cost efficiency and Pareto flags) from the
+scenario comparison table in one vectorized pass over an N x K matrix, so the
+cost stays flat from the 9 standard scenarios to thousands of sweep points.
+================================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.pareto import PARETO_OBJECTIVES, objective_matrix, pareto_front_mask
+
+# +1 = higher is better, -1 = lower is better
+KPI_DIRECTIONS = {
+    'total_cost': -1,
+    'order_fulfillment_rate': 1,
+    'on_time_delivery_rate': 1,
+    'profit_improvement': 1,
+    'avg_warehouse_utilization': 1,
+    'total_stockouts': -1
+}
+
+BASELINE_SCENARIO = 'Baseline'
+
+
+def derive_kpis(kpi_comparison, baseline=BASELINE_SCENARIO):
+    """Scenario x metric matrix with scores, ranks, Baseline deltas and Pareto flags
+
+    Returns a new DataFrame (same index as kpi_comparison) holding
+    scenario_name, the raw KPIs and for each KPI m:
+        m_score      min-max score in [0, 1], 1 = best (inverted for costs)
+        m_rank       1 = best, ties share the lower rank
+        m_delta      m minus the Baseline value
+        m_delta_pct  m_delta as a percentage of the Baseline value
+    plus cost_efficiency (profit improvement per dollar of cost, %) and
+    pareto_efficient over PARETO_OBJECTIVES.
+    """
+    metrics = [m for m in KPI_DIRECTIONS if m in kpi_comparison.columns]
+    directions = np.array([KPI_DIRECTIONS[m] for m in metrics], dtype=float)
+
+    values = kpi_comparison[metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+    # Orient every column so that larger is better, then score and rank in one go
+    oriented = values * directions
+    low = np.nanmin(oriented, axis=0)
+    span = np.nanmax(oriented, axis=0) - low
+    scores = np.divide(oriented - low, span, out=np.ones_like(oriented), where=span > 0)
+    scores[np.isnan(values)] = np.nan
+
+    ranks = pd.DataFrame(oriented).rank(axis=0, ascending=False, method='min').to_numpy()
+
+    names = kpi_comparison['scenario_name'].to_numpy(dtype=object)
+    is_baseline = names == baseline
+    if is_baseline.any():
+        reference = values[is_baseline.argmax()]
+    else:
+        reference = np.full(len(metrics), np.nan)
+
+    deltas = values - reference
+    delta_pcts = np.divide(deltas, np.abs(reference), out=np.full_like(deltas, np.nan),
+                           where=reference != 0) * 100
+
+    derived = pd.DataFrame(
+        np.hstack([values, scores, ranks, deltas, delta_pcts]),
+        index=kpi_comparison.index,
+        columns=(
+            metrics
+            + [f'{m}_score' for m in metrics]
+            + [f'{m}_rank' for m in metrics]
+            + [f'{m}_delta' for m in metrics]
+            + [f'{m}_delta_pct' for m in metrics]
+        )
+    )
+    derived.insert(0, 'scenario_name', names)
+
+    if {'profit_improvement', 'total_cost'} <= set(metrics):
+        derived['cost_efficiency'] = derived['profit_improvement'] / derived['total_cost'] * 100
+
+    objectives = {m: sense for m, sense in PARETO_OBJECTIVES.items() if m in metrics}
+    if objectives:
+        derived['pareto_efficient'] = pareto_front_mask(objective_matrix(derived, objectives))
+
+    return derived
+
+
+def kpi_leaders(derived):
+    """Row of the best scenario for every KPI (from the precomputed ranks)"""
+    rank_cols = [col for col in derived.columns if col.endswith('_rank')]
+    best_rows = np.nanargmin(derived[rank_cols].to_numpy(), axis=0)
+    return {
+        col[:-len('_rank')]: derived.iloc[row]
+        for col, row in zip(rank_cols, best_rows)
+    }
@@ -0,0 +1,229 @@
+"""
+================================================================================
+LANE DISTANCE MATRIX AND RATE CARDS
+================================================================================
+Builds the full warehouse x region great-circle distance matrix from the
+coordinates in network_nodes.csv with one broadcast haversine:
+
+    a = sin(dlat / 2)^2 + cos(lat1) cos(lat2) sin(dlon / 2)^2
+    d = 2 R asin(sqrt(a))
+
+and turns it into per-lane estimates with a rate card:
+
+    unit_cost         = base_cost + cost_per_km * d        (per unit shipped)
+    transit_time_days = handling_days + ceil(d / km_per_day)
+
+The matrix is cached in results/lane_matrix.npz together with the node
+coordinates it was built from. On the next load only warehouses that are new
+or have moved get a row recomputed, and add_warehouse() appends a single row
+for a candidate site, so evaluating candidates never recomputes the matrix.
+
+Usage:
+    python -m analysis_engine.lanes [results_dir] [--rate-card standard]
+        [--rate-cards cards.json] [--calibrate]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.model import MAX_DELIVERY_DAYS, load_lanes
+
+EARTH_RADIUS_KM = 6371.0088
+
+CACHE_FILE = 'lane_matrix.npz'
+ESTIMATES_FILE = 'lane_estimates.csv'
+
+RATE_CARDS = {
+    'standard': {'base_cost': 15.0, 'cost_per_km': 0.010, 'handling_days': 2, 'km_per_day': 1000.0},
+    'express': {'base_cost': 30.0, 'cost_per_km': 0.015, 'handling_days': 1, 'km_per_day': 2500.0},
+    'economy': {'base_cost': 10.0, 'cost_per_km': 0.006, 'handling_days': 3, 'km_per_day': 600.0}
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; inputs broadcast (e.g. column x row -> matrix)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def load_rate_cards(path=None):
+    """Built-in rate cards, overridden / extended by a JSON file of {name: card}"""
+    cards = {name: dict(card) for name, card in RATE_CARDS.items()}
+    if path:
+        with open(path, 'r') as f:
+            for name, card in json.load(f).items():
+                cards[name] = {**cards.get(name, RATE_CARDS['standard']), **card}
+    return cards
+
+
+class LaneMatrix:
+    """Warehouse x region distance matrix that grows one row at a time"""
+
+    def __init__(self, regions, region_coords):
+        self.regions = list(regions)
+        self.region_coords = np.asarray(region_coords, dtype=float).reshape(-1, 2)
+        self.warehouses = []
+        self.warehouse_coords = np.empty((0, 2))
+        self.distance_km = np.empty((0, len(self.regions)))
+        self.rows_computed = 0
+
+    def _row(self, lat, lon):
+        self.rows_computed += 1
+        return haversine_km(lat, lon, self.region_coords[:, 0], self.region_coords[:, 1])
+
+    def add_warehouse(self, warehouse_id, lat, lon, distances=None):
+        """Add or move one warehouse; only its row is (re)computed"""
+        row = self._row(lat, lon) if distances is None else np.asarray(distances, dtype=float)
+
+        if warehouse_id in self.warehouses:
+            index = self.warehouses.index(warehouse_id)
+            self.warehouse_coords[index] = (lat, lon)
+            self.distance_km[index] = row
+        else:
+            self.warehouses.append(warehouse_id)
+            self.warehouse_coords = np.vstack([self.warehouse_coords, [lat, lon]])
+            self.distance_km = np.vstack([self.distance_km, row])
+
+        return row
+
+    def remove_warehouse(self, warehouse_id):
+        """Drop a warehouse row (e.g. a rejected candidate)"""
+        index = self.warehouses.index(warehouse_id)
+        del self.warehouses[index]
+        self.warehouse_coords = np.delete(self.warehouse_coords, index, axis=0)
+        self.distance_km = np.delete(self.distance_km, index, axis=0)
+
+    def distances(self, warehouse_id):
+        """Distance row of one warehouse as a region-indexed Series"""
+        return pd.Series(self.distance_km[self.warehouses.index(warehouse_id)], index=self.regions)
+
+    def frame(self):
+        """Distance matrix as a warehouse x region DataFrame"""
+        return pd.DataFrame(self.distance_km, index=self.warehouses, columns=self.regions)
+
+    def lanes(self, rate_card):
+        """Long table of every warehouse -> region lane with rate-card estimates"""
+        distance = self.distance_km.ravel()
+        transit = rate_card['handling_days'] + np.ceil(distance / rate_card['km_per_day']).astype(int)
+
+        return pd.DataFrame({
+            'warehouse_id': np.repeat(self.warehouses, len(self.regions)),
+            'region': np.tile(self.regions, len(self.warehouses)),
+            'distance_km': distance,
+            'unit_cost': rate_card['base_cost'] + rate_card['cost_per_km'] * distance,
+            'transit_time_days': transit,
+            'on_time': transit <= MAX_DELIVERY_DAYS
+        })
+
+    def save(self, path):
+        """Cache matrix and the coordinates it was computed from"""
+        np.savez(
+            path,
+            warehouses=np.array(self.warehouses, dtype=str),
+            warehouse_coords=self.warehouse_coords,
+            regions=np.array(self.regions, dtype=str),
+            region_coords=self.region_coords,
+            distance_km=self.distance_km
+        )
+
+
+def load_lane_matrix(results_dir='./results/', use_cache=True):
+    """Lane matrix for network_nodes.csv, reusing cached rows that are still valid"""
+    results_dir = Path(results_dir)
+    nodes = pd.read_csv(results_dir / 'network_nodes.csv')
+    warehouses = nodes[nodes['type'] == 'warehouse']
+    regions = nodes[nodes['type'] == 'region']
+
+    matrix = LaneMatrix(regions['id'], regions[['latitude', 'longitude']].to_numpy())
+
+    cached = {}
+    cache_path = results_dir / CACHE_FILE
+    if use_cache and cache_path.exists():
+        with np.load(cache_path) as cache:
+            # Rows are only valid for the same region list and coordinates
+            if (list(cache['regions']) == matrix.regions
+                    and np.array_equal(cache['region_coords'], matrix.region_coords)):
+                cached = {
+                    warehouse: (coords, row)
+                    for warehouse, coords, row in zip(cache['warehouses'], cache['warehouse_coords'],
+                                                      cache['distance_km'])
+                }
+
+    for warehouse_id, lat, lon in warehouses[['id', 'latitude', 'longitude']].itertuples(index=False):
+        coords, row = cached.get(warehouse_id, (None, None))
+        reuse = coords is not None and np.array_equal(coords, [lat, lon])
+        matrix.add_warehouse(warehouse_id, lat, lon, distances=row if reuse else None)
+
+    if use_cache and matrix.rows_computed:
+        matrix.save(cache_path)
+
+    return matrix
+
+
+def calibrate_rate_card(matrix, observed, km_per_day=None):
+    """Least-squares rate card from observed lanes (model.load_lanes), with R^2 of each fit"""
+    distance = matrix.frame().stack().rename('distance_km')
+    fit = observed.join(distance, on=['warehouse_id', 'region'])
+
+    design = np.column_stack([np.ones(len(fit)), fit['distance_km']])
+    (base_cost, cost_per_km), *_ = np.linalg.lstsq(design, fit['unit_cost'], rcond=None)
+    (handling, days_per_km), *_ = np.linalg.lstsq(design, fit['transit_time_days'], rcond=None)
+
+    def r_squared(actual, predicted):
+        return 1 - np.sum((actual - predicted) ** 2) / np.sum((actual - actual.mean()) ** 2)
+
+    card = {
+        'base_cost': float(base_cost),
+        'cost_per_km': float(cost_per_km),
+        'handling_days': int(max(round(handling), 0)),
+        'km_per_day': km_per_day or float(1 / days_per_km if days_per_km > 0 else np.inf)
+    }
+    quality = {
+        'lanes': len(fit),
+        'cost_r2': float(r_squared(fit['unit_cost'], design @ [base_cost, cost_per_km])),
+        'transit_r2': float(r_squared(fit['transit_time_days'], design @ [handling, days_per_km]))
+    }
+    return card, quality
+
+
+def lane_estimates(matrix, rate_card, observed=None):
+    """Rate-card estimates for every lane, with observed cost / transit where a lane is used"""
+    lanes = matrix.lanes(rate_card)
+    if observed is not None:
+        lanes = lanes.merge(
+            observed[['warehouse_id', 'region', 'unit_cost', 'transit_time_days']].rename(columns={
+                'unit_cost': 'observed_unit_cost', 'transit_time_days': 'observed_transit_days'
+            }),
+            on=['warehouse_id', 'region'], how='left'
+        )
+    return lanes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warehouse x region distance matrix and lane estimates")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--rate-card', default='standard')
+    parser.add_argument('--rate-cards', default=None, help="JSON file of extra / overriding rate cards")
+    parser.add_argument('--calibrate', action='store_true', help="fit the rate card to observed Baseline lanes")
+    args = parser.parse_args()
+
+    matrix = load_lane_matrix(args.results_dir)
+    observed = load_lanes(args.results_dir)
+    print(f"{len(matrix.warehouses)} x {len(matrix.regions)} matrix, {matrix.rows_computed} rows computed")
+
+    if args.calibrate:
+        rate_card, quality = calibrate_rate_card(matrix, observed)
+        print(f"Calibrated on {quality['lanes']} lanes: {rate_card} "
+              f"(cost R^2 {quality['cost_r2']:.2f}, transit R^2 {quality['transit_r2']:.2f})")
+    else:
+        rate_card = load_rate_cards(args.rate_cards)[args.rate_card]
+
+    path = Path(args.results_dir) / ESTIMATES_FILE
+    lane_estimates(matrix, rate_card, observed).to_csv(path, index=False)
+    print(f"Wrote {path}")
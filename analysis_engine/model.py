@@ -0,0 +1,503 @@
+"""
+================================================================================
+WAREHOUSE ALLOCATION MODEL
+================================================================================
+Rebuilds the multi-commodity allocation MILP from the inputs the engine writes
+to `results/` (demand_enriched, inventory_flow_capacity, warehouses_enriched
+and the Baseline lane costs), so post-processing modes can re-solve it:
+
+    min  sum c[i,j] x[i,j,p] + sum h[i] stock[i,p] y[i,p] + sum penalty[j,p] s[j,p]
+    s.t. sum_i x[i,j,p] + s[j,p] = demand[j,p]                 (every demand point)
+         sum_j x[i,j,p] <= flow_capacity[i,p] y[i,p]            (every stocked pair)
+         x, s >= 0,  y binary
+
+Only observed lanes (warehouse -> region pairs with a Baseline unit cost) get
+shipment arcs. Warehouse/product pairs without an inventory record are
+replenished on demand: no flow-capacity limit and no holding cost. With the
+default parameters this reproduces the Baseline scenario's objective.
+
+The network is kept as flat arrays (arcs, demand points, stocked pairs) so the
+same structure feeds the PuLP model and the vectorized recourse LP.
+================================================================================
+"""
+
+import hashlib
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix, hstack, identity
+
+INVENTORY_TURNOVER_RATE = 12
+STOCKOUT_PENALTY_RATE = 0.30
+STOCKOUT_PENALTY_MULTIPLIER = 10
+MAX_DELIVERY_DAYS = 3
+
+COST_COMPONENTS = ['total_transportation_cost', 'total_holding_cost', 'total_stockout_cost']
+
+# Row order and float precision of plan tables written by write_tables()
+CANONICAL_ORDER = {
+    'shipments': ['warehouse_id', 'region', 'product_id'],
+    'stockouts': ['region', 'product_id'],
+    'stocking': ['warehouse_id', 'product_id']
+}
+CANONICAL_DECIMALS = 6
+
+# kpis.json key holding {table file name: sha256} for the tables written next to it
+CHECKSUM_KEY = 'table_checksums'
+
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+
+def load_lanes(results_dir='./results/'):
+    """Unit cost and transit time per observed warehouse -> region lane (from Baseline shipments)"""
+    shipments = pd.read_csv(Path(results_dir) / 'Baseline' / 'shipments.csv')
+
+    lanes = shipments.assign(
+        unit_cost=shipments['transport_cost'] / shipments['quantity']
+    ).groupby(['warehouse_id', 'region'], sort=True).agg(
+        unit_cost=('unit_cost', 'first'),
+        transit_time_days=('transit_time_days', 'first')
+    ).reset_index()
+
+    lanes['on_time'] = lanes['transit_time_days'] <= MAX_DELIVERY_DAYS
+    return lanes
+
+
+def load_model_inputs(results_dir='./results/', forecast=None):
+    """Demand points, lanes, inventory pairs and warehouses as DataFrames
+
+    forecast (from analysis_engine.forecast) replaces the projected demand and
+    its standard deviation for every region/product it covers.
+    """
+    results_dir = Path(results_dir)
+
+    demand = pd.read_csv(results_dir / 'demand_enriched.csv')
+    demand = pd.DataFrame({
+        'region': demand['delivery_region'],
+        'product_id': demand['product_id'],
+        'demand': demand['total_demand_units'].astype(float),
+        'demand_std_dev': demand['demand_std_dev'].astype(float),
+        'unit_price': demand['total_sales_value'] / demand['total_demand_units_original']
+    }).sort_values(['region', 'product_id'], ignore_index=True)
+
+    if forecast is not None:
+        forecast = forecast.set_index(['delivery_region', 'product_id'])
+        keys = pd.MultiIndex.from_frame(demand[['region', 'product_id']])
+        covered = keys.isin(forecast.index)
+        matched = forecast.reindex(keys[covered])
+        demand.loc[covered, 'demand'] = matched['forecast_units'].to_numpy()
+        demand.loc[covered, 'demand_std_dev'] = matched['forecast_std'].to_numpy()
+
+    inventory = pd.read_csv(results_dir / 'inventory_flow_capacity.csv', usecols=[
+        'warehouse_id', 'product_id', 'current_stock_units', 'flow_capacity_units'
+    ]).sort_values(['warehouse_id', 'product_id'], ignore_index=True)
+
+    warehouses = pd.read_csv(results_dir / 'warehouses_enriched.csv', usecols=[
+        'warehouse_id', 'storage_capacity_m3', 'holding_cost_per_unit', 'current_volume_used_m3'
+    ]).sort_values('warehouse_id', ignore_index=True)
+
+    return {
+        'demand': demand,
+        'lanes': load_lanes(results_dir),
+        'inventory': inventory,
+        'warehouses': warehouses
+    }
+
+
+def build_network(inputs, capacity_multiplier=1.0, transport_cost_multiplier=1.0,
+                  stockout_penalty_multiplier=STOCKOUT_PENALTY_MULTIPLIER, stocked_only=False):
+    """Flat arc / point / pair arrays for one scenario's parameters
+
+    points  one row per (region, product) demand point
+    pairs   one row per (warehouse, product) with an inventory record (binary y)
+    arcs    one row per shipment variable x[i,j,p]; pair = -1 when uncapacitated
+
+    Arcs are generated sparsely: only observed lanes into demand points that
+    can carry demand. With stocked_only=True, arcs from pairs without an
+    inventory record are dropped as well, so x[i,j,p] exists only where
+    product p has flow capacity at i.
+    """
+    demand = inputs['demand']
+    holding_rate = inputs['warehouses'].set_index('warehouse_id')['holding_cost_per_unit']
+
+    points = demand.copy()
+    points['penalty'] = points['unit_price'] * STOCKOUT_PENALTY_RATE * stockout_penalty_multiplier
+
+    pairs = inputs['inventory'].copy()
+    pairs['flow_capacity'] = pairs['flow_capacity_units'] * capacity_multiplier
+    pairs['holding_cost'] = pairs['warehouse_id'].map(holding_rate) * pairs['current_stock_units']
+
+    demand_bearing = (points['demand'] > 0) | (points['demand_std_dev'] > 0)
+    arcs = points.loc[demand_bearing, ['region', 'product_id']].rename_axis('point').reset_index().merge(
+        inputs['lanes'], on='region'
+    ).merge(
+        pairs[['warehouse_id', 'product_id']].rename_axis('pair').reset_index(),
+        on=['warehouse_id', 'product_id'], how='left'
+    )
+    arcs['pair'] = arcs['pair'].fillna(-1).astype(int)
+    if stocked_only:
+        arcs = arcs[arcs['pair'] >= 0]
+    arcs['unit_cost'] = arcs['unit_cost'] * transport_cost_multiplier
+    arcs = arcs.sort_values(['point', 'warehouse_id'], ignore_index=True)
+
+    return {
+        'points': points,
+        'pairs': pairs,
+        'arcs': arcs,
+        'params': {
+            'capacity_multiplier': capacity_multiplier,
+            'transport_cost_multiplier': transport_cost_multiplier,
+            'stockout_penalty_multiplier': stockout_penalty_multiplier,
+            'stocked_only': stocked_only
+        }
+    }
+
+
+def model_size(network, warehouses):
+    """Variable and constraint counts of the sparse model vs the dense I x J x P formulation"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    n_warehouses = len(warehouses)
+    n_regions = points['region'].nunique()
+    n_products = pd.concat([points['product_id'], pairs['product_id']]).nunique()
+
+    dense = {
+        'x': n_warehouses * n_regions * n_products,
+        'y': n_warehouses * n_products,
+        's': n_regions * n_products,
+        'constraints': n_regions * n_products + n_warehouses * n_products
+    }
+    sparse = {
+        'x': len(arcs),
+        'y': len(pairs),
+        's': len(points),
+        'constraints': len(points) + int(np.unique(arcs['pair'].to_numpy()[arcs['pair'].to_numpy() >= 0]).size)
+    }
+    dense['variables'] = dense['x'] + dense['y'] + dense['s']
+    sparse['variables'] = sparse['x'] + sparse['y'] + sparse['s']
+
+    return {'dense': dense, 'sparse': sparse}
+
+
+def group_positions(keys, n_groups):
+    """Row positions for each group id 0..n_groups-1 (ids < 0 are skipped)"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    bounds = np.searchsorted(sorted_keys, np.arange(n_groups + 1))
+    return [order[bounds[g]:bounds[g + 1]] for g in range(n_groups)]
+
+
+# ============================================================================
+# MILP
+# ============================================================================
+
+def build_model(network, demand=None, relax=False, name='warehouse_allocation', strengthen=False):
+    """PuLP model of the allocation problem
+
+    demand overrides the point demand vector (e.g. a sampled scenario). With
+    relax=True the stocking variables are continuous in [0, 1]. With
+    strengthen=True the valid inequalities of add_valid_inequalities() are
+    added, which tighten the LP relaxation without changing the optimum.
+    Returns (problem, {'x': [...], 's': [...], 'y': [...]}).
+    """
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    demand = points['demand'].to_numpy() if demand is None else np.asarray(demand, dtype=float)
+
+    prob = pulp.LpProblem(name, pulp.LpMinimize)
+
+    x = [pulp.LpVariable(f'x_{k}', lowBound=0) for k in range(len(arcs))]
+    s = [pulp.LpVariable(f's_{k}', lowBound=0) for k in range(len(points))]
+    y = [pulp.LpVariable(f'y_{k}', lowBound=0, upBound=1, cat='Continuous' if relax else 'Binary')
+         for k in range(len(pairs))]
+
+    prob += pulp.LpAffineExpression(
+        list(zip(x, arcs['unit_cost'].tolist()))
+        + list(zip(s, points['penalty'].tolist()))
+        + list(zip(y, pairs['holding_cost'].tolist()))
+    )
+
+    arc_point = arcs['point'].to_numpy()
+    for point, positions in enumerate(group_positions(arc_point, len(points))):
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(x[k], 1) for k in positions] + [(s[point], 1)]),
+            sense=pulp.LpConstraintEQ, rhs=float(demand[point]), name=f'demand_{point}'
+        )
+
+    arc_pair = arcs['pair'].to_numpy()
+    capacity = pairs['flow_capacity'].tolist()
+    for pair, positions in enumerate(group_positions(arc_pair, len(pairs))):
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(x[k], 1) for k in positions] + [(y[pair], -capacity[pair])]),
+            sense=pulp.LpConstraintLE, rhs=0, name=f'capacity_{pair}'
+        )
+
+    variables = {'x': x, 's': s, 'y': y}
+    if strengthen:
+        add_valid_inequalities(prob, network, variables, demand)
+
+    return prob, variables
+
+
+def linking_bounds(network, demand):
+    """Upper bound u[k] = min(demand[j,p], flow_capacity[i,p]) on each capacitated arc (NaN if uncapacitated)"""
+    arcs = network['arcs']
+    capped = arcs['pair'].to_numpy() >= 0
+
+    bounds = np.full(len(arcs), np.nan)
+    bounds[capped] = np.minimum(
+        demand[arcs['point'].to_numpy()[capped]],
+        network['pairs']['flow_capacity'].to_numpy()[arcs['pair'].to_numpy()[capped]]
+    )
+    return bounds
+
+
+def add_valid_inequalities(prob, network, variables, demand):
+    """Disaggregated linking rows and flow cover cuts for the stocking binaries
+
+    linking     x[i,j,p] <= u[k] y[i,p] for every capacitated arc k, where
+                u[k] = min(demand[j,p], flow_capacity[i,p])
+    flow cover  for the capacitated arcs C into a demand point with
+                lambda = sum_C u[k] - demand[j,p] > 0:
+                sum_C x[k] + sum_C max(u[k] - lambda, 0) (1 - y[k]) <= demand[j,p]
+
+    Both are implied by the integer model, so only the LP relaxation changes.
+    Returns the number of (linking, cover) rows added.
+    """
+    arcs = network['arcs']
+    x, y = variables['x'], variables['y']
+    bounds = linking_bounds(network, demand)
+    arc_pair = arcs['pair'].to_numpy()
+
+    capped = np.flatnonzero(arc_pair >= 0)
+    for k in capped:
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(x[k], 1), (y[arc_pair[k]], -float(bounds[k]))]),
+            sense=pulp.LpConstraintLE, rhs=0, name=f'link_{k}'
+        )
+
+    covers = 0
+    arc_point = arcs['point'].to_numpy()
+    for point, positions in enumerate(group_positions(np.where(arc_pair >= 0, arc_point, -1), len(demand))):
+        excess = bounds[positions].sum() - demand[point]
+        weights = np.clip(bounds[positions] - excess, 0, None)
+        if len(positions) < 2 or excess <= 0 or not weights.any():
+            continue
+
+        used = positions[weights > 0]
+        prob += pulp.LpConstraint(
+            pulp.LpAffineExpression([(x[k], 1) for k in positions]
+                                    + [(y[arc_pair[k]], -float(w)) for k, w in zip(used, weights[weights > 0])]),
+            sense=pulp.LpConstraintLE, rhs=float(demand[point] - weights.sum()), name=f'cover_{point}'
+        )
+        covers += 1
+
+    return len(capped), covers
+
+
+def solve_model(prob, time_limit=None, gap=None, threads=None, msg=False, warm_start=False, seed=None, options=None):
+    """Solve with CBC; returns (status, seconds)
+
+    With warm_start=True, variable values set via setInitialValue are passed
+    to CBC as the starting incumbent. A seed pins CBC's random seeds; with
+    threads=1 and no time limit the same model then always returns the same
+    optimal solution. options are passed to CBC as extra command-line options.
+    """
+    options = list(options or [])
+    if seed is not None:
+        options += [f'randomSeed {seed}', f'randomCbcSeed {seed}']
+    solver = pulp.PULP_CBC_CMD(msg=msg, timeLimit=time_limit, gapRel=gap, threads=threads,
+                               warmStart=warm_start, options=options)
+
+    start = time.perf_counter()
+    prob.solve(solver)
+
+    return pulp.LpStatus[prob.status], time.perf_counter() - start
+
+
+def variable_values(variables):
+    """NumPy arrays of the solved x, s and y values"""
+    return {
+        key: np.array([var.varValue or 0.0 for var in values], dtype=float)
+        for key, values in variables.items()
+    }
+
+
+def set_initial_values(variables, values):
+    """Warm-start values for solve_model(warm_start=True), keyed like variable_values()"""
+    for key, var_list in variables.items():
+        for var, value in zip(var_list, values[key]):
+            # Clip solver round-off (e.g. -3e-08) back inside the variable bounds
+            if var.lowBound is not None:
+                value = max(value, var.lowBound)
+            if var.upBound is not None:
+                value = min(value, var.upBound)
+            var.setInitialValue(value)
+
+
+# ============================================================================
+# RECOURSE LP (stocking fixed)
+# ============================================================================
+
+def recourse_matrices(network):
+    """Sparse constraint matrices of the shipment LP over [x, s]"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    n_arcs, n_points = len(arcs), len(points)
+
+    a_eq = hstack([
+        csr_matrix((np.ones(n_arcs), (arcs['point'].to_numpy(), np.arange(n_arcs))), shape=(n_points, n_arcs)),
+        identity(n_points, format='csr')
+    ], format='csr')
+
+    capped = arcs['pair'].to_numpy() >= 0
+    a_ub = csr_matrix(
+        (np.ones(capped.sum()), (arcs['pair'].to_numpy()[capped], np.flatnonzero(capped))),
+        shape=(len(pairs), n_arcs + n_points)
+    )
+
+    cost = np.concatenate([arcs['unit_cost'].to_numpy(), points['penalty'].to_numpy()])
+    return {'a_eq': a_eq, 'a_ub': a_ub, 'cost': cost, 'n_arcs': n_arcs}
+
+
+def solve_recourse(network, stocked, demand, matrices=None):
+    """Optimal shipments and stockouts for a fixed stocking plan and demand vector
+
+    Returns (x, s) arrays; solved with HiGHS, which is much faster than writing
+    a CBC model when many demand scenarios are evaluated.
+    """
+    matrices = matrices or recourse_matrices(network)
+    capacity = network['pairs']['flow_capacity'].to_numpy() * np.asarray(stocked, dtype=float)
+
+    result = linprog(
+        matrices['cost'],
+        A_ub=matrices['a_ub'], b_ub=capacity,
+        A_eq=matrices['a_eq'], b_eq=np.asarray(demand, dtype=float),
+        bounds=(0, None), method='highs'
+    )
+    if not result.success:
+        raise RuntimeError(f"Recourse LP failed: {result.message}")
+
+    n_arcs = matrices['n_arcs']
+    return result.x[:n_arcs], result.x[n_arcs:]
+
+
+def recourse_sensitivity(network, stocked, demand=None, matrices=None):
+    """Recourse LP solution with its dual values and reduced costs
+
+    demand_dual[j,p]    change in cost per extra unit of demand at a point
+    capacity_dual[i,p]  change in cost per extra unit of flow capacity (<= 0)
+    reduced_cost[k]     cost increase per unit forced onto arc k (0 when used)
+    """
+    points = network['points']
+    demand = points['demand'].to_numpy() if demand is None else np.asarray(demand, dtype=float)
+    matrices = matrices or recourse_matrices(network)
+    capacity = network['pairs']['flow_capacity'].to_numpy() * np.asarray(stocked, dtype=float)
+
+    result = linprog(
+        matrices['cost'],
+        A_ub=matrices['a_ub'], b_ub=capacity,
+        A_eq=matrices['a_eq'], b_eq=demand,
+        bounds=(0, None), method='highs'
+    )
+    if not result.success:
+        raise RuntimeError(f"Recourse LP failed: {result.message}")
+
+    n_arcs = matrices['n_arcs']
+    return {
+        'x': result.x[:n_arcs],
+        's': result.x[n_arcs:],
+        'objective': float(result.fun),
+        'demand_dual': result.eqlin.marginals,
+        'capacity_dual': result.ineqlin.marginals,
+        'capacity_slack': result.ineqlin.residual,
+        'reduced_cost': result.lower.marginals[:n_arcs]
+    }
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+def plan_kpis(network, x, s, y, demand=None):
+    """Cost and service KPIs of a plan (same keys as results/<scenario>/kpis.json)"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    demand = points['demand'].to_numpy() if demand is None else np.asarray(demand, dtype=float)
+
+    transport = float(arcs['unit_cost'].to_numpy() @ x)
+    holding = float(pairs['holding_cost'].to_numpy() @ np.rint(y))
+    stockout = float(points['penalty'].to_numpy() @ s)
+
+    shipped = x > 1e-6
+    total_demand = float(demand.sum())
+    total_stockouts = float(s.sum())
+
+    return {
+        'total_transportation_cost': transport,
+        'total_holding_cost': holding,
+        'total_stockout_cost': stockout,
+        'total_cost': transport + holding + stockout,
+        'on_time_delivery_rate': float(arcs['on_time'].to_numpy()[shipped].mean()) if shipped.any() else 0.0,
+        'order_fulfillment_rate': (total_demand - total_stockouts) / total_demand if total_demand else 0.0,
+        'total_demand': total_demand,
+        'total_fulfilled': total_demand - total_stockouts,
+        'total_stockouts': total_stockouts
+    }
+
+
+def solution_tables(network, x, s, y, demand=None):
+    """Shipments, stockouts and stocking tables in the engine's CSV layout"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    demand = points['demand'].to_numpy() if demand is None else np.asarray(demand, dtype=float)
+
+    shipped = x > 1e-6
+    shipments = arcs.loc[shipped, ['warehouse_id', 'region', 'product_id', 'transit_time_days']].assign(
+        quantity=x[shipped],
+        transport_cost=x[shipped] * arcs['unit_cost'].to_numpy()[shipped],
+        meets_service_target=arcs['on_time'].to_numpy()[shipped]
+    )[['warehouse_id', 'region', 'product_id', 'quantity', 'transport_cost',
+       'transit_time_days', 'meets_service_target']].reset_index(drop=True)
+
+    short = s > 1e-6
+    stockouts = points.loc[short, ['region', 'product_id']].assign(
+        stockout_quantity=s[short],
+        stockout_penalty_cost=s[short] * points['penalty'].to_numpy()[short],
+        total_demand=demand[short]
+    ).reset_index(drop=True)
+
+    stocked = np.rint(y) > 0
+    stocking = pairs.loc[stocked, ['warehouse_id', 'product_id']].assign(
+        stocked=1,
+        flow_capacity=pairs['flow_capacity'].to_numpy()[stocked]
+    ).reset_index(drop=True)
+
+    return {'shipments': shipments, 'stockouts': stockouts, 'stocking': stocking}
+
+
+def canonical_table(table, keys):
+    """Rows sorted by keys and floats rounded, so equal plans serialize to equal bytes"""
+    floats = table.select_dtypes('float').columns
+    table = table.astype({column: float for column in floats}).round({column: CANONICAL_DECIMALS for column in floats})
+    # Rounding keeps the sign of zero; -0.0 would be written as "-0.0"
+    table[floats] = table[floats] + 0.0
+    return table.sort_values(keys, kind='mergesort', ignore_index=True)
+
+
+def write_tables(tables, out_dir):
+    """Write plan tables as canonical CSV; returns {file name: sha256 of the bytes written}
+
+    Tables named in CANONICAL_ORDER are sorted by their keys; any other
+    table keeps its row order.
+    """
+    checksums = {}
+    for name, table in tables.items():
+        keys = CANONICAL_ORDER.get(name)
+        content = (canonical_table(table, keys) if keys else table).to_csv(index=False, lineterminator='\n').encode()
+
+        (Path(out_dir) / f'{name}.csv').write_bytes(content)
+        checksums[f'{name}.csv'] = hashlib.sha256(content).hexdigest()
+
+    return checksums
@@ -0,0 +1,159 @@
+"""
+================================================================================
+MONTE CARLO EVALUATION OF A FIXED PLAN
+================================================================================
+Replays a scenario's stocking and shipment plan against random demand
+without re-optimizing. Each draw samples demand[j,p] ~ normal(total_demand_units,
+demand_std_dev) truncated at 0, then for every demand point:
+
+    fulfilled = min(demand, planned shipments)     stockout = demand - fulfilled
+
+Transport cost scales with the units actually shipped (at the plan's average
+unit cost for that point), holding cost is fixed by the stocking plan and
+stockouts are charged the usual penalty. Draws are processed in chunks of
+draws x demand points, so memory stays bounded for any number of draws.
+
+Usage:
+    python -m analysis_engine.montecarlo [results_dir] [--scenario Baseline]
+        [--draws N] [--chunk-size C] [--seed S]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.model import build_network, load_model_inputs
+from analysis_engine.stochastic import sample_demand
+
+BANDS_FILE = 'monte_carlo_bands.csv'
+
+DEFAULT_DRAWS = 10_000
+DEFAULT_CHUNK_SIZE = 1_000
+DEFAULT_SEED = 42
+
+BAND_PERCENTILES = [5, 25, 50, 75, 95]
+
+BAND_METRICS = [
+    'order_fulfillment_rate',
+    'total_stockouts',
+    'total_transportation_cost',
+    'total_stockout_cost',
+    'total_cost',
+    'profit_improvement'
+]
+
+
+def load_plan(results_dir='./results/', scenario='Baseline'):
+    """Planned shipments and unit transport cost per demand point for one scenario"""
+    scenario_dir = Path(results_dir) / scenario
+
+    with open(scenario_dir / 'kpis.json', 'r') as f:
+        kpis = json.load(f)
+
+    network = build_network(
+        load_model_inputs(results_dir),
+        capacity_multiplier=kpis.get('capacity_multiplier', 1.0),
+        transport_cost_multiplier=kpis.get('transport_cost_multiplier', 1.0),
+        stockout_penalty_multiplier=kpis.get('stockout_penalty_multiplier', 10)
+    )
+    points = network['points']
+
+    shipped = pd.read_csv(scenario_dir / 'shipments.csv').groupby(['region', 'product_id']).agg(
+        planned=('quantity', 'sum'),
+        transport_cost=('transport_cost', 'sum')
+    )
+    shipped = points[['region', 'product_id']].join(shipped, on=['region', 'product_id']).fillna(0)
+
+    planned = shipped['planned'].to_numpy()
+    unit_transport = np.divide(shipped['transport_cost'].to_numpy(), planned,
+                               out=np.zeros_like(planned), where=planned > 0)
+
+    return {
+        'scenario': scenario,
+        'points': points,
+        'planned': planned,
+        'unit_transport': unit_transport,
+        'holding_cost': kpis['total_holding_cost'],
+        'avg_unit_price': kpis['avg_unit_price'],
+        'current_profit': kpis['current_profit']
+    }
+
+
+def simulate_chunk(plan, demand):
+    """Per-draw KPIs for a (draws x points) demand matrix"""
+    fulfilled = np.minimum(demand, plan['planned'])
+    stockouts = demand - fulfilled
+
+    total_demand = demand.sum(axis=1)
+    total_fulfilled = fulfilled.sum(axis=1)
+    transport = fulfilled @ plan['unit_transport']
+    stockout_cost = stockouts @ plan['points']['penalty'].to_numpy()
+    total_cost = transport + plan['holding_cost'] + stockout_cost
+
+    return pd.DataFrame({
+        'total_demand': total_demand,
+        'total_fulfilled': total_fulfilled,
+        'total_stockouts': total_demand - total_fulfilled,
+        'order_fulfillment_rate': total_fulfilled / total_demand,
+        'total_transportation_cost': transport,
+        'total_stockout_cost': stockout_cost,
+        'total_cost': total_cost,
+        'profit_improvement': total_fulfilled * plan['avg_unit_price'] - total_cost - plan['current_profit']
+    })
+
+
+def iter_simulation(plan, n_draws=DEFAULT_DRAWS, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED):
+    """Yield per-draw KPI frames chunk by chunk"""
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, n_draws, chunk_size):
+        size = min(chunk_size, n_draws - start)
+        draws = simulate_chunk(plan, sample_demand(plan['points'], size, rng))
+        draws.index += start
+        yield draws
+
+
+def run_monte_carlo(plan, n_draws=DEFAULT_DRAWS, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED):
+    """Per-draw KPIs for all draws (one small row per draw)"""
+    return pd.concat(iter_simulation(plan, n_draws, chunk_size, seed)).rename_axis('draw')
+
+
+def percentile_bands(draws, metrics=BAND_METRICS, percentiles=BAND_PERCENTILES):
+    """Mean, std and percentiles of each KPI across draws"""
+    values = draws[metrics]
+
+    bands = pd.DataFrame({'mean': values.mean(), 'std': values.std()})
+    quantiles = values.quantile([q / 100 for q in percentiles]).T
+    quantiles.columns = [f'p{q}' for q in percentiles]
+
+    bands = bands.join(quantiles).rename_axis('metric').reset_index()
+    bands['draws'] = len(draws)
+    return bands
+
+
+def write_bands(bands, results_dir='./results/', scenario='Baseline'):
+    """Write percentile bands next to the scenario's results"""
+    path = Path(results_dir) / scenario / BANDS_FILE
+    bands.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of a fixed allocation plan")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', default='Baseline')
+    parser.add_argument('--draws', type=int, default=DEFAULT_DRAWS)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    plan = load_plan(args.results_dir, args.scenario)
+    bands = percentile_bands(run_monte_carlo(plan, args.draws, args.chunk_size, args.seed))
+    path = write_bands(bands, args.results_dir, args.scenario)
+
+    print(bands.to_string(index=False))
+    print(f"Wrote {path}")
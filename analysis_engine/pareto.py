@@ -0,0 +1,167 @@
+"""
+================================================================================
+PARETO FRONTIER / NON-DOMINATED SORTING
+================================================================================
+Non-dominated filtering and sorting of scenarios on cost vs service KPIs.
+
+Two objectives use a sort-and-sweep (O(N log N)); three or more use a
+lexicographic sort followed by a block-vectorized filter that only compares
+each block against the frontier found so far. All routines minimize every
+column; maximized KPIs are negated first (see objective_matrix).
+================================================================================
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+# Objectives and sense used to pick between scenarios
+PARETO_OBJECTIVES = {
+    'total_cost': 'min',
+    'order_fulfillment_rate': 'max',
+    'on_time_delivery_rate': 'max'
+}
+
+# Rows compared per block in the k-objective filter (bounds memory at block x frontier)
+PARETO_BLOCK_SIZE = 512
+
+
+def objective_matrix(df, objectives=PARETO_OBJECTIVES):
+    """N x K float matrix of the objective columns, negated where maximized"""
+    signs = np.array([-1.0 if sense == 'max' else 1.0 for sense in objectives.values()])
+    values = df[list(objectives)].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    return values * signs
+
+
+def _unique_sorted(values):
+    """Distinct rows in lexicographic order and the inverse map back to the input rows
+
+    Identical rows never dominate each other, so they share one result. After
+    the sort a row can only be dominated by rows that come before it.
+    """
+    unique, inverse = np.unique(values, axis=0, return_inverse=True)
+    return unique, inverse.reshape(-1)
+
+
+def _front_mask_2d(points):
+    """Non-dominated flags for distinct, lexicographically sorted 2-D points"""
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], points[:-1, 1]]))
+    return points[:, 1] < best_before
+
+
+def _front_mask_kd(points, block_size=PARETO_BLOCK_SIZE):
+    """Non-dominated flags for distinct, lexicographically sorted k-D points"""
+    efficient = np.zeros(len(points), dtype=bool)
+    frontier = points[:0]
+
+    for start in range(0, len(points), block_size):
+        block = points[start:start + block_size]
+
+        # Drop rows dominated by the frontier so far, then by survivors in the same block
+        keep = ~_dominated_by(block, frontier)
+        survivors = np.flatnonzero(keep)
+        keep[survivors] = ~_dominated_by(block[survivors], block[survivors])
+
+        efficient[start:start + block_size] = keep
+        frontier = np.vstack([frontier, block[keep]])
+
+    return efficient
+
+
+def _dominated_by(points, candidates):
+    """For each point, whether any candidate dominates it (vectorized, minimizing)"""
+    if len(points) == 0 or len(candidates) == 0:
+        return np.zeros(len(points), dtype=bool)
+
+    no_worse = (candidates[None, :, :] <= points[:, None, :]).all(axis=2)
+    better = (candidates[None, :, :] < points[:, None, :]).any(axis=2)
+    return (no_worse & better).any(axis=1)
+
+
+def pareto_front_mask(values):
+    """Boolean mask of non-dominated rows (all columns minimized, NaN rows excluded)"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values).any(axis=1)
+    mask = np.zeros(len(values), dtype=bool)
+
+    if not valid.any():
+        return mask
+
+    points, inverse = _unique_sorted(values[valid])
+    if points.shape[1] == 2:
+        front = _front_mask_2d(points)
+    else:
+        front = _front_mask_kd(points)
+
+    mask[valid] = front[inverse]
+    return mask
+
+
+def _front_ranks_2d(points):
+    """Front number (1 = frontier) for distinct, lexicographically sorted 2-D points
+
+    Each front keeps the second objective of its last member; those values are
+    non-decreasing across fronts, so a point joins the first front whose last
+    member does not dominate it, found by binary search.
+    """
+    ranks = np.empty(len(points), dtype=int)
+    last = []
+
+    for row, value in enumerate(points[:, 1]):
+        front = bisect_right(last, value)
+        if front == len(last):
+            last.append(value)
+        else:
+            last[front] = value
+        ranks[row] = front + 1
+
+    return ranks
+
+
+def pareto_ranks(values):
+    """Non-dominated sorting: front number per row (1 = Pareto-efficient, 0 = NaN row)"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values).any(axis=1)
+    ranks = np.zeros(len(values), dtype=int)
+
+    if not valid.any():
+        return ranks
+
+    points, inverse = _unique_sorted(values[valid])
+
+    if points.shape[1] == 2:
+        point_ranks = _front_ranks_2d(points)
+    else:
+        # Peel fronts; each pass is a vectorized filter over the remaining rows
+        point_ranks = np.zeros(len(points), dtype=int)
+        remaining = np.arange(len(points))
+        front = 1
+        while len(remaining):
+            keep = _front_mask_kd(points[remaining])
+            point_ranks[remaining[keep]] = front
+            remaining = remaining[~keep]
+            front += 1
+
+    ranks[valid] = point_ranks[inverse]
+    return ranks
+
+
+def scenario_frontier(kpi_comparison, objectives=PARETO_OBJECTIVES):
+    """Pareto rank and frontier flags for every scenario
+
+    Returns scenario_name, the objective columns, pareto_rank / pareto_efficient
+    over all objectives, and a <first>_vs_<other> efficiency flag for each pair
+    of the first objective with every other one (the 2-D views the dashboard plots).
+    """
+    names = list(objectives)
+    values = objective_matrix(kpi_comparison, objectives)
+
+    frontier = kpi_comparison[['scenario_name'] + names].copy()
+    frontier['pareto_rank'] = pareto_ranks(values)
+    frontier['pareto_efficient'] = frontier['pareto_rank'] == 1
+
+    for col, other in enumerate(names[1:], start=1):
+        frontier[f'{names[0]}_vs_{other}'] = pareto_front_mask(values[:, [0, col]])
+
+    return frontier
@@ -0,0 +1,202 @@
+"""
+================================================================================
+SOLUTION POOL OF NEAR-OPTIMAL ALTERNATIVE PLANS
+================================================================================
+Collects distinct plans within `gap` of a scenario's incumbent without
+re-solving the MILP. Alternatives come from single moves away from the
+incumbent, each evaluated with the shipment LP (stocking fixed):
+
+    ban_lane   no shipments on one used warehouse -> region lane
+    stock      stock one more warehouse/product pair
+    unstock    drop one stocked pair
+
+Stocking moves are screened with the incumbent's capacity duals first. The LP
+value is convex in the capacities, so for a flip of pair k
+
+    cost change >= +/- (holding[k] + dual[k] * flow_capacity[k])
+
+and moves whose bound already exceeds the gap are never solved.
+
+Only the incumbent is stored in full (the scenario's shipments.csv). The pool
+keeps one summary row per alternative (solution_pool.csv) and the shipment
+quantities that differ from the incumbent (solution_pool_diffs.csv);
+plan_shipments() rebuilds any alternative from the two.
+
+Usage:
+    python -m analysis_engine.pool [results_dir] [--scenario Baseline]
+        [--gap 0.01] [--max-plans 25]
+================================================================================
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.model import load_model_inputs, plan_kpis, recourse_matrices, recourse_sensitivity, solve_recourse
+from analysis_engine.sensitivity import scenario_network, stocking_vector
+
+POOL_FILE = 'solution_pool.csv'
+DIFFS_FILE = 'solution_pool_diffs.csv'
+
+DEFAULT_GAP = 0.01
+DEFAULT_MAX_PLANS = 25
+
+SHIPMENT_KEYS = ['warehouse_id', 'region', 'product_id']
+QUANTITY_TOLERANCE = 1e-6
+
+
+def incumbent_flows(network, scenario_dir):
+    """The scenario's stored shipments as a vector over the network's arcs"""
+    shipments = pd.read_csv(Path(scenario_dir) / 'shipments.csv')
+    flows = network['arcs'][SHIPMENT_KEYS].join(
+        shipments.set_index(SHIPMENT_KEYS)['quantity'], on=SHIPMENT_KEYS
+    )
+    return flows['quantity'].fillna(0).to_numpy(dtype=float)
+
+
+def evaluate_move(network, stocked, keep=None, matrices=None):
+    """(x over all arcs, s) for a stocking vector, optionally restricted to arcs in keep"""
+    demand = network['points']['demand'].to_numpy()
+    if keep is None:
+        return solve_recourse(network, stocked, demand, matrices)
+
+    arcs = network['arcs']
+    sub = {**network, 'arcs': arcs[keep].reset_index(drop=True)}
+    x_kept, s = solve_recourse(sub, stocked, demand)
+
+    x = np.zeros(len(arcs))
+    x[keep] = x_kept
+    return x, s
+
+
+def candidate_moves(network, stocked, x, capacity_dual, budget):
+    """Lane bans for every used lane and dual-screened stocking flips"""
+    pairs, arcs = network['pairs'], network['arcs']
+
+    used = arcs.loc[x > QUANTITY_TOLERANCE, ['warehouse_id', 'region']].drop_duplicates()
+    moves = [
+        {'move': 'ban_lane', 'warehouse_id': warehouse_id, 'region': region, 'product_id': None}
+        for warehouse_id, region in used.itertuples(index=False)
+    ]
+
+    holding = pairs['holding_cost'].to_numpy()
+    capacity = pairs['flow_capacity'].to_numpy()
+    bound = np.where(stocked > 0, -1, 1) * (holding + capacity_dual * capacity)
+    has_arcs = np.isin(np.arange(len(pairs)), arcs['pair'].to_numpy())
+
+    for k in np.flatnonzero(has_arcs & (bound <= budget)):
+        moves.append({
+            'move': 'unstock' if stocked[k] > 0 else 'stock',
+            'warehouse_id': pairs['warehouse_id'].iat[k],
+            'region': None,
+            'product_id': int(pairs['product_id'].iat[k]),
+            'pair': int(k)
+        })
+
+    return moves
+
+
+def build_pool(network, stocked, incumbent_x, gap=DEFAULT_GAP, max_plans=DEFAULT_MAX_PLANS):
+    """Pool summary and shipment diffs of distinct alternatives within gap of the incumbent
+
+    Every lane ban within the gap is kept, so there is an alternative ready
+    for each lane operations may push back on; stocking moves are capped at
+    max_plans per type (cheapest first).
+    """
+    arcs = network['arcs']
+    matrices = recourse_matrices(network)
+
+    incumbent = recourse_sensitivity(network, stocked, matrices=matrices)
+    base = plan_kpis(network, incumbent['x'], incumbent['s'], stocked)
+    budget = gap * base['total_cost']
+
+    plans, diffs, seen = [], [], set()
+    for move in candidate_moves(network, stocked, incumbent['x'], incumbent['capacity_dual'], budget):
+        y = stocked.copy()
+        keep = None
+        if move['move'] == 'ban_lane':
+            keep = ~((arcs['warehouse_id'] == move['warehouse_id']) & (arcs['region'] == move['region'])).to_numpy()
+        else:
+            y[move['pair']] = 1 - y[move['pair']]
+
+        x, s = evaluate_move(network, y, keep, matrices)
+        kpis = plan_kpis(network, x, s, y)
+        delta = kpis['total_cost'] - base['total_cost']
+        if delta > budget:
+            continue
+
+        changed = np.abs(x - incumbent_x) > QUANTITY_TOLERANCE
+        signature = np.round(x[changed], 3).tobytes() + np.flatnonzero(changed).tobytes()
+        if not changed.any() or signature in seen:
+            continue
+        seen.add(signature)
+
+        plans.append({
+            'move': move['move'],
+            'warehouse_id': move['warehouse_id'],
+            'region': move['region'],
+            'product_id': move['product_id'],
+            'cost_delta': delta,
+            'gap_pct': delta / base['total_cost'] * 100,
+            'changed_shipments': int(changed.sum()),
+            'units_moved': float(np.abs(x - incumbent_x)[changed].sum() / 2),
+            **kpis
+        })
+        diffs.append(arcs.loc[changed, SHIPMENT_KEYS].assign(
+            incumbent_quantity=incumbent_x[changed],
+            quantity=x[changed] + 0.0
+        ))
+
+    pool = pd.DataFrame(plans)
+    if pool.empty:
+        return pool, pd.DataFrame(columns=['plan_id', *SHIPMENT_KEYS, 'incumbent_quantity', 'quantity'])
+
+    pool['diff_index'] = np.arange(len(pool))
+    pool = pool.sort_values('cost_delta')
+    pool = pool[(pool['move'] == 'ban_lane') | (pool.groupby('move').cumcount() < max_plans)]
+    pool = pool.sort_values('cost_delta', ignore_index=True)
+    pool.insert(0, 'plan_id', np.arange(1, len(pool) + 1))
+
+    diffs = pd.concat([
+        diffs[index].assign(plan_id=plan_id) for plan_id, index in zip(pool['plan_id'], pool['diff_index'])
+    ], ignore_index=True)[['plan_id', *SHIPMENT_KEYS, 'incumbent_quantity', 'quantity']]
+
+    return pool.drop(columns='diff_index'), diffs
+
+
+def plan_shipments(incumbent, diffs, plan_id):
+    """Full shipment quantities of one pool plan: the incumbent with its diff applied"""
+    changes = diffs.loc[diffs['plan_id'] == plan_id].set_index(SHIPMENT_KEYS)['quantity']
+    quantities = incumbent.set_index(SHIPMENT_KEYS)['quantity']
+
+    quantities = changes.combine_first(quantities)
+    return quantities[quantities > QUANTITY_TOLERANCE].rename('quantity').reset_index()
+
+
+def write_pool(pool, diffs, results_dir='./results/', scenario='Baseline'):
+    """Write the pool summary and its diffs next to the scenario's shipments"""
+    scenario_dir = Path(results_dir) / scenario
+    pool.to_csv(scenario_dir / POOL_FILE, index=False)
+    diffs.to_csv(scenario_dir / DIFFS_FILE, index=False)
+    return scenario_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pool of near-optimal alternative plans stored as diffs")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', default='Baseline')
+    parser.add_argument('--gap', type=float, default=DEFAULT_GAP, help="max cost increase vs incumbent (fraction)")
+    parser.add_argument('--max-plans', type=int, default=DEFAULT_MAX_PLANS, help="stock / unstock plans kept")
+    args = parser.parse_args()
+
+    scenario_dir = Path(args.results_dir) / args.scenario
+    network, _ = scenario_network(load_model_inputs(args.results_dir), scenario_dir)
+
+    pool, diffs = build_pool(network, stocking_vector(network, scenario_dir),
+                             incumbent_flows(network, scenario_dir), args.gap, args.max_plans)
+    write_pool(pool, diffs, args.results_dir, args.scenario)
+
+    print(f"{args.scenario}: {len(pool)} plans within {args.gap:.1%} "
+          f"({pool['move'].value_counts().to_dict() if len(pool) else {}}), {len(diffs)} diff rows -> {scenario_dir}")
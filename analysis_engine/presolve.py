@@ -0,0 +1,247 @@
+"""
+================================================================================
+MODEL PRESOLVE
+================================================================================
+Reduces an allocation network before build_model() hands it to CBC and maps
+the reduced solution back. Every step keeps the optimal cost unchanged:
+
+    zero_capacity       y[i,p] = 0 where flow capacity is 0 (pair and its
+                        arcs removed)
+    dominated_lanes     an arc is dropped when an uncapacitated arc into the
+                        same region/product is no more expensive and no slower
+                        (its flow can always move there at no extra cost)
+    unreachable_pairs   y[i,p] = 0 for pairs left without arcs (stocking them
+                        only adds holding cost)
+    identical_products  products with the same demand, prices, inventory and
+                        flow capacity everywhere are solved once and copied;
+                        products are not coupled by any constraint
+    big_m               flow_capacity[i,p] in sum_j x <= flow_capacity * y is
+                        cut to the demand the pair's arcs can reach
+
+The report lists rows (constraints), columns (variables) and big-M
+coefficients each step removed or tightened. Demand-based steps use the
+network's point demand, so presolve is for deterministic solves only.
+
+Usage:
+    python -m analysis_engine.presolve [results_dir] [--solve]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.model import (build_model, build_network, load_model_inputs, plan_kpis, solve_model,
+                                   variable_values)
+
+PRESOLVE_DIR = 'Presolve'
+REPORT_FILE = 'presolve_report.csv'
+
+ARC_KEYS = ['warehouse_id', 'region', 'product_id']
+POINT_KEYS = ['region', 'product_id']
+PAIR_KEYS = ['warehouse_id', 'product_id']
+
+
+def model_dimensions(network):
+    """(rows, columns) of build_model(): one demand row per point and one capacity row per pair"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    return len(points) + len(pairs), len(arcs) + len(points) + len(pairs)
+
+
+def reindex(points, pairs, arcs):
+    """Network tables with arcs' point / pair positions renumbered after removals"""
+    points = points.reset_index(drop=True)
+    pairs = pairs.reset_index(drop=True)
+
+    point_index = pd.MultiIndex.from_frame(points[POINT_KEYS])
+    pair_index = pd.MultiIndex.from_frame(pairs[PAIR_KEYS])
+
+    arcs = arcs.reset_index(drop=True).assign(
+        point=point_index.get_indexer(pd.MultiIndex.from_frame(arcs[POINT_KEYS])),
+        pair=pair_index.get_indexer(pd.MultiIndex.from_frame(arcs[PAIR_KEYS]))
+    )
+    return points, pairs, arcs
+
+
+def dominated_arcs(arcs):
+    """Mask of arcs weakly dominated by an uncapacitated arc into the same point"""
+    candidates = arcs.reset_index().merge(
+        arcs.loc[arcs['pair'] < 0, ['point', 'warehouse_id', 'unit_cost', 'transit_time_days']],
+        on='point', suffixes=('', '_other')
+    )
+    candidates = candidates[candidates['warehouse_id'] != candidates['warehouse_id_other']]
+
+    cheaper = candidates['unit_cost_other'] <= candidates['unit_cost']
+    faster = candidates['transit_time_days_other'] <= candidates['transit_time_days']
+    strictly = ((candidates['unit_cost_other'] < candidates['unit_cost'])
+                | (candidates['transit_time_days_other'] < candidates['transit_time_days']))
+    # Of two identical uncapacitated arcs keep one
+    tie_break = (candidates['pair'] >= 0) | (candidates['warehouse_id_other'] < candidates['warehouse_id'])
+
+    dominated = candidates.loc[cheaper & faster & (strictly | tie_break), 'index']
+    return np.isin(np.arange(len(arcs)), dominated.to_numpy())
+
+
+def product_signatures(points, pairs):
+    """Representative product for every product (itself unless an identical one comes first)"""
+    demand = points.pivot_table(index='product_id', columns='region',
+                                values=['demand', 'demand_std_dev', 'penalty'], aggfunc='first')
+    supply = pairs.pivot_table(index='product_id', columns='warehouse_id',
+                               values=['flow_capacity', 'holding_cost'], aggfunc='first')
+    signature = demand.join(supply, how='outer').fillna(-1).round(9)
+
+    first = signature.reset_index().groupby(list(signature.columns), dropna=False)['product_id'].transform('first')
+    return pd.Series(first.to_numpy(), index=signature.index)
+
+
+def presolve(network):
+    """Reduced network, per-step report and the product map used by postsolve()"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    report = []
+
+    def log(step, before, coefficients=0):
+        rows, cols = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+        report.append({
+            'step': step,
+            'rows_removed': before[0] - rows,
+            'columns_removed': before[1] - cols,
+            'coefficients_tightened': coefficients,
+            'rows': rows,
+            'columns': cols
+        })
+
+    original = model_dimensions(network)
+
+    # Pairs that can never ship
+    before = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+    empty = pairs['flow_capacity'].to_numpy() <= 0
+    arcs = arcs[~np.isin(arcs['pair'].to_numpy(), np.flatnonzero(empty))]
+    pairs = pairs[~empty]
+    points, pairs, arcs = reindex(points, pairs, arcs)
+    log('zero_capacity', before)
+
+    before = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+    arcs = arcs[~dominated_arcs(arcs)]
+    log('dominated_lanes', before)
+
+    before = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+    pairs = pairs[np.isin(np.arange(len(pairs)), arcs['pair'].to_numpy())]
+    points, pairs, arcs = reindex(points, pairs, arcs)
+    log('unreachable_pairs', before)
+
+    before = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+    representative = product_signatures(points, pairs)
+    unique = representative.index[representative.index == representative.to_numpy()]
+    points = points[points['product_id'].isin(unique)]
+    pairs = pairs[pairs['product_id'].isin(unique)]
+    arcs = arcs[arcs['product_id'].isin(unique)]
+    points, pairs, arcs = reindex(points, pairs, arcs)
+    log('identical_products', before)
+
+    # Capacity beyond the demand a pair can reach never binds
+    before = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+    capped = arcs['pair'].to_numpy() >= 0
+    reachable = np.bincount(arcs['pair'].to_numpy()[capped],
+                            weights=points['demand'].to_numpy()[arcs['point'].to_numpy()[capped]],
+                            minlength=len(pairs))
+    tightened = reachable < pairs['flow_capacity'].to_numpy()
+    pairs = pairs.assign(flow_capacity=np.minimum(pairs['flow_capacity'].to_numpy(), reachable))
+    log('big_m', before, int(tightened.sum()))
+
+    rows, cols = model_dimensions({'points': points, 'pairs': pairs, 'arcs': arcs})
+
+    return {
+        'network': {**network, 'points': points, 'pairs': pairs, 'arcs': arcs},
+        'report': pd.DataFrame(report),
+        'representative': representative,
+        'summary': {
+            'original_rows': original[0],
+            'original_columns': original[1],
+            'rows': rows,
+            'columns': cols,
+            'arcs_removed': len(network['arcs']) - len(arcs),
+            'binaries_removed': len(network['pairs']) - len(pairs),
+            'big_m_tightened': int(tightened.sum())
+        }
+    }
+
+
+def postsolve(presolved, values, network):
+    """x, s, y of the reduced solution expanded onto the original network
+
+    Removed arcs and pairs are 0; duplicate products copy their
+    representative's values.
+    """
+    reduced = presolved['network']
+    representative = presolved['representative']
+
+    def expand(table, keys, reduced_table, reduced_values):
+        lookup = pd.MultiIndex.from_frame(reduced_table[keys])
+        mapped = table[keys].assign(product_id=table['product_id'].map(representative).fillna(table['product_id']))
+        positions = lookup.get_indexer(pd.MultiIndex.from_frame(mapped.astype({'product_id': table['product_id'].dtype})))
+        return np.where(positions >= 0, np.asarray(reduced_values)[positions], 0.0)
+
+    return {
+        'x': expand(network['arcs'], ARC_KEYS, reduced['arcs'], values['x']),
+        's': expand(network['points'], POINT_KEYS, reduced['points'], values['s']),
+        'y': expand(network['pairs'], PAIR_KEYS, reduced['pairs'], values['y'])
+    }
+
+
+def compare_solves(network, presolved, time_limit=None, gap=None):
+    """Solve the original and the presolved model; costs must match"""
+    results = {}
+    for label, net in [('original', network), ('presolved', presolved['network'])]:
+        prob, variables = build_model(net, name=f'warehouse_allocation_{label}')
+        status, seconds = solve_model(prob, time_limit=time_limit, gap=gap)
+        values = variable_values(variables)
+        if label == 'presolved':
+            values = postsolve(presolved, values, network)
+        kpis = plan_kpis(network, values['x'], values['s'], values['y'])
+        results[label] = {'status': status, 'seconds': seconds, 'total_cost': kpis['total_cost']}
+    return results
+
+
+def write_presolve(presolved, comparison=None, results_dir='./results/'):
+    """Write presolve_report.csv and kpis.json to results/Presolve/"""
+    out_dir = Path(results_dir) / PRESOLVE_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    presolved['report'].to_csv(out_dir / REPORT_FILE, index=False)
+
+    kpis = {'scenario_name': PRESOLVE_DIR, **presolved['summary']}
+    if comparison:
+        kpis.update({f'{label}_{key}': value for label, result in comparison.items() for key, value in result.items()})
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump(kpis, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presolve the allocation model and report the reductions")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--solve', action='store_true', help="solve original and presolved model and compare")
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--gap', type=float, default=None)
+    args = parser.parse_args()
+
+    network = build_network(load_model_inputs(args.results_dir))
+    presolved = presolve(network)
+    print(presolved['report'].to_string(index=False))
+
+    summary = presolved['summary']
+    print(f"{summary['original_rows']:,} x {summary['original_columns']:,} -> "
+          f"{summary['rows']:,} x {summary['columns']:,} (rows x columns)")
+
+    comparison = None
+    if args.solve:
+        comparison = compare_solves(network, presolved, args.time_limit, args.gap)
+        for label, result in comparison.items():
+            print(f"{label:>9}: {result['status']} ${result['total_cost']:,.2f} in {result['seconds']:.2f}s")
+
+    print(f"Wrote {write_presolve(presolved, comparison, args.results_dir)}")
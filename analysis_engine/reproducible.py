@@ -0,0 +1,292 @@
+"""
+================================================================================
+REPRODUCIBLE RUNS AND RESULT CHECKSUMS
+================================================================================
+An allocation MILP usually has many optimal shipment plans, and CBC may return
+a different one on every run (thread timing, random seeds), so re-running a
+scenario can rewrite its tables even though nothing changed. Reproducible mode:
+
+    solver     CBC random seeds pinned (--seed) and a single thread, no time
+               limit, so the same inputs give the same optimal plan
+    order      shipments / stockouts / stocking written in canonical order
+               (sorted by their keys, floats rounded to CANONICAL_DECIMALS)
+    checksums  sha256 of every written table stored in the scenario's
+               kpis.json under 'table_checksums'
+
+The results watcher treats a table whose recorded checksum did not change as
+unchanged, so dashboard caches survive a re-run that reproduces the same plan.
+Without --resolve the stored tables are only rewritten in canonical order and
+checksummed; --verify compares the files with their recorded checksums.
+
+A --resolve run rewrites everything derived from the plan along with it:
+revenue / profit KPIs, warehouse_utilization.csv, the scenario's cubes,
+inventory policy, sensitivity tables, Monte Carlo bands and solution pool
+(those it already has) and its rows in the comparison tables.
+
+Usage:
+    python -m analysis_engine.reproducible [results_dir] [--scenario NAME ...]
+        [--resolve] [--seed 42] [--verify]
+================================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.cubes import CUBE_FILES, load_category_map, write_scenario_cubes
+from analysis_engine.facility import volume_per_unit
+from analysis_engine.inventory import POLICY_FILE, compute_policy, load_policy_inputs, scenario_names, write_policy
+from analysis_engine.model import (CANONICAL_ORDER, CHECKSUM_KEY, build_model, load_model_inputs, plan_kpis,
+                                   solution_tables, solve_model, variable_values, write_tables)
+from analysis_engine.montecarlo import BANDS_FILE, load_plan, percentile_bands, run_monte_carlo, write_bands
+from analysis_engine.pool import POOL_FILE, build_pool, incumbent_flows, write_pool
+from analysis_engine.sensitivity import (CAPACITY_FILE, scenario_network, scenario_sensitivity, stocking_vector,
+                                         warehouse_values, write_sensitivity)
+
+DEFAULT_SEED = 42
+REPRODUCIBLE_THREADS = 1
+
+UTILIZATION_FILE = 'warehouse_utilization.csv'
+
+# Top-level tables with one row per scenario (a subset of kpis.json)
+COMPARISON_FILES = ['scenario_comparison_kpis.csv', 'cost_breakdown_comparison.csv', 'service_metrics_comparison.csv']
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_newline(path):
+    """Line ending of an existing file: CRLF for the files the original engine wrote, LF otherwise"""
+    path = Path(path)
+    return '\r\n' if path.exists() and b'\r\n' in path.read_bytes() else '\n'
+
+
+def update_kpis(scenario_dir, updates):
+    """Merge updates into the scenario's kpis.json (written last, after its tables, keeping its line endings)"""
+    path = Path(scenario_dir) / 'kpis.json'
+    newline = file_newline(path)
+    with open(path, 'r') as f:
+        kpis = json.load(f)
+
+    kpis.update(updates)
+    with open(path, 'w', newline=newline) as f:
+        json.dump(kpis, f, indent=2)
+
+    return kpis
+
+
+def canonicalize_scenario(scenario_dir):
+    """Rewrite the stored plan tables in canonical order; returns their checksums"""
+    scenario_dir = Path(scenario_dir)
+    tables = {
+        name: pd.read_csv(scenario_dir / f'{name}.csv')
+        for name in CANONICAL_ORDER if (scenario_dir / f'{name}.csv').exists()
+    }
+    return write_tables(tables, scenario_dir)
+
+
+def write_engine_csv(table, path):
+    """Write a CSV the original engine produced, keeping its line endings"""
+    table.to_csv(path, index=False, lineterminator=file_newline(path))
+
+
+def plan_utilization(previous_utilization, previous_stocking, stocking):
+    """warehouse_utilization.csv for a new stocking plan
+
+    The inputs hold no product volumes, so the storage used per unit of
+    stocked flow capacity is calibrated per warehouse on the previous plan
+    (an unchanged plan reproduces its table exactly).
+    """
+    utilization = previous_utilization.set_index('warehouse_id')
+    previous_capacity = previous_stocking.groupby('warehouse_id')['flow_capacity'].sum().reindex(utilization.index)
+    capacity = stocking.groupby('warehouse_id')['flow_capacity'].sum().reindex(utilization.index, fill_value=0)
+
+    m3_per_capacity = (utilization['used_m3'] / previous_capacity).replace(np.inf, np.nan)
+    m3_per_capacity = m3_per_capacity.fillna(utilization['used_m3'].sum() / previous_capacity.sum())
+
+    moved = ~np.isclose(capacity, previous_capacity)
+    used = (capacity * m3_per_capacity).where(moved, utilization['used_m3'])
+    return pd.DataFrame({
+        'warehouse_id': utilization.index,
+        'capacity_m3': utilization['capacity_m3'].to_numpy(),
+        'used_m3': used.to_numpy(),
+        'utilization_pct': (used / utilization['capacity_m3'] * 100).where(moved, utilization['utilization_pct']).to_numpy(),
+        'products_stocked': stocking.groupby('warehouse_id').size().reindex(utilization.index, fill_value=0).to_numpy()
+    })
+
+
+def derived_kpis(kpis, stored, utilization):
+    """Revenue, profit and utilization KPIs of a plan (prices and current figures from kpis.json)"""
+    revenue = kpis['total_fulfilled'] * stored['avg_unit_price']
+    return {
+        'avg_warehouse_utilization': float(utilization['utilization_pct'].mean()),
+        'estimated_new_revenue': revenue,
+        'estimated_new_profit': revenue - kpis['total_cost'],
+        'profit_improvement': revenue - kpis['total_cost'] - stored['current_profit']
+    }
+
+
+def resolve_scenario(inputs, scenario_dir, seed=DEFAULT_SEED, gap=None):
+    """Re-solve a scenario deterministically; writes its canonical plan tables and warehouse utilization
+
+    Returns (checksums, kpis of the new plan, kpis.json before the run).
+    """
+    scenario_dir = Path(scenario_dir)
+    network, stored = scenario_network(inputs, scenario_dir)
+    previous_stocking = pd.read_csv(scenario_dir / 'stocking.csv')
+    previous_utilization = pd.read_csv(scenario_dir / UTILIZATION_FILE, float_precision='round_trip')
+
+    prob, variables = build_model(network)
+    status, seconds = solve_model(prob, gap=gap, threads=REPRODUCIBLE_THREADS, seed=seed)
+    values = variable_values(variables)
+
+    tables = solution_tables(network, values['x'], values['s'], values['y'])
+    checksums = write_tables(tables, scenario_dir)
+
+    utilization = plan_utilization(previous_utilization, previous_stocking, tables['stocking'])
+    write_engine_csv(utilization, scenario_dir / UTILIZATION_FILE)
+
+    kpis = plan_kpis(network, values['x'], values['s'], values['y'])
+    kpis.update(derived_kpis(kpis, stored, utilization), optimization_status=status, solve_time_seconds=seconds)
+    return checksums, kpis, stored
+
+
+def refresh_derived_tables(results_dir, scenario):
+    """Rewrite the plan-derived tables a scenario already has; returns the files written"""
+    results_dir = Path(results_dir)
+    scenario_dir = results_dir / scenario
+    written = []
+
+    if all((scenario_dir / name).exists() for name in CUBE_FILES.values()):
+        write_scenario_cubes(scenario_dir, load_category_map(results_dir))
+        written += list(CUBE_FILES.values())
+
+    if (scenario_dir / POLICY_FILE).exists():
+        with open(scenario_dir / 'kpis.json', 'r') as f:
+            service_level = json.load(f).get('service_level_target')
+        policy = compute_policy(pd.read_csv(scenario_dir / 'shipments.csv'), load_policy_inputs(results_dir),
+                                service_level=service_level)
+        write_policy(policy, results_dir, scenario)
+        written.append(POLICY_FILE)
+
+    if (scenario_dir / CAPACITY_FILE).exists():
+        inputs = load_model_inputs(results_dir)
+        sensitivity = scenario_sensitivity(inputs, results_dir, scenario)
+        write_sensitivity(sensitivity, warehouse_values(sensitivity['capacity'], inputs['warehouses'],
+                                                        volume_per_unit(inputs)), results_dir)
+        written.append('sensitivity_*.csv')
+
+    if (scenario_dir / BANDS_FILE).exists():
+        write_bands(percentile_bands(run_monte_carlo(load_plan(results_dir, scenario))), results_dir, scenario)
+        written.append(BANDS_FILE)
+
+    if (scenario_dir / POOL_FILE).exists():
+        network, _ = scenario_network(load_model_inputs(results_dir), scenario_dir)
+        pool, diffs = build_pool(network, stocking_vector(network, scenario_dir),
+                                 incumbent_flows(network, scenario_dir))
+        write_pool(pool, diffs, results_dir, scenario)
+        written.append(POOL_FILE)
+
+    return written
+
+
+def update_comparison_tables(results_dir, scenario, kpis):
+    """Replace the scenario's row in each comparison table, leaving every other line untouched"""
+    for name in COMPARISON_FILES:
+        path = Path(results_dir) / name
+        if not path.exists():
+            continue
+
+        table = pd.read_csv(path, float_precision='round_trip')
+        if scenario not in set(table['scenario_name']):
+            continue
+
+        # Values that did not change keep their stored text (and integer columns stay integers)
+        row = table[table['scenario_name'] == scenario].head(1).reset_index(drop=True)
+        for column in row.columns:
+            value, stored = kpis.get(column), row.at[0, column]
+            if isinstance(value, (int, float)):
+                changed = not np.isclose(value, stored, rtol=1e-12, atol=0)
+            else:
+                changed = isinstance(value, str) and value != stored
+            if changed:
+                row[column] = value
+
+        line = row.to_csv(index=False, header=False, lineterminator=file_newline(path))
+        lines = path.read_bytes().decode().splitlines(keepends=True)
+        lines = [line if current.split(',', 1)[0] == scenario else current for current in lines]
+        path.write_bytes(''.join(lines).encode())
+
+
+def verify_scenario(scenario_dir):
+    """{table: True/False} for every table checksum recorded in the scenario's kpis.json"""
+    scenario_dir = Path(scenario_dir)
+    with open(scenario_dir / 'kpis.json', 'r') as f:
+        recorded = json.load(f).get(CHECKSUM_KEY, {})
+
+    return {
+        name: (scenario_dir / name).exists() and file_checksum(scenario_dir / name) == checksum
+        for name, checksum in recorded.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproducible runs: pinned solver, canonical tables, checksums")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', nargs='*', help="scenarios to process (default: all)")
+    parser.add_argument('--resolve', action='store_true', help="re-solve with pinned seed and threads")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--gap', type=float, default=None, help="relative MIP gap")
+    parser.add_argument('--verify', action='store_true', help="only check files against recorded checksums")
+    args = parser.parse_args()
+
+    scenarios = args.scenario or scenario_names(args.results_dir)
+    results_dir = Path(args.results_dir)
+
+    if args.verify:
+        mismatched = []
+        for scenario in scenarios:
+            checks = verify_scenario(results_dir / scenario)
+            mismatched += [f'{scenario}/{name}' for name, ok in checks.items() if not ok]
+            print(f"{scenario}: {sum(checks.values())}/{len(checks)} tables match")
+        if mismatched:
+            print(f"Changed since last checksum: {', '.join(mismatched)}")
+            sys.exit(1)
+        sys.exit(0)
+
+    inputs = load_model_inputs(args.results_dir) if args.resolve else None
+
+    for scenario in scenarios:
+        scenario_dir = results_dir / scenario
+        with open(scenario_dir / 'kpis.json', 'r') as f:
+            previous = json.load(f).get(CHECKSUM_KEY, {})
+
+        if args.resolve:
+            checksums, kpis, stored = resolve_scenario(inputs, scenario_dir, args.seed, args.gap)
+            recorded = update_kpis(scenario_dir, {
+                **kpis,
+                CHECKSUM_KEY: checksums,
+                'reproducible': {'seed': args.seed, 'threads': REPRODUCIBLE_THREADS}
+            })
+            derived = refresh_derived_tables(results_dir, scenario)
+            update_comparison_tables(results_dir, scenario, recorded)
+            note = (f"cost ${kpis['total_cost']:,.2f} ({kpis['total_cost'] - stored['total_cost']:+,.2f} vs stored), "
+                    f"rewrote {UTILIZATION_FILE}, {', '.join(derived) or 'no derived tables'}")
+        else:
+            checksums = canonicalize_scenario(scenario_dir)
+            update_kpis(scenario_dir, {CHECKSUM_KEY: checksums})
+            note = "canonicalized"
+
+        changed = sorted(name for name in checksums if previous.get(name) != checksums[name])
+        print(f"{scenario}: {note}; changed tables: {', '.join(changed) or 'none'}")
@@ -0,0 +1,174 @@
+"""
+================================================================================
+SHADOW PRICES AND REDUCED COSTS
+================================================================================
+Fixes a scenario's stocking decisions (stocking.csv) and re-solves the
+shipment LP, which reproduces the scenario's total cost, then reads off the
+LP sensitivity information:
+
+    capacity dual[i,p]   cost change per extra unit of annual flow capacity
+                         at a stocked pair (<= 0; nonzero only when binding)
+    demand dual[j,p]     cost of serving one more unit of demand at a point
+    reduced cost[i,j,p]  cost increase per unit forced onto an unused lane
+
+Flow capacity is turned into storage with the network's average m3 per stocked
+unit and the inventory turnover rate (one m3 holds 1 / m3_per_unit units,
+turned INVENTORY_TURNOVER_RATE times a year), giving the value of one extra
+m3 per warehouse:
+
+    value_per_m3[i]  = max_p -dual[i,p] * turnover / m3_per_unit       (best product)
+    pro_rata[i]      = sum_p -dual[i,p] cap[i,p] / (sum_p cap[i,p] m3_per_unit / turnover)
+
+The first-order effect of scaling every capacity by (1 + d) is
+d * sum dual[i,p] cap[i,p], which is compared against the
+Increased_Capacity_* scenarios without re-solving them.
+
+Usage:
+    python -m analysis_engine.sensitivity [results_dir] [--scenario NAME ...]
+================================================================================
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine.facility import volume_per_unit
+from analysis_engine.inventory import scenario_names
+from analysis_engine.model import (INVENTORY_TURNOVER_RATE, STOCKOUT_PENALTY_MULTIPLIER, build_network,
+                                   load_model_inputs, recourse_sensitivity)
+
+CAPACITY_FILE = 'sensitivity_capacity.csv'
+DEMAND_FILE = 'sensitivity_demand.csv'
+LANES_FILE = 'sensitivity_lanes.csv'
+WAREHOUSES_FILE = 'sensitivity_warehouses.csv'
+
+BINDING_TOLERANCE = 1e-6
+
+
+def stocking_vector(network, scenario_dir):
+    """0/1 stocking decision per network pair from a scenario's stocking.csv"""
+    stocking = pd.read_csv(Path(scenario_dir) / 'stocking.csv')
+    pairs = pd.MultiIndex.from_frame(network['pairs'][['warehouse_id', 'product_id']])
+    return pairs.isin(pd.MultiIndex.from_frame(stocking[['warehouse_id', 'product_id']])).astype(float)
+
+
+def scenario_network(inputs, scenario_dir):
+    """(network, kpis) for a scenario directory, built with the parameters in its kpis.json"""
+    with open(Path(scenario_dir) / 'kpis.json', 'r') as f:
+        kpis = json.load(f)
+
+    network = build_network(
+        inputs,
+        capacity_multiplier=kpis.get('capacity_multiplier', 1.0),
+        transport_cost_multiplier=kpis.get('transport_cost_multiplier', 1.0),
+        stockout_penalty_multiplier=kpis.get('stockout_penalty_multiplier', STOCKOUT_PENALTY_MULTIPLIER)
+    )
+    return network, kpis
+
+
+def scenario_sensitivity(inputs, results_dir='./results/', scenario='Baseline'):
+    """Dual values and reduced costs for one scenario with its stocking plan fixed"""
+    scenario_dir = Path(results_dir) / scenario
+    network, kpis = scenario_network(inputs, scenario_dir)
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+
+    stocked = stocking_vector(network, scenario_dir)
+    result = recourse_sensitivity(network, stocked)
+
+    holding = float(pairs['holding_cost'].to_numpy() @ stocked)
+    total_cost = result['objective'] + holding
+
+    capacity = pairs[['warehouse_id', 'product_id', 'flow_capacity', 'holding_cost']].assign(
+        stocked=stocked.astype(int),
+        flow_used=pairs['flow_capacity'].to_numpy() * stocked - result['capacity_slack'],
+        capacity_dual=result['capacity_dual']
+    )
+    capacity['binding'] = (capacity['stocked'] == 1) & (capacity['capacity_dual'] < -BINDING_TOLERANCE)
+
+    demand = points[['region', 'product_id', 'demand', 'penalty']].assign(
+        shortfall=result['s'],
+        demand_dual=result['demand_dual']
+    )
+
+    lanes = arcs[['warehouse_id', 'region', 'product_id', 'unit_cost', 'on_time']].assign(
+        quantity=result['x'],
+        reduced_cost=result['reduced_cost']
+    )
+
+    return {
+        'scenario': scenario,
+        'capacity': capacity,
+        'demand': demand,
+        'lanes': lanes,
+        'total_cost': total_cost,
+        'reported_cost': kpis['total_cost'],
+        'capacity_multiplier': kpis.get('capacity_multiplier', 1.0)
+    }
+
+
+def warehouse_values(capacity, warehouses, m3_per_unit, turnover=INVENTORY_TURNOVER_RATE):
+    """Marginal value of one extra m3 of storage per warehouse"""
+    held = capacity[capacity['stocked'] == 1]
+    units_per_m3 = turnover / m3_per_unit
+
+    grouped = held.assign(
+        value=-held['capacity_dual'] * held['flow_capacity'],
+        unit_value=-held['capacity_dual']
+    ).groupby('warehouse_id').agg(
+        stocked_pairs=('product_id', 'size'),
+        binding_pairs=('binding', 'sum'),
+        flow_capacity=('flow_capacity', 'sum'),
+        capacity_value=('value', 'sum'),
+        max_unit_value=('unit_value', 'max')
+    )
+
+    values = warehouses[['warehouse_id', 'storage_capacity_m3']].join(grouped, on='warehouse_id').fillna({
+        'stocked_pairs': 0, 'binding_pairs': 0, 'flow_capacity': 0, 'capacity_value': 0, 'max_unit_value': 0
+    })
+    values['value_per_m3'] = values['max_unit_value'] * units_per_m3
+    values['value_per_m3_pro_rata'] = np.divide(
+        values['capacity_value'] * units_per_m3, values['flow_capacity'],
+        out=np.zeros(len(values)), where=values['flow_capacity'].to_numpy() > 0
+    )
+    return values.drop(columns='max_unit_value').astype({'stocked_pairs': int, 'binding_pairs': int})
+
+
+def capacity_estimate(capacity, increase=0.10):
+    """First-order cost change from scaling every stocked pair's flow capacity by (1 + increase)"""
+    held = capacity['stocked'] == 1
+    return float(increase * (capacity.loc[held, 'capacity_dual'] * capacity.loc[held, 'flow_capacity']).sum())
+
+
+def write_sensitivity(sensitivity, values, results_dir='./results/'):
+    """Write the four sensitivity tables next to the scenario's shipments"""
+    scenario_dir = Path(results_dir) / sensitivity['scenario']
+
+    sensitivity['capacity'].to_csv(scenario_dir / CAPACITY_FILE, index=False)
+    sensitivity['demand'].to_csv(scenario_dir / DEMAND_FILE, index=False)
+    sensitivity['lanes'].to_csv(scenario_dir / LANES_FILE, index=False)
+    values.to_csv(scenario_dir / WAREHOUSES_FILE, index=False)
+
+    return scenario_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shadow prices and reduced costs with stocking fixed")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenario', nargs='*', help="scenarios to process (default: all)")
+    args = parser.parse_args()
+
+    inputs = load_model_inputs(args.results_dir)
+    m3_per_unit = volume_per_unit(inputs)
+
+    for scenario in args.scenario or scenario_names(args.results_dir):
+        sensitivity = scenario_sensitivity(inputs, args.results_dir, scenario)
+        values = warehouse_values(sensitivity['capacity'], inputs['warehouses'], m3_per_unit)
+        scenario_dir = write_sensitivity(sensitivity, values, args.results_dir)
+
+        gap = sensitivity['total_cost'] - sensitivity['reported_cost']
+        print(f"{scenario}: LP cost ${sensitivity['total_cost']:,.0f} ({gap:+,.0f} vs kpis.json), "
+              f"{int(sensitivity['capacity']['binding'].sum())} binding pairs, "
+              f"+10% capacity changes cost by {capacity_estimate(sensitivity['capacity']):+,.0f} -> {scenario_dir}")
@@ -0,0 +1,309 @@
+"""
+================================================================================
+STOCHASTIC DEMAND - SAMPLE AVERAGE APPROXIMATION
+================================================================================
+Two-stage version of the allocation model in which demand[j,p] is uncertain
+(normal with mean total_demand_units and sd demand_std_dev, truncated at 0):
+
+    stage 1  stocking y[i,p]                      (decided before demand is known)
+    stage 2  shipments x[i,j,p], stockouts s[j,p] (recourse per demand scenario)
+
+SAA procedure:
+    1. Draw M independent batches of K demand scenarios (one NumPy call each)
+    2. Solve the M extensive-form SAA problems in parallel; each gives a
+       candidate stocking plan and an SAA objective (their mean estimates a
+       lower bound on the true optimum). A replication only bounds the
+       optimum if CBC proved its solution optimal; with --gap its objective is
+       scaled by (1 - gap). If any replication stopped early (time limit),
+       the bound is reported as invalid instead
+    3. Evaluate every candidate, and the deterministic plan, on a common
+       out-of-sample set of N scenarios by solving the recourse LP per
+       scenario, in parallel chunks
+    4. Keep the candidate with the lowest expected cost
+
+Output (results/Stochastic_SAA/): per-scenario cost / fulfillment
+distribution, candidate summary, chosen stocking plan and kpis.json.
+
+Usage:
+    python -m analysis_engine.stochastic [results_dir] [--scenarios K]
+        [--replications M] [--evaluation N] [--workers W] [--seed S] [--forecast]
+================================================================================
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from analysis_engine.forecast import load_forecast
+from analysis_engine.model import (
+    CHECKSUM_KEY,
+    build_model,
+    build_network,
+    group_positions,
+    load_model_inputs,
+    plan_kpis,
+    recourse_matrices,
+    solve_model,
+    solve_recourse,
+    solution_tables,
+    variable_values,
+    write_tables
+)
+
+SAA_DIR = 'Stochastic_SAA'
+
+DEFAULT_SCENARIOS = 8
+DEFAULT_REPLICATIONS = 4
+DEFAULT_EVALUATION = 200
+DEFAULT_SEED = 42
+
+DISTRIBUTION_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def sample_demand(points, n_samples, rng):
+    """n_samples x n_points matrix of whole-unit demand draws (normal, truncated at 0)"""
+    mean = points['demand'].to_numpy()
+    std = points['demand_std_dev'].to_numpy()
+    draws = mean + std * rng.standard_normal((n_samples, len(mean)))
+    return np.maximum(np.rint(draws), 0)
+
+
+def build_saa_model(network, samples, name='warehouse_allocation_saa'):
+    """Extensive-form SAA model: shared y, one (x, s) block per demand scenario"""
+    points, pairs, arcs = network['points'], network['pairs'], network['arcs']
+    n_samples = len(samples)
+    weight = 1.0 / n_samples
+
+    prob = pulp.LpProblem(name, pulp.LpMinimize)
+    y = [pulp.LpVariable(f'y_{k}', cat='Binary') for k in range(len(pairs))]
+
+    point_positions = group_positions(arcs['point'].to_numpy(), len(points))
+    pair_positions = group_positions(arcs['pair'].to_numpy(), len(pairs))
+    capacity = pairs['flow_capacity'].tolist()
+    unit_cost = (arcs['unit_cost'] * weight).tolist()
+    penalty = (points['penalty'] * weight).tolist()
+
+    objective = list(zip(y, pairs['holding_cost'].tolist()))
+
+    for scenario, demand in enumerate(samples):
+        x = [pulp.LpVariable(f'x_{scenario}_{k}', lowBound=0) for k in range(len(arcs))]
+        s = [pulp.LpVariable(f's_{scenario}_{k}', lowBound=0) for k in range(len(points))]
+
+        objective += list(zip(x, unit_cost)) + list(zip(s, penalty))
+
+        for point, positions in enumerate(point_positions):
+            prob += pulp.LpConstraint(
+                pulp.LpAffineExpression([(x[k], 1) for k in positions] + [(s[point], 1)]),
+                sense=pulp.LpConstraintEQ, rhs=float(demand[point]),
+                name=f'demand_{scenario}_{point}'
+            )
+
+        for pair, positions in enumerate(pair_positions):
+            prob += pulp.LpConstraint(
+                pulp.LpAffineExpression([(x[k], 1) for k in positions] + [(y[pair], -capacity[pair])]),
+                sense=pulp.LpConstraintLE, rhs=0, name=f'capacity_{scenario}_{pair}'
+            )
+
+    prob += pulp.LpAffineExpression(objective)
+    return prob, y
+
+
+def proven_bound(prob, gap=None):
+    """Lower bound on a solved MIP's optimum, or NaN if CBC did not prove optimality
+
+    PuLP reports 'Optimal' for an incumbent found before a time limit too;
+    only sol_status tells the two apart. With a relative gap the incumbent
+    is within (1 - gap) of the best bound.
+    """
+    if prob.sol_status != pulp.LpSolutionOptimal:
+        return np.nan
+    return pulp.value(prob.objective) * (1 - (gap or 0))
+
+
+def solve_replication(network, samples, time_limit=None, gap=None):
+    """Solve one SAA problem; returns the candidate stocking plan, its SAA objective and bound"""
+    prob, y = build_saa_model(network, samples)
+    status, seconds = solve_model(prob, time_limit=time_limit, gap=gap, threads=1)
+
+    return {
+        'stocked': np.rint([var.varValue or 0.0 for var in y]),
+        'saa_objective': pulp.value(prob.objective),
+        'saa_bound': proven_bound(prob, gap),
+        'status': status,
+        'solve_seconds': seconds
+    }
+
+
+def evaluate_plans(network, plans, samples):
+    """Recourse KPIs of every plan on every demand scenario (one row per plan x scenario)"""
+    matrices = recourse_matrices(network)
+    rows = []
+
+    for plan, stocked in plans.items():
+        for sample, demand in samples:
+            x, s = solve_recourse(network, stocked, demand, matrices)
+            rows.append({'plan': plan, 'sample': sample, **plan_kpis(network, x, s, stocked, demand)})
+
+    return rows
+
+
+def _map(function, tasks, workers):
+    """Run function(*task) for each task, in a process pool when workers > 1"""
+    if workers <= 1 or len(tasks) <= 1:
+        return [function(*task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(function, *zip(*tasks)))
+
+
+def summarize_distribution(distribution):
+    """Mean, std and percentiles of total cost and fulfillment per plan"""
+    grouped = distribution.groupby('plan', sort=False)
+
+    summary = grouped.agg(
+        expected_cost=('total_cost', 'mean'),
+        cost_std=('total_cost', 'std'),
+        expected_fulfillment=('order_fulfillment_rate', 'mean'),
+        fulfillment_std=('order_fulfillment_rate', 'std'),
+        expected_on_time=('on_time_delivery_rate', 'mean')
+    )
+
+    for q in DISTRIBUTION_PERCENTILES:
+        summary[f'cost_p{q}'] = grouped['total_cost'].quantile(q / 100)
+        summary[f'fulfillment_p{q}'] = grouped['order_fulfillment_rate'].quantile(q / 100)
+
+    return summary.reset_index()
+
+
+def run_saa(results_dir='./results/', n_scenarios=DEFAULT_SCENARIOS, n_replications=DEFAULT_REPLICATIONS,
+            n_evaluation=DEFAULT_EVALUATION, seed=DEFAULT_SEED, workers=None, time_limit=300, gap=None,
+            forecast=None):
+    """Full SAA run; returns candidates, distribution, chosen stocking and kpis"""
+    workers = workers or os.cpu_count() or 1
+
+    network = build_network(load_model_inputs(results_dir, forecast))
+    points = network['points']
+
+    seeds = np.random.SeedSequence(seed).spawn(n_replications + 1)
+    batches = [sample_demand(points, n_scenarios, np.random.default_rng(s)) for s in seeds[:-1]]
+    evaluation = sample_demand(points, n_evaluation, np.random.default_rng(seeds[-1]))
+
+    # Deterministic (point-forecast) plan as the reference
+    prob, variables = build_model(network)
+    det_status, det_seconds = solve_model(prob, time_limit=time_limit, gap=gap)
+    deterministic = variable_values(variables)
+
+    # Stage 1: independent SAA replications in parallel
+    replications = _map(
+        solve_replication,
+        [(network, batch, time_limit, gap) for batch in batches],
+        workers
+    )
+
+    plans = {'Deterministic': deterministic['y']}
+    plans.update({f'SAA_{m + 1}': rep['stocked'] for m, rep in enumerate(replications)})
+
+    # Stage 2: out-of-sample recourse LPs, chunked across workers
+    indexed = list(enumerate(evaluation))
+    chunks = [indexed[c::workers] for c in range(min(workers, len(indexed)))]
+    rows = _map(evaluate_plans, [(network, plans, chunk) for chunk in chunks], workers)
+
+    distribution = pd.DataFrame([row for chunk in rows for row in chunk]).sort_values(
+        ['plan', 'sample'], ignore_index=True
+    )
+    summary = summarize_distribution(distribution)
+
+    candidates = pd.DataFrame({
+        'plan': list(plans),
+        'saa_objective': [pulp.value(prob.objective)] + [rep['saa_objective'] for rep in replications],
+        'saa_bound': [proven_bound(prob, gap)] + [rep['saa_bound'] for rep in replications],
+        'status': [det_status] + [rep['status'] for rep in replications],
+        'solve_seconds': [det_seconds] + [rep['solve_seconds'] for rep in replications],
+        'pairs_stocked': [int(stocked.sum()) for stocked in plans.values()]
+    }).merge(summary, on='plan')
+
+    saa_candidates = candidates[candidates['plan'] != 'Deterministic']
+    best = saa_candidates.loc[saa_candidates['expected_cost'].idxmin()]
+
+    # SAA bounds: mean replication bound (lower) vs best out-of-sample cost (upper);
+    # only valid if every replication was solved to proven optimality
+    lower = saa_candidates['saa_bound']
+    bound_valid = bool(lower.notna().all())
+    lower_bound = float(lower.mean()) if bound_valid else None
+    lower_bound_se = float(lower.std(ddof=1) / np.sqrt(len(lower))) if bound_valid and len(lower) > 1 else None
+    deterministic_row = candidates.loc[candidates['plan'] == 'Deterministic'].iloc[0]
+
+    stocked = plans[best['plan']]
+    x, s = solve_recourse(network, stocked, points['demand'])
+    stocking = solution_tables(network, x, s, stocked)['stocking']
+
+    kpis = {
+        'scenario_name': SAA_DIR,
+        'chosen_plan': best['plan'],
+        'samples_per_replication': n_scenarios,
+        'replications': n_replications,
+        'evaluation_samples': n_evaluation,
+        'seed': seed,
+        'workers': workers,
+        'expected_total_cost': float(best['expected_cost']),
+        'total_cost_std': float(best['cost_std']),
+        'expected_fulfillment_rate': float(best['expected_fulfillment']),
+        'expected_on_time_rate': float(best['expected_on_time']),
+        'cost_percentiles': {f'p{q}': float(best[f'cost_p{q}']) for q in DISTRIBUTION_PERCENTILES},
+        'fulfillment_percentiles': {f'p{q}': float(best[f'fulfillment_p{q}']) for q in DISTRIBUTION_PERCENTILES},
+        'deterministic_expected_cost': float(deterministic_row['expected_cost']),
+        'value_of_stochastic_solution': float(deterministic_row['expected_cost'] - best['expected_cost']),
+        'saa_bound_valid': bound_valid,
+        'saa_lower_bound': lower_bound,
+        'saa_lower_bound_se': lower_bound_se,
+        'saa_gap_estimate': float(best['expected_cost'] - lower_bound) if bound_valid else None,
+        'point_forecast_kpis': plan_kpis(network, x, s, stocked)
+    }
+
+    return {'candidates': candidates, 'distribution': distribution, 'stocking': stocking, 'kpis': kpis}
+
+
+def write_saa_results(result, results_dir='./results/'):
+    """Write SAA outputs to results/Stochastic_SAA/"""
+    out_dir = Path(results_dir) / SAA_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    result['candidates'].to_csv(out_dir / 'saa_candidates.csv', index=False)
+    result['distribution'].to_csv(out_dir / 'saa_distribution.csv', index=False)
+    checksums = write_tables({'stocking': result['stocking']}, out_dir)
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump({**result['kpis'], CHECKSUM_KEY: checksums}, f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sample average approximation of the stochastic-demand model")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--scenarios', type=int, default=DEFAULT_SCENARIOS, help="demand scenarios per SAA problem")
+    parser.add_argument('--replications', type=int, default=DEFAULT_REPLICATIONS, help="independent SAA problems")
+    parser.add_argument('--evaluation', type=int, default=DEFAULT_EVALUATION, help="out-of-sample scenarios")
+    parser.add_argument('--workers', type=int, default=None, help="parallel processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--time-limit', type=float, default=300, help="seconds per SAA solve")
+    parser.add_argument('--forecast', action='store_true', help="use results/Forecast demand")
+    args = parser.parse_args()
+
+    result = run_saa(args.results_dir, args.scenarios, args.replications, args.evaluation,
+                     args.seed, args.workers, args.time_limit,
+                     forecast=load_forecast(args.results_dir) if args.forecast else None)
+    out_dir = write_saa_results(result, args.results_dir)
+
+    kpis = result['kpis']
+    print(f"Chosen plan: {kpis['chosen_plan']}")
+    print(f"Expected cost: ${kpis['expected_total_cost']:,.0f} (sd ${kpis['total_cost_std']:,.0f})")
+    print(f"Expected fulfillment: {kpis['expected_fulfillment_rate']:.2%}")
+    print(f"Value of stochastic solution: ${kpis['value_of_stochastic_solution']:,.0f}")
+    print(f"Wrote {out_dir}")
@@ -0,0 +1,274 @@
+"""
+================================================================================
+COST VS ON-TIME FRONTIER
+================================================================================
+Traces the trade-off between total cost and on-time delivery that the single
+weighted objective cannot explore. On-time performance is measured as the
+share of shipped units that travel on lanes within MAX_DELIVERY_DAYS:
+
+    on_time_rate = sum_{k on time} x[k] / sum_k x[k]
+
+The on-time lanes can only carry a small part of demand, so a higher rate is
+bought mostly with stockouts instead of late shipments. Two modes, each a
+sequence of solves of the same model where every solve is warm-started from
+the previous point:
+
+    epsilon        min cost  s.t.  sum_k (on_time[k] - eps) x[k] >= 0
+                   for eps from the cost-optimal rate up to --max-on-time
+    lexicographic  min cost (C*), then
+                   min late units  s.t.  cost <= (1 + tol) C*
+                   for each tolerance (cost breaks ties)
+
+Each point is written as a lightweight scenario - one row with the columns of
+scenario_comparison_kpis.csv, no shipment tables - to
+results/OnTime_Frontier/, where the scenario comparison page can add it to
+the Pareto view. The floor is on on_time_volume_rate, not on the scenarios'
+on_time_delivery_rate (the on-time share of shipment lanes), so that view
+ranks every scenario on FRONTIER_OBJECTIVES, with the full scenarios' volume
+rate taken from their shipments (on_time_volume_rate()).
+
+Usage:
+    python -m analysis_engine.tradeoff [results_dir] [--method epsilon]
+        [--points 8] [--max-on-time 0.95] [--tolerances 0 0.01 0.02 0.05 0.1 0.2]
+        [--time-limit S] [--gap G] [--no-warm-start]
+================================================================================
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from analysis_engine.model import (build_model, build_network, load_model_inputs, plan_kpis, set_initial_values,
+                                   solve_model, variable_values)
+
+TRADEOFF_DIR = 'OnTime_Frontier'
+FRONTIER_FILE = 'frontier_kpis.csv'
+
+DEFAULT_POINTS = 8
+DEFAULT_MAX_ON_TIME = 0.95
+DEFAULT_TOLERANCES = [0.0, 0.01, 0.02, 0.05, 0.10, 0.20]
+
+# Weight of cost in the lexicographic stage-2 objective ($1M ~ one late unit)
+TIE_BREAK_WEIGHT = 1e-6
+
+# Pareto objectives for scenarios ranked together with frontier points
+FRONTIER_OBJECTIVES = {
+    'total_cost': 'min',
+    'order_fulfillment_rate': 'max',
+    'on_time_volume_rate': 'max'
+}
+
+
+def on_time_volume_rate(shipments):
+    """Share of shipped units on lanes that meet the service target (a scenario's shipments.csv)"""
+    quantity = shipments['quantity'].astype(float)
+    total = quantity.sum()
+    return float(quantity[shipments['meets_service_target'].astype(bool)].sum() / total) if total else 0.0
+
+
+def on_time_floor(network, variables, target):
+    """sum_k (on_time[k] - target) x[k] >= 0, i.e. on-time rate of shipped units >= target"""
+    weights = network['arcs']['on_time'].to_numpy(dtype=float) - target
+    return pulp.LpConstraint(
+        pulp.LpAffineExpression(list(zip(variables['x'], weights.tolist()))),
+        sense=pulp.LpConstraintGE, rhs=0, name='on_time_floor'
+    )
+
+
+def late_units(network, variables):
+    """Units shipped on lanes slower than MAX_DELIVERY_DAYS"""
+    late = np.flatnonzero(~network['arcs']['on_time'].to_numpy())
+    return pulp.LpAffineExpression([(variables['x'][k], 1) for k in late])
+
+
+def solve_point(prob, variables, network, previous=None, time_limit=None, gap=None, warm_start=True):
+    """Solve the current model, warm-started from the previous point's values"""
+    warm = warm_start and previous is not None
+    if warm:
+        set_initial_values(variables, previous)
+
+    status, seconds = solve_model(prob, time_limit=time_limit, gap=gap, warm_start=warm)
+    values = variable_values(variables)
+
+    on_time_units = float(network['arcs']['on_time'].to_numpy() @ values['x'])
+    kpis = plan_kpis(network, values['x'], values['s'], values['y'])
+    kpis.update(
+        on_time_volume_rate=on_time_units / kpis['total_fulfilled'] if kpis['total_fulfilled'] else 0.0,
+        on_time_share_of_demand=on_time_units / kpis['total_demand'],
+        optimization_status=status,
+        solve_time_seconds=seconds,
+        warm_started=warm
+    )
+    return kpis, values
+
+
+def solve_epsilon_frontier(network, n_points=DEFAULT_POINTS, max_on_time=DEFAULT_MAX_ON_TIME,
+                           time_limit=None, gap=None, warm_start=True):
+    """Min-cost plan for a rising floor on the on-time rate"""
+    prob, variables = build_model(network, name='cost_on_time_epsilon')
+
+    kpis, values = solve_point(prob, variables, network, time_limit=time_limit, gap=gap)
+    points = [{**kpis, 'stocked': values['y'], 'on_time_target': kpis['on_time_volume_rate']}]
+
+    for target in np.linspace(kpis['on_time_volume_rate'], max_on_time, n_points)[1:]:
+        # The floor's coefficients depend on the target, so the row is replaced
+        prob.constraints.pop('on_time_floor', None)
+        prob += on_time_floor(network, variables, float(target))
+        kpis, values = solve_point(prob, variables, network, values, time_limit, gap, warm_start)
+        points.append({**kpis, 'stocked': values['y'], 'on_time_target': float(target)})
+
+    return points
+
+
+def solve_lexicographic(network, tolerances=DEFAULT_TOLERANCES, time_limit=None, gap=None, warm_start=True):
+    """Cost first, then the fewest late units within each cost tolerance"""
+    prob, variables = build_model(network, name='cost_on_time_lexicographic')
+    cost = prob.objective
+
+    kpis, values = solve_point(prob, variables, network, time_limit=time_limit, gap=gap)
+    best_cost = kpis['total_cost']
+
+    prob += pulp.LpConstraint(cost, sense=pulp.LpConstraintLE, rhs=best_cost, name='cost_budget')
+    prob.setObjective(late_units(network, variables) + TIE_BREAK_WEIGHT * cost)
+
+    points = []
+    for tolerance in tolerances:
+        prob.constraints['cost_budget'].changeRHS(best_cost * (1 + tolerance))
+        kpis, values = solve_point(prob, variables, network, values, time_limit, gap, warm_start)
+        points.append({**kpis, 'stocked': values['y'], 'cost_tolerance': float(tolerance)})
+
+    return points
+
+
+def warehouse_utilization(inputs, stocked, results_dir='./results/'):
+    """Average utilization (%) of a stocking plan
+
+    Volume per stocked unit is calibrated per warehouse on the Baseline plan
+    (warehouse_utilization.csv), so Baseline stocking reproduces its figure.
+    """
+    results_dir = Path(results_dir)
+    inventory = inputs['inventory']
+    baseline = pd.read_csv(results_dir / 'Baseline' / 'warehouse_utilization.csv').set_index('warehouse_id')
+    baseline_stocking = pd.read_csv(results_dir / 'Baseline' / 'stocking.csv')
+
+    baseline_units = baseline_stocking.merge(inventory, on=['warehouse_id', 'product_id']).groupby(
+        'warehouse_id')['current_stock_units'].sum()
+    m3_per_unit = baseline['used_m3'] / baseline_units
+
+    units = inventory.assign(units=inventory['current_stock_units'] * np.rint(stocked)).groupby(
+        'warehouse_id')['units'].sum()
+    utilization = units * m3_per_unit / baseline['capacity_m3'] * 100
+
+    return float(utilization.reindex(baseline.index).fillna(0).mean())
+
+
+def scenario_row(point, name, baseline_kpis, utilization):
+    """One scenario_comparison_kpis.csv row for a frontier point"""
+    revenue = point['total_fulfilled'] * baseline_kpis['avg_unit_price']
+    return {
+        'scenario_name': name,
+        **{key: point[key] for key in [
+            'total_transportation_cost', 'total_holding_cost', 'total_stockout_cost', 'total_cost',
+            'on_time_delivery_rate', 'order_fulfillment_rate', 'total_demand', 'total_fulfilled', 'total_stockouts'
+        ]},
+        'avg_warehouse_utilization': utilization,
+        **{key: baseline_kpis[key] for key in [
+            'current_late_delivery_rate', 'current_profit', 'current_revenue', 'current_cost'
+        ]},
+        'estimated_new_revenue': revenue,
+        'estimated_new_profit': revenue - point['total_cost'],
+        'profit_improvement': revenue - point['total_cost'] - baseline_kpis['current_profit'],
+        'optimization_status': point['optimization_status'],
+        'solve_time_seconds': point['solve_time_seconds'],
+        **{key: baseline_kpis[key] for key in [
+            'capacity_multiplier', 'transport_cost_multiplier', 'service_level_target',
+            'stockout_penalty_multiplier', 'inventory_turnover_rate', 'avg_unit_price'
+        ]},
+        'on_time_volume_rate': point['on_time_volume_rate'],
+        'on_time_share_of_demand': point['on_time_share_of_demand'],
+        'on_time_target': point.get('on_time_target'),
+        'cost_tolerance': point.get('cost_tolerance'),
+        'warm_started': point['warm_started']
+    }
+
+
+def run_tradeoff(results_dir='./results/', method='epsilon', n_points=DEFAULT_POINTS, max_on_time=DEFAULT_MAX_ON_TIME,
+                 tolerances=DEFAULT_TOLERANCES, time_limit=None, gap=None, warm_start=True):
+    """Solve the frontier and return its scenario rows and summary KPIs"""
+    with open(Path(results_dir) / 'Baseline' / 'kpis.json', 'r') as f:
+        baseline_kpis = json.load(f)
+
+    inputs = load_model_inputs(results_dir)
+    network = build_network(inputs, stockout_penalty_multiplier=baseline_kpis['stockout_penalty_multiplier'])
+
+    start = time.perf_counter()
+    if method == 'epsilon':
+        points = solve_epsilon_frontier(network, n_points, max_on_time, time_limit, gap, warm_start)
+        names = [f"OnTime_Floor_{point['on_time_target'] * 100:.0f}pct" for point in points]
+    elif method == 'lexicographic':
+        points = solve_lexicographic(network, tolerances, time_limit, gap, warm_start)
+        names = [f"OnTime_Budget_{point['cost_tolerance'] * 100:.0f}pct" for point in points]
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    elapsed = time.perf_counter() - start
+
+    frontier = pd.DataFrame([
+        scenario_row(point, name, baseline_kpis, warehouse_utilization(inputs, point['stocked'], results_dir))
+        for point, name in zip(points, names)
+    ])
+
+    kpis = {
+        'scenario_name': TRADEOFF_DIR,
+        'method': method,
+        'points': len(frontier),
+        'min_on_time_volume_rate': float(frontier['on_time_volume_rate'].min()),
+        'max_on_time_volume_rate': float(frontier['on_time_volume_rate'].max()),
+        'min_cost': float(frontier['total_cost'].min()),
+        'max_cost': float(frontier['total_cost'].max()),
+        'warm_started_points': int(frontier['warm_started'].sum()),
+        'total_solve_seconds': float(frontier['solve_time_seconds'].sum()),
+        'total_seconds': elapsed
+    }
+    return {'frontier': frontier, 'kpis': kpis}
+
+
+def write_tradeoff(result, results_dir='./results/'):
+    """Write frontier_kpis.csv and kpis.json to results/OnTime_Frontier/"""
+    out_dir = Path(results_dir) / TRADEOFF_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    result['frontier'].to_csv(out_dir / FRONTIER_FILE, index=False)
+
+    with open(out_dir / 'kpis.json', 'w') as f:
+        json.dump(result['kpis'], f, indent=2)
+
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost vs on-time frontier (epsilon-constraint / lexicographic)")
+    parser.add_argument('results_dir', nargs='?', default='./results/')
+    parser.add_argument('--method', choices=['epsilon', 'lexicographic'], default='epsilon')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="epsilon: frontier points")
+    parser.add_argument('--max-on-time', type=float, default=DEFAULT_MAX_ON_TIME, help="epsilon: highest on-time floor")
+    parser.add_argument('--tolerances', type=float, nargs='*', default=DEFAULT_TOLERANCES,
+                        help="lexicographic: cost increases allowed over the cost optimum (fractions)")
+    parser.add_argument('--time-limit', type=float, default=None, help="per-solve limit (seconds)")
+    parser.add_argument('--gap', type=float, default=None, help="relative MIP gap")
+    parser.add_argument('--no-warm-start', action='store_true')
+    args = parser.parse_args()
+
+    result = run_tradeoff(args.results_dir, args.method, args.points, args.max_on_time, args.tolerances,
+                          args.time_limit, args.gap, not args.no_warm_start)
+    out_dir = write_tradeoff(result, args.results_dir)
+
+    for row in result['frontier'].itertuples():
+        print(f"{row.scenario_name:<24} on-time {row.on_time_volume_rate:6.1%} of units  "
+              f"cost ${row.total_cost / 1e6:6.2f}M  fulfillment {row.order_fulfillment_rate:6.1%}  "
+              f"{row.solve_time_seconds:5.1f}s")
+    print(f"Wrote {out_dir}")
@@ -0,0 +1,172 @@
+"""
+================================================================================
+RESULTS DIRECTORY WATCHER
+================================================================================
+Tracks the (size, mtime) stamp of every result file under `results/` and
+reports which files were added, modified or removed since the last check.
+Tables with a content checksum recorded in their directory's kpis.json are
+tracked by that checksum instead, so rewriting identical content is not a
+change.
+
+On Linux the watchdog package (installed with Streamlit) delivers inotify
+events, so a check is a no-op until something actually changes; without it
+the watcher falls back to mtime/size polling of the directory tree.
+================================================================================
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - polling fallback
+    FileSystemEventHandler = object
+    Observer = None
+
+from analysis_engine.model import CHECKSUM_KEY
+
+WATCHED_SUFFIXES = ('.csv', '.json', '.txt')
+
+# Even with inotify, rescan occasionally in case events were dropped
+FULL_RESCAN_SECONDS = 60
+
+
+def scan_stamps(results_dir):
+    """Map of relative path -> (size, mtime_ns) for all watched result files"""
+    results_dir = Path(results_dir)
+    stamps = {}
+
+    if not results_dir.exists():
+        return stamps
+
+    for path in results_dir.rglob('*'):
+        if path.suffix in WATCHED_SUFFIXES and path.is_file():
+            stat = path.stat()
+            stamps[path.relative_to(results_dir).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+
+    return stamps
+
+
+def content_versions(results_dir, stamps, recorded):
+    """Stamps with recorded table checksums substituted where they still hold
+
+    A table listed under CHECKSUM_KEY in the kpis.json of its directory is
+    versioned by (size, checksum) as long as it is not newer than that kpis.json
+    (writers update kpis.json after their tables). recorded caches the parsed
+    checksums per kpis.json stamp so unchanged files are not re-read.
+    """
+    versions = dict(stamps)
+
+    for relpath, stamp in stamps.items():
+        if not relpath.endswith('kpis.json'):
+            continue
+
+        cached = recorded.get(relpath)
+        if cached is None or cached[0] != stamp:
+            try:
+                with open(Path(results_dir) / relpath, 'r') as f:
+                    checksums = json.load(f).get(CHECKSUM_KEY) or {}
+            except (OSError, ValueError, AttributeError):
+                checksums = {}
+            recorded[relpath] = cached = (stamp, checksums)
+
+        folder = relpath[:-len('kpis.json')]
+        for name, checksum in cached[1].items():
+            table = folder + name
+            if table in stamps and stamps[table][1] <= stamp[1]:
+                versions[table] = (stamps[table][0], f'sha256:{checksum}')
+
+    for relpath in set(recorded) - set(stamps):
+        del recorded[relpath]
+
+    return versions
+
+
+def stamps_version(stamps):
+    """Short fingerprint of a stamp map"""
+    return hashlib.md5(repr(sorted(stamps.items())).encode()).hexdigest()[:12]
+
+
+class _DirtyFlagHandler(FileSystemEventHandler):
+    """watchdog handler that only records that something changed"""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        self.watcher._dirty.set()
+
+
+class ResultsWatcher:
+    """Incremental change detector for the results directory"""
+
+    def __init__(self, results_dir, poll_interval=2.0, use_inotify=True):
+        self.results_dir = Path(results_dir)
+        self.poll_interval = poll_interval
+        self._recorded = {}
+        self.stamps = content_versions(self.results_dir, scan_stamps(self.results_dir), self._recorded)
+        self.version = stamps_version(self.stamps)
+
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._last_scan = time.monotonic()
+        self._observer = None
+
+        if use_inotify and Observer is not None and self.results_dir.exists():
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_DirtyFlagHandler(self), str(self.results_dir), recursive=True)
+                self._observer.daemon = True
+                self._observer.start()
+            except OSError:
+                self._observer = None
+
+    @property
+    def uses_inotify(self):
+        """True when file-system events drive rescans"""
+        return self._observer is not None
+
+    def _scan_due(self, now):
+        if self._observer is not None:
+            return self._dirty.is_set() or now - self._last_scan >= FULL_RESCAN_SECONDS
+        return now - self._last_scan >= self.poll_interval
+
+    def poll(self):
+        """Rescan if due and return True when there are undrained changes"""
+        with self._lock:
+            now = time.monotonic()
+
+            if self._scan_due(now):
+                self._dirty.clear()
+                self._last_scan = now
+
+                stamps = content_versions(self.results_dir, scan_stamps(self.results_dir), self._recorded)
+                changed = {
+                    path for path in stamps.keys() | self.stamps.keys()
+                    if stamps.get(path) != self.stamps.get(path)
+                }
+
+                if changed:
+                    self.stamps = stamps
+                    self.version = stamps_version(stamps)
+                    self._pending |= changed
+
+            return bool(self._pending)
+
+    def drain(self):
+        """Return and clear the set of changed relative paths"""
+        with self._lock:
+            changed, self._pending = self._pending, set()
+            return changed
+
+    def stop(self):
+        """Stop the inotify observer thread, if any"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
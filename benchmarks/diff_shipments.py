@@ -0,0 +1,83 @@
+"""
+================================================================================
+BENCHMARK: RUN-TO-RUN SHIPMENT DIFF
+================================================================================
+Times analysis_engine.diff.diff_table() on synthetic shipment plans against
+an outer pd.merge on (warehouse_id, region, product_id). The new run drops
+1% of the lanes, adds 1% new ones and changes the quantity on 5%.
+
+Usage:
+    python benchmarks/diff_shipments.py [rows ...]
+================================================================================
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis_engine.diff import DIFF_TABLES, diff_table  # noqa: E402
+
+DEFAULT_ROWS = [1_525, 1_000_000, 5_000_000]
+
+KEYS, VALUES = DIFF_TABLES['shipments']
+
+
+def synthetic_runs(n_rows, seed=42):
+    """Two shipment tables shaped like results/Baseline/shipments.csv"""
+    rng = np.random.default_rng(seed)
+    warehouses = np.array([f'WH{i:03d}' for i in range(50)])
+    regions = np.array([f'Region {i:02d}' for i in range(20)])
+
+    # Unique lanes: sample distinct (warehouse, region, product) codes
+    lanes = rng.choice(len(warehouses) * len(regions) * max(n_rows, 1), size=int(n_rows * 1.01), replace=False)
+    warehouse, rest = np.divmod(lanes, len(regions) * max(n_rows, 1))
+    region, product = np.divmod(rest, max(n_rows, 1))
+
+    old = pd.DataFrame({
+        'warehouse_id': warehouses[warehouse],
+        'region': regions[region],
+        'product_id': product,
+        'quantity': rng.gamma(shape=1.2, scale=300, size=len(lanes)).round(),
+        'transport_cost': rng.gamma(shape=1.5, scale=4_000, size=len(lanes))
+    })
+    new = old.copy()
+
+    changed = rng.random(len(lanes)) < 0.05
+    new.loc[changed, 'quantity'] += rng.integers(1, 100, size=changed.sum())
+    cut = len(lanes) - n_rows
+    return old.iloc[:n_rows], new.iloc[cut:].reset_index(drop=True)
+
+
+def merge_diff(old, new):
+    """Reference: outer merge on the string keys"""
+    merged = old.merge(new, on=KEYS, how='outer', suffixes=('_old', '_new'), indicator=True)
+    for value in VALUES:
+        merged[f'{value}_delta'] = merged[f'{value}_new'].fillna(0) - merged[f'{value}_old'].fillna(0)
+    moved = merged[[f'{value}_delta' for value in VALUES]].abs().max(axis=1) > 1e-4
+    return merged[(merged['_merge'] != 'both') | moved]
+
+
+def measure(diff, *args):
+    """Return (change rows, seconds)"""
+    start = time.perf_counter()
+    changes = diff(*args)
+    return len(changes[0] if isinstance(changes, tuple) else changes), time.perf_counter() - start
+
+
+def main(rows):
+    print(f"{'rows':>12} {'changes':>10} {'encoded s':>10} {'merge s':>9} {'speedup':>8}")
+    for n_rows in rows:
+        old, new = synthetic_runs(n_rows)
+        changes, encoded_s = measure(diff_table, old, new, KEYS, VALUES)
+        merged, merge_s = measure(merge_diff, old, new)
+        assert changes == merged
+        print(f"{n_rows:>12,} {changes:>10,} {encoded_s:>10.3f} {merge_s:>9.3f} {merge_s / encoded_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
@@ -0,0 +1,70 @@
+"""
+================================================================================
+BENCHMARK: BATCHED EXPONENTIAL-SMOOTHING FORECAST
+================================================================================
+Times the vectorized Holt grid search in analysis_engine.forecast over many
+synthetic monthly series against the same fit done one series at a time in
+Python (measured on a sample and extrapolated).
+
+Usage:
+    python benchmarks/forecast_batch.py [series ...]
+================================================================================
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis_engine.forecast import ALPHA_GRID, BETA_GRID, holt_fit, holt_forecast  # noqa: E402
+
+DEFAULT_SERIES = [1_543, 10_000, 50_000]
+PERIODS = 36
+LOOP_SAMPLE = 50
+
+
+def synthetic_history(n_series, n_periods=PERIODS, seed=42):
+    """Monthly units with a mild trend and noise, shaped like region/product demand"""
+    rng = np.random.default_rng(seed)
+    level = rng.gamma(shape=2.0, scale=20.0, size=(n_series, 1))
+    trend = 1 + 0.004 * np.arange(n_periods)
+    return np.maximum(level * trend + rng.normal(0, 0.2 * level + 0.5, (n_series, n_periods)), 0)
+
+
+def loop_fit(series):
+    """Reference: grid search for a single series in plain Python"""
+    best = None
+    for beta in BETA_GRID:
+        for alpha in ALPHA_GRID:
+            level, trend, sse = series[0], series[1] - series[0], 0.0
+            for value in series[1:]:
+                error = value - (level + trend)
+                sse += error * error
+                level, trend = level + trend + alpha * error, trend + alpha * beta * error
+            if best is None or sse < best[0]:
+                best = (sse, alpha, beta)
+    return best
+
+
+def main(sizes):
+    print(f"{'series':>10} {'vectorized s':>13} {'loop s (est.)':>14} {'speed-up':>9}")
+    for n_series in sizes:
+        units = synthetic_history(n_series)
+
+        start = time.perf_counter()
+        holt_forecast(holt_fit(units))
+        vectorized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for series in units[:LOOP_SAMPLE]:
+            loop_fit(series)
+        loop = (time.perf_counter() - start) / LOOP_SAMPLE * n_series
+
+        print(f"{n_series:>10,} {vectorized:>13.3f} {loop:>14.1f} {loop / vectorized:>8,.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SERIES)
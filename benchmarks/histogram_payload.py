@@ -0,0 +1,71 @@
+"""
+================================================================================
+BENCHMARK: TRANSIT-TIME HISTOGRAM PAYLOAD
+================================================================================
+Compares the serialized figure size (what Streamlit sends over the websocket)
+and build time of a raw go.Histogram over every shipment row against the
+server-side binned go.Bar used by the dashboard.
+
+Usage:
+    python benchmarks/histogram_payload.py [rows ...]
+================================================================================
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis_engine.binning import histogram_bins, unit_bin_edges  # noqa: E402
+
+DEFAULT_ROWS = [1_525, 100_000, 1_000_000]
+
+
+def synthetic_shipments(n_rows, seed=42):
+    """Transit days and quantities shaped like results/Baseline/shipments.csv"""
+    rng = np.random.default_rng(seed)
+    transit = rng.integers(1, 10, size=n_rows).astype(float)
+    quantity = rng.gamma(shape=1.2, scale=300, size=n_rows).round()
+    return transit, quantity
+
+
+def raw_histogram(transit):
+    """Original chart: every row (and a per-row colour array) in the payload"""
+    return go.Figure(go.Histogram(x=transit, nbinsx=20, marker=dict(color=transit)))
+
+
+def binned_histogram(transit, quantity=None):
+    """Dashboard chart: NumPy-binned counts only"""
+    bins = histogram_bins(transit, bins=unit_bin_edges(transit), weights=quantity)
+    return go.Figure(go.Bar(
+        x=bins['bin_center'],
+        y=bins['count'],
+        width=bins['width'],
+        marker=dict(color=bins['bin_center'])
+    ))
+
+
+def measure(build, *args):
+    """Return (payload bytes, seconds) for building and serializing a figure"""
+    start = time.perf_counter()
+    payload = build(*args).to_json()
+    return len(payload.encode()), time.perf_counter() - start
+
+
+def main(rows):
+    print(f"{'rows':>12} {'raw KB':>12} {'raw s':>8} {'binned KB':>10} {'binned s':>9} {'weighted KB':>12} {'ratio':>10}")
+    for n_rows in rows:
+        transit, quantity = synthetic_shipments(n_rows)
+        raw_bytes, raw_s = measure(raw_histogram, transit)
+        binned_bytes, binned_s = measure(binned_histogram, transit)
+        weighted_bytes, _ = measure(binned_histogram, transit, quantity)
+        print(f"{n_rows:>12,} {raw_bytes / 1024:>12,.1f} {raw_s:>8.3f} {binned_bytes / 1024:>10,.1f} "
+              f"{binned_s:>9.3f} {weighted_bytes / 1024:>12,.1f} {raw_bytes / binned_bytes:>9,.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
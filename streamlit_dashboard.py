@@ -15,7 +15,42 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
+from types import MappingProxyType
+
+from analysis_engine.aggregate import AGGREGATE_DIR
+from analysis_engine.aggregate import ESTIMATES_FILE as AGGREGATE_FILE
+from analysis_engine.binning import histogram_bins, unit_bin_edges
+from analysis_engine.bundle import BUNDLE_FORMATS, SHARED_GROUP, bundle_file, group_of, select_files
+from analysis_engine.cubes import (
+    CUBE_FILES,
+    build_scenario_cubes,
+    transit_distribution
+)
+from analysis_engine.diff import DIFF_TABLES, diff_runs, lane_changes
+from analysis_engine.formulation import BENCHMARK_DIR
+from analysis_engine.formulation import BENCHMARK_FILE as FORMULATION_FILE
+from analysis_engine.inventory import POLICY_FILE, policy_summary
+from analysis_engine.kpis import derive_kpis, kpi_leaders
+from analysis_engine.lanes import load_lane_matrix, load_rate_cards
+from analysis_engine.model import build_network, load_model_inputs, model_size
+from analysis_engine.montecarlo import BANDS_FILE as MC_BANDS_FILE
+from analysis_engine.pareto import scenario_frontier
+from analysis_engine.pool import DIFFS_FILE as POOL_DIFFS_FILE
+from analysis_engine.pool import POOL_FILE
+from analysis_engine.presolve import PRESOLVE_DIR
+from analysis_engine.presolve import REPORT_FILE as PRESOLVE_FILE
+from analysis_engine.sensitivity import CAPACITY_FILE as SENSITIVITY_CAPACITY_FILE
+from analysis_engine.sensitivity import WAREHOUSES_FILE as SENSITIVITY_WAREHOUSES_FILE
+from analysis_engine.sensitivity import capacity_estimate
+from analysis_engine.tradeoff import FRONTIER_FILE as TRADEOFF_FILE
+from analysis_engine.tradeoff import FRONTIER_OBJECTIVES as TRADEOFF_OBJECTIVES
+from analysis_engine.tradeoff import TRADEOFF_DIR, on_time_volume_rate
+from analysis_engine.watcher import ResultsWatcher
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -440,87 +475,392 @@ CHART_COLORS_SEQUENTIAL = [
 # DATA LOADING
 # ============================================================================
 
-@st.cache_data
-def load_all_results():
-    """Load all pre-computed optimization results"""
-    results_dir = Path('./results/')
+RESULTS_DIR = Path('./results/')
+
+# Frames in the shared result store are handed to every session; with
+# copy-on-write any page-level modification copies instead of mutating them.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+# Seconds between checks for new engine output while the app is open
+RESULTS_POLL_SECONDS = 5
+
+
+def read_results_table(path):
+    """Read a results CSV into an Arrow-backed DataFrame"""
+    return pd.read_csv(path, dtype_backend='pyarrow')
+
+
+def read_result_bytes(relpath):
+    """Raw contents of one result file (used for deferred downloads)"""
+    return (RESULTS_DIR / relpath).read_bytes()
+
+
+def freeze(value):
+    """Recursively wrap dicts in read-only mappings"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    return value
+
+
+class TableStore:
+    """Shared result files, each loaded once and re-read only when its stamp changes"""
+
+    def __init__(self, results_dir):
+        self.results_dir = Path(results_dir)
+        self.loads = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, relpath, stamp):
+        """Return the frame (or frozen JSON dict) for relpath at the given stamp or content checksum"""
+        with self._lock:
+            entry = self._entries.get(relpath)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+
+        path = self.results_dir / relpath
+        if path.suffix == '.json':
+            with open(path, 'r') as f:
+                value = freeze(json.load(f))
+        else:
+            value = read_results_table(path)
+
+        with self._lock:
+            self._entries[relpath] = (stamp, value)
+            self.loads += 1
+
+        return value
+
+    def discard(self, relpaths):
+        """Drop cached entries for changed or removed files"""
+        with self._lock:
+            for relpath in relpaths:
+                self._entries.pop(relpath, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource
+def get_results_watcher():
+    """Process-wide watcher on the results directory"""
+    return ResultsWatcher(RESULTS_DIR, poll_interval=RESULTS_POLL_SECONDS)
+
+
+@st.cache_resource
+def get_table_store():
+    """Process-wide store of loaded result tables"""
+    return TableStore(RESULTS_DIR)
+
+
+def refresh_results():
+    """Apply pending results-directory changes to the table and figure caches"""
+    watcher = get_results_watcher()
+    watcher.poll()
+
+    changed = watcher.drain()
+    if changed:
+        get_table_store().discard(changed)
+        get_figure_cache().invalidate(changed)
+
+    return watcher
+
+
+@st.cache_resource(max_entries=1)
+def load_all_results(version):
+    """Load all pre-computed optimization results into one shared, read-only store
+
+    Every session gets the same object (no per-caller pickling or copying). The
+    version argument is the results directory fingerprint; when it changes the
+    store is reassembled, but only files whose stamp changed are read again.
+    """
+    results_dir = RESULTS_DIR
 
     if not results_dir.exists():
         return None
 
-    data = {}
+    stamps = dict(get_results_watcher().stamps)
+    store = get_table_store()
+
+    def read(relpath):
+        return store.get(relpath, stamps.get(relpath))
+
+    data = {'version': version, 'file_versions': stamps}
 
     try:
         # Load metadata
-        with open(results_dir / 'analysis_metadata.json', 'r') as f:
-            data['metadata'] = json.load(f)
+        data['metadata'] = read('analysis_metadata.json')
 
         # Load scenario comparisons
-        data['kpi_comparison'] = pd.read_csv(results_dir / 'scenario_comparison_kpis.csv')
-        data['cost_breakdown'] = pd.read_csv(results_dir / 'cost_breakdown_comparison.csv')
-        data['service_metrics'] = pd.read_csv(results_dir / 'service_metrics_comparison.csv')
+        data['kpi_comparison'] = read('scenario_comparison_kpis.csv')
+        data['cost_breakdown'] = read('cost_breakdown_comparison.csv')
+        data['service_metrics'] = read('service_metrics_comparison.csv')
 
         # Ensure numeric columns
         numeric_cols = ['total_cost', 'order_fulfillment_rate', 'on_time_delivery_rate',
                        'profit_improvement', 'total_stockouts']
+        if any(col in data['kpi_comparison'].columns for col in numeric_cols):
+            data['kpi_comparison'] = data['kpi_comparison'].copy()
         for col in numeric_cols:
             if col in data['kpi_comparison'].columns:
                 data['kpi_comparison'][col] = pd.to_numeric(data['kpi_comparison'][col], errors='coerce')
 
         # Load baseline results
-        baseline_dir = results_dir / 'Baseline'
         data['baseline'] = {
-            'shipments': pd.read_csv(baseline_dir / 'shipments.csv'),
-            'stocking': pd.read_csv(baseline_dir / 'stocking.csv'),
-            'stockouts': pd.read_csv(baseline_dir / 'stockouts.csv'),
-            'warehouse_util': pd.read_csv(baseline_dir / 'warehouse_utilization.csv')
+            'shipments': read('Baseline/shipments.csv'),
+            'stocking': read('Baseline/stocking.csv'),
+            'stockouts': read('Baseline/stockouts.csv'),
+            'warehouse_util': read('Baseline/warehouse_utilization.csv'),
+            'kpis': read('Baseline/kpis.json')
         }
 
-        with open(baseline_dir / 'kpis.json', 'r') as f:
-            data['baseline']['kpis'] = json.load(f)
-
         # Load network data
-        data['network_nodes'] = pd.read_csv(results_dir / 'network_nodes.csv')
-        data['network_edges'] = pd.read_csv(results_dir / 'network_edges.csv')
+        data['network_nodes'] = read('network_nodes.csv')
+        data['network_edges'] = read('network_edges.csv')
 
         # Load summaries
-        data['regional_demand'] = pd.read_csv(results_dir / 'regional_demand_summary.csv')
-        data['category_demand'] = pd.read_csv(results_dir / 'category_demand_summary.csv')
+        data['regional_demand'] = read('regional_demand_summary.csv')
+        data['category_demand'] = read('category_demand_summary.csv')
 
         # Load enriched data
-        data['demand_enriched'] = pd.read_csv(results_dir / 'demand_enriched.csv')
-        data['warehouses_enriched'] = pd.read_csv(results_dir / 'warehouses_enriched.csv')
+        data['demand_enriched'] = read('demand_enriched.csv')
+        data['warehouses_enriched'] = read('warehouses_enriched.csv')
+
+        # Load optional post-processing outputs
+        if 'Stochastic_SAA/kpis.json' in stamps:
+            data['stochastic'] = {
+                'kpis': read('Stochastic_SAA/kpis.json'),
+                'candidates': read('Stochastic_SAA/saa_candidates.csv'),
+                'distribution': read('Stochastic_SAA/saa_distribution.csv')
+            }
 
-        return data
+        if 'Forecast/kpis.json' in stamps:
+            data['forecast'] = read('Forecast/kpis.json')
+
+        if 'Facility_Location/kpis.json' in stamps:
+            data['facility'] = {
+                'kpis': read('Facility_Location/kpis.json'),
+                'sites': read('Facility_Location/candidate_sites.csv')
+            }
+
+        if f'{TRADEOFF_DIR}/kpis.json' in stamps:
+            data['tradeoff'] = {
+                'kpis': read(f'{TRADEOFF_DIR}/kpis.json'),
+                'frontier': read(f'{TRADEOFF_DIR}/{TRADEOFF_FILE}')
+            }
+
+        if f'{AGGREGATE_DIR}/kpis.json' in stamps:
+            data['aggregate'] = {
+                'kpis': read(f'{AGGREGATE_DIR}/kpis.json'),
+                'estimates': read(f'{AGGREGATE_DIR}/{AGGREGATE_FILE}')
+            }
+
+        if f'{BENCHMARK_DIR}/kpis.json' in stamps:
+            data['formulation'] = {
+                'kpis': read(f'{BENCHMARK_DIR}/kpis.json'),
+                'benchmark': read(f'{BENCHMARK_DIR}/{FORMULATION_FILE}')
+            }
+
+        if f'{PRESOLVE_DIR}/kpis.json' in stamps:
+            data['presolve'] = {
+                'kpis': read(f'{PRESOLVE_DIR}/kpis.json'),
+                'report': read(f'{PRESOLVE_DIR}/{PRESOLVE_FILE}')
+            }
+
+        if 'Rolling_Horizon/kpis.json' in stamps:
+            data['rolling'] = {
+                'kpis': read('Rolling_Horizon/kpis.json'),
+                'plan': read('Rolling_Horizon/period_plan.csv'),
+                'windows': read('Rolling_Horizon/window_log.csv')
+            }
+
+        # Load Monte Carlo percentile bands for the Baseline plan, if simulated
+        if f'Baseline/{MC_BANDS_FILE}' in stamps:
+            data['baseline']['monte_carlo'] = read(f'Baseline/{MC_BANDS_FILE}')
+
+        # Load the inventory policy recomputed from Baseline flows, if available
+        if f'Baseline/{POLICY_FILE}' in stamps:
+            data['baseline']['inventory_policy'] = read(f'Baseline/{POLICY_FILE}')
+
+        # Load the Baseline pool of near-optimal alternatives (stored as diffs), if built
+        if f'Baseline/{POOL_FILE}' in stamps:
+            data['baseline']['pool'] = {
+                'plans': read(f'Baseline/{POOL_FILE}'),
+                'diffs': read(f'Baseline/{POOL_DIFFS_FILE}')
+            }
+
+        # Load Baseline shadow prices (capacity duals and value per m3), if extracted
+        if f'Baseline/{SENSITIVITY_WAREHOUSES_FILE}' in stamps:
+            data['baseline']['sensitivity'] = {
+                'warehouses': read(f'Baseline/{SENSITIVITY_WAREHOUSES_FILE}'),
+                'capacity': read(f'Baseline/{SENSITIVITY_CAPACITY_FILE}')
+            }
+
+        # Load pre-aggregated cubes (built in memory if the engine has not written them)
+        cube_paths = [f'Baseline/{name}' for name in CUBE_FILES.values()]
+        if all(path in stamps for path in cube_paths):
+            data['baseline']['cubes'] = {
+                key: read(f'Baseline/{name}') for key, name in CUBE_FILES.items()
+            }
+        else:
+            category_map = data['demand_enriched'].drop_duplicates('product_id').set_index('product_id')['category_name']
+            data['baseline']['cubes'] = build_scenario_cubes(
+                data['baseline']['shipments'],
+                data['baseline']['stockouts'],
+                category_map
+            )
+
+        return freeze(data)
 
     except Exception as e:
         st.error(f"Error loading results: {e}")
         return None
 
-@st.cache_data
-def load_scenario_details(scenario_name):
-    """Load detailed results for specific scenario"""
-    results_dir = Path('./results/')
-    scenario_dir = results_dir / scenario_name
+def load_scenario_details(scenario_name, data):
+    """Load detailed results for specific scenario (shared, read-only)"""
+    stamps = data['file_versions']
+    store = get_table_store()
 
-    if not scenario_dir.exists():
+    if f'{scenario_name}/kpis.json' not in stamps:
         return None
 
     try:
         scenario_data = {
-            'shipments': pd.read_csv(scenario_dir / 'shipments.csv'),
-            'stocking': pd.read_csv(scenario_dir / 'stocking.csv'),
-            'warehouse_util': pd.read_csv(scenario_dir / 'warehouse_utilization.csv')
+            key: store.get(f'{scenario_name}/{name}', stamps.get(f'{scenario_name}/{name}'))
+            for key, name in [
+                ('shipments', 'shipments.csv'),
+                ('stocking', 'stocking.csv'),
+                ('warehouse_util', 'warehouse_utilization.csv'),
+                ('kpis', 'kpis.json')
+            ]
         }
 
-        with open(scenario_dir / 'kpis.json', 'r') as f:
-            scenario_data['kpis'] = json.load(f)
-
-        return scenario_data
+        return freeze(scenario_data)
 
     except:
         return None
 
+
+@st.cache_resource(max_entries=4)
+def load_kpi_matrix(_kpi_comparison, stamp):
+    """Derived scenario KPI matrix, computed once per version of the comparison table"""
+    return derive_kpis(_kpi_comparison)
+
+
+def get_kpi_matrix(data):
+    """Scores, ranks, Baseline deltas and Pareto flags for every scenario"""
+    return load_kpi_matrix(data['kpi_comparison'], data['file_versions'].get('scenario_comparison_kpis.csv'))
+
+
+@st.cache_resource(max_entries=4)
+def load_frontier(_kpi_comparison, stamp):
+    """Pareto ranks on cost / fulfillment / on-time, computed once per version of the comparison table"""
+    return scenario_frontier(_kpi_comparison)
+
+
+@st.cache_resource(max_entries=4)
+def load_tradeoff_frontier(_kpi_comparison, _points, stamps):
+    """Pareto ranks of scenarios and frontier points on cost / fulfillment / on-time share of shipped units
+
+    Frontier points only have the unit-based on-time rate, so it is computed
+    for the full scenarios from their shipments.
+    """
+    store = get_table_store()
+    stamps = dict(stamps)
+    rates = [
+        on_time_volume_rate(store.get(relpath, stamps[relpath])) if stamps.get(relpath) is not None else np.nan
+        for relpath in (f'{name}/shipments.csv' for name in _kpi_comparison['scenario_name'])
+    ]
+    columns = list(_kpi_comparison.columns) + ['on_time_volume_rate']
+    combined = pd.concat([_kpi_comparison.assign(on_time_volume_rate=rates), _points[columns]], ignore_index=True)
+    return scenario_frontier(combined, TRADEOFF_OBJECTIVES)
+
+
+def get_frontier(data, include_tradeoff=False):
+    """Non-dominated sorting of all scenarios on cost vs service
+
+    With include_tradeoff, the lightweight cost vs on-time frontier points
+    are ranked alongside the full scenarios, with on-time measured as the
+    share of shipped units (the metric the frontier constrains).
+    """
+    stamps = data['file_versions']
+    stamp = stamps.get('scenario_comparison_kpis.csv')
+    if not include_tradeoff:
+        return load_frontier(data['kpi_comparison'], stamp)
+
+    relpaths = ['scenario_comparison_kpis.csv', f'{TRADEOFF_DIR}/{TRADEOFF_FILE}'] + [
+        f'{name}/shipments.csv' for name in data['kpi_comparison']['scenario_name']
+    ]
+    return load_tradeoff_frontier(data['kpi_comparison'], data['tradeoff']['frontier'],
+                                  tuple((relpath, stamps.get(relpath)) for relpath in relpaths))
+
+
+@st.cache_resource(max_entries=2)
+def load_lanes_matrix(stamp):
+    """Warehouse x region distance matrix, cached in memory per version of network_nodes.csv
+
+    The dashboard only reads results/, so the engine's on-disk row cache is
+    not used (or written) here.
+    """
+    return load_lane_matrix(RESULTS_DIR, use_cache=False)
+
+
+MODEL_INPUT_FILES = ('demand_enriched.csv', 'inventory_flow_capacity.csv', 'warehouses_enriched.csv',
+                     'Baseline/shipments.csv')
+
+
+@st.cache_resource(max_entries=2)
+def load_model_size(stamps):
+    """Dense vs sparse variable counts, rebuilt only when the model inputs change"""
+    inputs = load_model_inputs(RESULTS_DIR)
+    return {
+        'lanes': model_size(build_network(inputs), inputs['warehouses']),
+        'stocked_only': model_size(build_network(inputs, stocked_only=True), inputs['warehouses'])
+    }
+
+
+def get_model_size(data):
+    """Model size for the current results"""
+    return load_model_size(tuple(data['file_versions'].get(f) for f in MODEL_INPUT_FILES))
+
+
+def get_lane_matrix(data):
+    """Distance matrix for the current network_nodes.csv"""
+    return load_lanes_matrix(data['file_versions'].get('network_nodes.csv'))
+
+
+RUN_DIFF_FILES = tuple(f'{name}.csv' for name in DIFF_TABLES) + ('kpis.json',)
+
+
+@st.cache_resource(max_entries=8)
+def load_run_diff(old, new, stamps):
+    """Change tables between two scenarios, recomputed only when one of their plan files changes"""
+    store = get_table_store()
+    stamps = dict(stamps)
+    tables = {
+        name: tuple(store.get(f'{scenario}/{name}.csv', stamps[f'{scenario}/{name}.csv']) for scenario in (old, new))
+        for name in DIFF_TABLES
+    }
+    return diff_runs(RESULTS_DIR / old, RESULTS_DIR / new, tables=tables)
+
+
+def diff_scenarios(data):
+    """Scenarios with all plan tables, Baseline first"""
+    stamps = data['file_versions']
+    names = {relpath.split('/')[0] for relpath in stamps if relpath.endswith('/kpis.json')}
+    names = [name for name in names if all(f'{name}/{file}' in stamps for file in RUN_DIFF_FILES)]
+    return sorted(names, key=lambda name: (name != 'Baseline', name))
+
+
+def get_run_diff(data, old, new):
+    """Run diff for two stored scenarios"""
+    stamps = data['file_versions']
+    key = tuple((f'{scenario}/{file}', stamps.get(f'{scenario}/{file}'))
+                for scenario in (old, new) for file in RUN_DIFF_FILES)
+    return load_run_diff(old, new, key)
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -541,8 +881,54 @@ def format_percentage(num, decimals=1):
     return f"{num*100:.{decimals}f}%"
 
 
-def create_metric_card(label, value, delta=None, tooltip=None):
-    """Create custom metric card with tooltip"""
+# Column display formats (printf-style, rendered in the browser so values stay numeric)
+DISPLAY_FORMATS = {
+    'currency': '$%,.0f',
+    'currency_m': '$%.2fM',
+    'units': '%,.0f',
+    'percent': '%.1f%%',
+    'percent_2': '%.2f%%',
+    'percent_delta': '%+.1f%%',
+    'days': '%.1f days',
+    'm3': '%,.0f m³'
+}
+
+
+def show_formatted_table(df, formats, **kwargs):
+    """Display a numeric table with per-column formats instead of pre-formatted strings
+
+    formats maps column name -> DISPLAY_FORMATS key (or a printf-style format).
+    Columns are sorted numerically because the underlying values are untouched.
+    """
+    column_config = {
+        col: st.column_config.NumberColumn(format=DISPLAY_FORMATS.get(fmt, fmt))
+        for col, fmt in formats.items()
+    }
+
+    st.dataframe(
+        df,
+        column_config=column_config,
+        hide_index=True,
+        use_container_width=True,
+        **kwargs
+    )
+
+
+def percentile_band(bands, metric, fmt):
+    """'P5–P95' text for one Monte Carlo KPI band (None when not simulated)"""
+    if bands is None:
+        return None
+
+    row = bands[bands['metric'] == metric]
+    if row.empty:
+        return None
+
+    row = row.iloc[0]
+    return f"Under demand noise: P5 {fmt(row['p5'])} – P95 {fmt(row['p95'])}"
+
+
+def create_metric_card(label, value, delta=None, tooltip=None, band=None):
+    """Create custom metric card with tooltip and optional uncertainty band line"""
 
     delta_html = ""
     if delta is not None:
@@ -559,15 +945,153 @@ def create_metric_card(label, value, delta=None, tooltip=None):
     if tooltip:
         tooltip_html = f' <span class="tooltip">ℹ️<span class="tooltiptext">{tooltip}</span></span>'
 
+    band_html = ""
+    if band:
+        band_html = f'<div style="color: #b0bec5; font-size: 0.85rem; margin-top: 0.4rem;">{band}</div>'
+
     return f"""
     <div class="stat-card">
         <div class="label">{label}{tooltip_html}</div>
         <div class="value">{value}</div>
         {delta_html}
+        {band_html}
     </div>
     """
 
 
+# ============================================================================
+# FIGURE CACHE
+# ============================================================================
+
+FIGURE_CACHE_SIZE = 64
+
+
+class FigureCache:
+    """Thread-safe LRU cache of Plotly figures shared by all sessions"""
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        """Return the cached figure for key, building (and storing) it on a miss"""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            self.misses += 1
+
+        fig = builder()
+
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+
+        return fig
+
+    def invalidate(self, changed_paths):
+        """Drop figures built from any of the changed result files"""
+        changed_paths = set(changed_paths)
+        with self._lock:
+            stale = [
+                key for key in self._figures
+                if any(source in changed_paths or source == '*' for source, _ in key[2])
+            ]
+            for key in stale:
+                del self._figures[key]
+        return len(stale)
+
+    def clear(self):
+        """Drop all cached figures and reset counters"""
+        with self._lock:
+            self._figures.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._figures),
+                'max_entries': self.max_entries
+            }
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide figure cache"""
+    return FigureCache()
+
+
+def cached_figure(data, name, builder, *args, scenario='Baseline', controls=None, sources=()):
+    """Build a figure once per (chart, scenario, source file versions, control values)
+
+    sources lists the result files (relative to results/) the figure is built
+    from, so rewriting one file only invalidates the figures that read it.
+    Without sources the whole results-directory version is used.
+
+    Figures are shared between reruns and sessions, so builders must not depend on
+    anything outside their arguments and callers must not mutate the returned figure.
+    """
+    if sources:
+        stamps = tuple((source, data['file_versions'].get(source)) for source in sources)
+    else:
+        stamps = (('*', data['version']),)
+
+    key = (name, scenario, stamps, tuple(sorted((controls or {}).items())))
+    return get_figure_cache().get_or_build(key, lambda: builder(*args))
+
+
+def watch_results():
+    """Rerun the app when the engine writes new files to results/
+
+    Compares the results version this session last loaded with the
+    watcher's, so every open session picks up a change, not only the first
+    one to drain the watcher's pending paths.
+    """
+    watcher = get_results_watcher()
+    watcher.poll()
+    if watcher.version != st.session_state.get('results_version'):
+        st.rerun()
+
+
+if hasattr(st, 'fragment'):
+    watch_results = st.fragment(run_every=RESULTS_POLL_SECONDS)(watch_results)
+
+
+def show_profiling_panel(render_seconds):
+    """Sidebar panel with page render time, figure cache and results watcher counters"""
+    stats = get_figure_cache().stats()
+    watcher = get_results_watcher()
+    lookups = stats['hits'] + stats['misses']
+    hit_rate = stats['hits'] / lookups if lookups else 0
+
+    with st.sidebar:
+        with st.expander("⏱️ Profiling", expanded=False):
+            st.caption(f"Page render: {render_seconds * 1000:,.0f} ms")
+            col1, col2 = st.columns(2)
+            col1.metric("Figure hits", f"{stats['hits']:,}")
+            col2.metric("Figure misses", f"{stats['misses']:,}")
+            st.caption(
+                f"Hit rate {format_percentage(hit_rate)} · "
+                f"{stats['entries']}/{stats['max_entries']} figures cached"
+            )
+            st.caption(
+                f"Results {watcher.version} · {get_table_store().loads:,} table reads · "
+                f"watching via {'inotify' if watcher.uses_inotify else 'polling'}"
+            )
+            if st.button("Clear figure cache"):
+                get_figure_cache().clear()
+
+
 # ============================================================================
 # SIDEBAR NAVIGATION
 # ============================================================================
@@ -688,6 +1212,7 @@ def show_executive_summary(data):
     """, unsafe_allow_html=True)
 
     kpis = data['baseline']['kpis']
+    bands = data['baseline'].get('monte_carlo')
 
     # Hero metrics
     st.markdown("## 🎯 Primary Objectives Achieved")
@@ -700,7 +1225,8 @@ def show_executive_summary(data):
             "Order Fulfillment",
             format_percentage(kpis['order_fulfillment_rate']),
             f"+{fulfillment_improvement:.1f} pp",
-            "Percentage of customer orders successfully fulfilled from available inventory"
+            "Percentage of customer orders successfully fulfilled from available inventory",
+            percentile_band(bands, 'order_fulfillment_rate', format_percentage)
         ), unsafe_allow_html=True)
 
     with col2:
@@ -717,7 +1243,8 @@ def show_executive_summary(data):
             "Total System Cost",
             f"${format_number(kpis['total_cost'] / 1e6, decimals=1)}M",
             None,
-            "Combined transportation, holding, and stockout penalty costs"
+            "Combined transportation, holding, and stockout penalty costs",
+            percentile_band(bands, 'total_cost', lambda v: f"${v / 1e6:.1f}M")
         ), unsafe_allow_html=True)
 
     with col4:
@@ -725,9 +1252,17 @@ def show_executive_summary(data):
             "Profit Improvement",
             f"${format_number(kpis['profit_improvement'] / 1e6, decimals=1)}M",
             f"+{format_percentage(kpis['profit_improvement'] / abs(kpis['current_profit']))}" if kpis['current_profit'] != 0 else None,
-            "Net profit increase from optimized allocation strategy"
+            "Net profit increase from optimized allocation strategy",
+            percentile_band(bands, 'profit_improvement', lambda v: f"${v / 1e6:.1f}M")
         ), unsafe_allow_html=True)
 
+    if bands is not None:
+        st.caption(
+            f"Bands: {int(bands['draws'].iloc[0]):,} Monte Carlo demand draws (normal, sd = demand_std_dev) "
+            "replayed against the fixed Baseline stocking and shipment plan, without re-optimizing. "
+            "On-time delivery is unaffected because the shipment routes are fixed."
+        )
+
     st.markdown("---")
 
     # Business impact summary
@@ -809,15 +1344,9 @@ def show_executive_summary(data):
         st.plotly_chart(fig, use_container_width=True)
 
         # Cost metrics table
-        cost_data['Percentage'] = (cost_data['Amount'] / kpis['total_cost'] * 100).round(1)
-        cost_data['Amount'] = cost_data['Amount'].apply(lambda x: f"${x:,.0f}")
-        cost_data['Percentage'] = cost_data['Percentage'].apply(lambda x: f"{x}%")
+        cost_data['Percentage'] = cost_data['Amount'] / kpis['total_cost'] * 100
 
-        st.dataframe(
-            cost_data,
-            hide_index=True,
-            use_container_width=True
-        )
+        show_formatted_table(cost_data, {'Amount': 'currency', 'Percentage': 'percent'})
 
     st.markdown("---")
 
@@ -977,14 +1506,17 @@ def show_executive_summary(data):
         })
 
         comparison_df['Change'] = comparison_df['Optimized'] - comparison_df['Current']
-        comparison_df['Change %'] = (comparison_df['Change'] / comparison_df['Current'].abs() * 100).round(1)
+        comparison_df['Change %'] = comparison_df['Change'] / comparison_df['Current'].abs() * 100
 
-        # Format for display
-        for col in ['Current', 'Optimized', 'Change']:
-            comparison_df[col] = comparison_df[col].apply(lambda x: f"${x/1e6:.2f}M")
-        comparison_df['Change %'] = comparison_df['Change %'].apply(lambda x: f"{x:+.1f}%")
+        # Scale to $M for display
+        comparison_df[['Current', 'Optimized', 'Change']] /= 1e6
 
-        st.dataframe(comparison_df, hide_index=True, use_container_width=True)
+        show_formatted_table(comparison_df, {
+            'Current': 'currency_m',
+            'Optimized': 'currency_m',
+            'Change': 'currency_m',
+            'Change %': 'percent_delta'
+        })
 
         st.markdown("""
         <div class="info-box">
@@ -1043,6 +1575,92 @@ def show_executive_summary(data):
 # PAGE 2: PERFORMANCE ANALYSIS
 # ============================================================================
 
+def build_reorder_point_comparison(policy):
+    """Recomputed vs static reorder point for every stocked pair"""
+
+    held = policy[policy['has_inventory_record']]
+    top = max(held['reorder_point'].max(), held['reorder_point_input'].max())
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scattergl(
+        x=held['reorder_point_input'],
+        y=held['reorder_point'],
+        mode='markers',
+        marker=dict(
+            size=7,
+            color=held['annual_flow_units'],
+            colorscale=[[0, COLORS['teal']], [1, COLORS['gold']]],
+            colorbar=dict(title='Annual Flow'),
+            line=dict(color='#1a1d29', width=0.5)
+        ),
+        customdata=held[['warehouse_id', 'product_id', 'current_stock_units']],
+        hovertemplate='%{customdata[0]} · product %{customdata[1]}<br>Static ROP: %{x:,.0f}'
+                      '<br>Recomputed ROP: %{y:,.0f}<br>Stock: %{customdata[2]:,.0f}<extra></extra>'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=[0, top], y=[0, top], mode='lines', name='Equal',
+        line=dict(color=COLORS['coral'], width=1, dash='dash'), hoverinfo='skip'
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title='Static Reorder Point (inventory_flow_capacity)', gridcolor='#37474f'),
+        yaxis=dict(title='Recomputed Reorder Point', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        showlegend=False,
+        height=400,
+        margin=dict(t=30, b=60, l=60, r=30)
+    )
+
+    return fig
+
+
+def show_inventory_policy(data):
+    """EOQ / safety stock / reorder points recomputed from the Baseline flows"""
+
+    policy = data['baseline']['inventory_policy']
+    summary = policy_summary(policy)
+
+    st.markdown("### 📦 Inventory Policy from Optimized Flows")
+    st.caption(
+        f"EOQ, safety stock and reorder points recomputed for {summary['pairs']} warehouse/product pairs "
+        f"from Baseline shipments ({policy['service_level'].iloc[0]:.0%} service level, "
+        f"{policy['lead_time_days'].iloc[0]:.0f}-day lead time)."
+    )
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Safety Stock", f"{summary['total_safety_stock']:,.0f} units")
+    col2.metric("Holding + Ordering", f"${summary['total_annual_holding_cost'] + summary['total_annual_ordering_cost']:,.0f}")
+    col3.metric("Below Reorder Point", f"{summary['pairs_below_reorder_point']}",
+                f"of {int(policy['has_inventory_record'].sum())} stocked pairs", delta_color="off")
+    col4.metric("Mean Stockout Risk", format_percentage(summary['mean_stockout_probability']))
+
+    fig = cached_figure(data, 'reorder_point_comparison', build_reorder_point_comparison, policy,
+                        sources=(f'Baseline/{POLICY_FILE}',))
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = policy.nlargest(15, 'annual_flow_units')[[
+        'warehouse_id', 'product_id', 'annual_flow_units', 'safety_stock', 'reorder_point',
+        'reorder_point_input', 'economic_order_qty', 'economic_order_qty_input', 'current_stock_units', 'days_of_cover'
+    ]]
+    table.columns = ['Warehouse', 'Product', 'Annual Flow', 'Safety Stock', 'Reorder Point', 'Static ROP',
+                     'EOQ', 'Static EOQ', 'Stock', 'Days of Cover']
+
+    show_formatted_table(table, {
+        'Annual Flow': 'units',
+        'Safety Stock': 'units',
+        'Reorder Point': 'units',
+        'Static ROP': 'units',
+        'EOQ': 'units',
+        'Static EOQ': 'units',
+        'Stock': 'units',
+        'Days of Cover': 'days'
+    })
+
+
 def show_performance_analysis(data):
     """Detailed performance metrics and analysis"""
 
@@ -1151,7 +1769,8 @@ def show_performance_analysis(data):
             y=wh_util['utilization_pct'],
             name='Current Utilization',
             marker_color=COLORS['teal'],
-            text=wh_util['utilization_pct'].apply(lambda x: f"{x:.1f}%"),
+            text=wh_util['utilization_pct'],
+            texttemplate='%{text:.1f}%',
             textposition='outside',
             textfont=dict(color='#ffffff', size=14),
             hovertemplate='<b>%{x}</b><br>Utilization: %{y:.1f}%<extra></extra>'
@@ -1190,16 +1809,14 @@ def show_performance_analysis(data):
         # Warehouse details table
         st.markdown("### Warehouse Details")
 
-        wh_details = wh_util.copy()
-        wh_details['Capacity'] = wh_details['capacity_m3'].apply(lambda x: f"{x:,.0f} m³")
-        wh_details['Used'] = wh_details['used_m3'].apply(lambda x: f"{x:,.0f} m³")
-        wh_details['Utilization'] = wh_details['utilization_pct'].apply(lambda x: f"{x:.1f}%")
-        wh_details['Products'] = wh_details['products_stocked']
-
-        wh_details = wh_details[['warehouse_id', 'Capacity', 'Used', 'Utilization', 'Products']]
+        wh_details = wh_util[['warehouse_id', 'capacity_m3', 'used_m3', 'utilization_pct', 'products_stocked']].copy()
         wh_details.columns = ['Warehouse', 'Total Capacity', 'Space Used', 'Utilization', 'SKUs Stocked']
 
-        st.dataframe(wh_details, hide_index=True, use_container_width=True)
+        show_formatted_table(wh_details, {
+            'Total Capacity': 'm3',
+            'Space Used': 'm3',
+            'Utilization': 'percent'
+        })
 
         st.markdown(f"""
         <div class="insight-box">
@@ -1213,42 +1830,37 @@ def show_performance_analysis(data):
         </div>
         """, unsafe_allow_html=True)
 
+        if 'inventory_policy' in data['baseline']:
+            show_inventory_policy(data)
+
     with tab3:
         st.markdown("## 🚚 Transportation Cost & Route Analysis")
 
-        shipments = data['baseline']['shipments']
+        cubes = data['baseline']['cubes']
 
-        if len(shipments) > 0:
+        if len(cubes['transit_cube']) > 0:
             col1, col2 = st.columns(2)
 
             with col1:
                 # Top 10 costliest routes
                 st.markdown("### Top 10 Highest Cost Routes")
 
-                top_routes = shipments.nlargest(10, 'transport_cost')[
+                top_routes = cubes['top_routes'][
                     ['warehouse_id', 'region', 'quantity', 'transport_cost', 'transit_time_days']
                 ].copy()
-
-                top_routes['Quantity'] = top_routes['quantity'].apply(lambda x: f"{x:,.0f}")
-                top_routes['Cost'] = top_routes['transport_cost'].apply(lambda x: f"${x:,.0f}")
-                top_routes['Transit'] = top_routes['transit_time_days'].apply(lambda x: f"{x:.1f} days")
-
-                top_routes = top_routes[['warehouse_id', 'region', 'Quantity', 'Cost', 'Transit']]
                 top_routes.columns = ['From WH', 'To Region', 'Units', 'Transport Cost', 'Transit Time']
 
-                st.dataframe(top_routes, hide_index=True, use_container_width=True)
+                show_formatted_table(top_routes, {
+                    'Units': 'units',
+                    'Transport Cost': 'currency',
+                    'Transit Time': 'days'
+                })
 
             with col2:
                 # Transit time distribution
                 st.markdown("### Transit Time Distribution")
 
-                transit_bins = pd.cut(shipments['transit_time_days'],
-                                     bins=[0, 3, 5, 7, 100],
-                                     labels=['0-3 days (On-Time)', '3-5 days', '5-7 days', '>7 days'])
-
-                transit_dist = transit_bins.value_counts().reset_index()
-                transit_dist.columns = ['Transit Time', 'Routes']
-                transit_dist = transit_dist.sort_values('Transit Time')
+                transit_dist = transit_distribution(cubes['transit_cube'])
 
                 fig = px.bar(
                     transit_dist,
@@ -1299,9 +1911,9 @@ def show_performance_analysis(data):
     with tab4:
         st.markdown("## ⚠️ Stockout Analysis & Prevention")
 
-        stockouts = data['baseline']['stockouts']
+        stockout_cube = data['baseline']['cubes']['stockout_cube']
 
-        if len(stockouts) > 0:
+        if len(stockout_cube) > 0:
             col1, col2 = st.columns([1, 1])
 
             with col1:
@@ -1316,9 +1928,9 @@ def show_performance_analysis(data):
                         'Average Penalty per Unit'
                     ],
                     'Value': [
-                        f"{len(stockouts)} occurrences",
+                        f"{stockout_cube['instances'].sum()} occurrences",
                         f"{format_number(kpis['total_stockouts'])} units",
-                        f"{stockouts['region'].nunique()} regions",
+                        f"{stockout_cube['region'].nunique()} regions",
                         f"${format_number(kpis['total_stockout_cost'])}",
                         f"${kpis['total_stockout_cost'] / kpis['total_stockouts']:.2f}"
                     ]
@@ -1340,21 +1952,21 @@ def show_performance_analysis(data):
             with col2:
                 st.markdown("### Top 10 Affected Regions")
 
-                top_stockouts = stockouts.nlargest(10, 'stockout_quantity')[
+                top_stockouts = data['baseline']['cubes']['top_stockouts'][
                     ['region', 'stockout_quantity', 'stockout_penalty_cost', 'total_demand']
                 ].copy()
 
                 top_stockouts['Stockout %'] = (top_stockouts['stockout_quantity'] /
-                                               top_stockouts['total_demand'] * 100).round(1)
+                                               top_stockouts['total_demand'] * 100)
 
-                top_stockouts['Units'] = top_stockouts['stockout_quantity'].apply(lambda x: f"{x:,.0f}")
-                top_stockouts['Penalty'] = top_stockouts['stockout_penalty_cost'].apply(lambda x: f"${x:,.0f}")
-                top_stockouts['Rate'] = top_stockouts['Stockout %'].apply(lambda x: f"{x}%")
-
-                top_stockouts = top_stockouts[['region', 'Units', 'Penalty', 'Rate']]
+                top_stockouts = top_stockouts[['region', 'stockout_quantity', 'stockout_penalty_cost', 'Stockout %']]
                 top_stockouts.columns = ['Region', 'Stockout Units', 'Penalty Cost', 'Stockout %']
 
-                st.dataframe(top_stockouts, hide_index=True, use_container_width=True)
+                show_formatted_table(top_stockouts, {
+                    'Stockout Units': 'units',
+                    'Penalty Cost': 'currency',
+                    'Stockout %': 'percent'
+                })
         else:
             st.markdown("""
             <div class="success-box">
@@ -1371,6 +1983,73 @@ def show_performance_analysis(data):
 # PAGE 3: SCENARIO COMPARISON
 # ============================================================================
 
+def build_selected_scenarios_radar(filtered_df):
+    """Radar chart of normalized KPIs for the selected scenarios"""
+
+    # Create parallel coordinates plot
+    metrics_to_plot = [
+        'order_fulfillment_rate',
+        'on_time_delivery_rate',
+        'total_cost',
+        'profit_improvement',
+        'avg_warehouse_utilization'
+    ]
+
+    plot_df = filtered_df[['scenario_name'] + metrics_to_plot].copy()
+
+    # Normalize for better visualization
+    for col in metrics_to_plot:
+        if col == 'total_cost':
+            # Invert cost (lower is better)
+            plot_df[col + '_norm'] = 1 - ((plot_df[col] - plot_df[col].min()) /
+                                         (plot_df[col].max() - plot_df[col].min()))
+        else:
+            plot_df[col + '_norm'] = ((plot_df[col] - plot_df[col].min()) /
+                                     (plot_df[col].max() - plot_df[col].min()))
+
+    # Radar chart
+    fig = go.Figure()
+
+    for idx, row in plot_df.iterrows():
+        fig.add_trace(go.Scatterpolar(
+            r=[row[col + '_norm'] for col in metrics_to_plot],
+            theta=['Fulfillment', 'On-Time', 'Cost Efficiency', 'Profit', 'Utilization'],
+            fill='toself',
+            name=row['scenario_name'],
+            line=dict(color=CHART_COLORS_DISCRETE[idx % len(CHART_COLORS_DISCRETE)], width=2),
+            hovertemplate='<b>%{theta}</b><br>Normalized Score: %{r:.2f}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        polar=dict(
+            bgcolor='rgba(0,0,0,0)',
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1],
+                gridcolor='#37474f',
+                color='#b0bec5'
+            ),
+            angularaxis=dict(
+                gridcolor='#37474f',
+                color='#e2e8f0'
+            )
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=13),
+        showlegend=True,
+        legend=dict(
+            bgcolor='rgba(38, 50, 56, 0.8)',
+            bordercolor='#546e7a',
+            borderwidth=1
+        ),
+        height=500,
+        margin=dict(t=60, b=60, l=80, r=80)
+    )
+
+    return fig
+
+
 def show_scenario_comparison(data):
     """Compare all optimization scenarios"""
 
@@ -1420,66 +2099,9 @@ def show_scenario_comparison(data):
         # Multi-metric comparison
         st.markdown("## 📈 Multi-Metric Comparison")
 
-        # Create parallel coordinates plot
-        metrics_to_plot = [
-            'order_fulfillment_rate',
-            'on_time_delivery_rate',
-            'total_cost',
-            'profit_improvement',
-            'avg_warehouse_utilization'
-        ]
-
-        plot_df = filtered_df[['scenario_name'] + metrics_to_plot].copy()
-
-        # Normalize for better visualization
-        for col in metrics_to_plot:
-            if col == 'total_cost':
-                # Invert cost (lower is better)
-                plot_df[col + '_norm'] = 1 - ((plot_df[col] - plot_df[col].min()) /
-                                             (plot_df[col].max() - plot_df[col].min()))
-            else:
-                plot_df[col + '_norm'] = ((plot_df[col] - plot_df[col].min()) /
-                                         (plot_df[col].max() - plot_df[col].min()))
-
-        # Radar chart
-        fig = go.Figure()
-
-        for idx, row in plot_df.iterrows():
-            fig.add_trace(go.Scatterpolar(
-                r=[row[col + '_norm'] for col in metrics_to_plot],
-                theta=['Fulfillment', 'On-Time', 'Cost Efficiency', 'Profit', 'Utilization'],
-                fill='toself',
-                name=row['scenario_name'],
-                line=dict(color=CHART_COLORS_DISCRETE[idx % len(CHART_COLORS_DISCRETE)], width=2),
-                hovertemplate='<b>%{theta}</b><br>Normalized Score: %{r:.2f}<extra></extra>'
-            ))
-
-        fig.update_layout(
-            polar=dict(
-                bgcolor='rgba(0,0,0,0)',
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 1],
-                    gridcolor='#37474f',
-                    color='#b0bec5'
-                ),
-                angularaxis=dict(
-                    gridcolor='#37474f',
-                    color='#e2e8f0'
-                )
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', size=13),
-            showlegend=True,
-            legend=dict(
-                bgcolor='rgba(38, 50, 56, 0.8)',
-                bordercolor='#546e7a',
-                borderwidth=1
-            ),
-            height=500,
-            margin=dict(t=60, b=60, l=80, r=80)
-        )
+        fig = cached_figure(data, 'selected_scenarios_radar', build_selected_scenarios_radar, filtered_df,
+                            controls={'scenarios': tuple(selected_scenarios)},
+                            sources=('scenario_comparison_kpis.csv',))
 
         st.plotly_chart(fig, use_container_width=True)
 
@@ -1508,26 +2130,23 @@ def show_scenario_comparison(data):
             'avg_warehouse_utilization'
         ]].copy()
 
-        # Format columns
-        comparison_table['order_fulfillment_rate'] = comparison_table['order_fulfillment_rate'].apply(
-            lambda x: format_percentage(x))
-        comparison_table['on_time_delivery_rate'] = comparison_table['on_time_delivery_rate'].apply(
-            lambda x: format_percentage(x))
-        comparison_table['total_cost'] = comparison_table['total_cost'].apply(
-            lambda x: f"${x/1e6:.2f}M")
-        comparison_table['profit_improvement'] = comparison_table['profit_improvement'].apply(
-            lambda x: f"${x/1e6:.2f}M" if x >= 0 else f"-${abs(x)/1e6:.2f}M")
-        comparison_table['total_stockouts'] = comparison_table['total_stockouts'].apply(
-            lambda x: f"{x:,.0f}")
-        comparison_table['avg_warehouse_utilization'] = comparison_table['avg_warehouse_utilization'].apply(
-            lambda x: f"{x:.1f}%")
+        # Scale rates to % and money to $M for display
+        comparison_table[['order_fulfillment_rate', 'on_time_delivery_rate']] *= 100
+        comparison_table[['total_cost', 'profit_improvement']] /= 1e6
 
         comparison_table.columns = [
             'Scenario', 'Fulfillment', 'On-Time', 'Total Cost',
             'Profit ∆', 'Stockouts', 'WH Util'
         ]
 
-        st.dataframe(comparison_table, hide_index=True, use_container_width=True)
+        show_formatted_table(comparison_table, {
+            'Fulfillment': 'percent',
+            'On-Time': 'percent',
+            'Total Cost': 'currency_m',
+            'Profit ∆': 'currency_m',
+            'Stockouts': 'units',
+            'WH Util': 'percent'
+        })
 
         st.markdown("---")
 
@@ -1605,10 +2224,452 @@ def show_scenario_comparison(data):
         st.warning("⚠️ Please select at least 2 scenarios to enable comparison visualizations.")
 
 
-# ============================================================================
-# ENHANCED COMPLETE SCENARIO ANALYSIS
-# Replace the show_comprehensive_scenario_comparison() function
-# ============================================================================
+# ============================================================================
+# ENHANCED COMPLETE SCENARIO ANALYSIS
+# Replace the show_comprehensive_scenario_comparison() function
+# ============================================================================
+
+def build_top_scenarios_radar(kpi_matrix):
+    """Radar chart of the top 5 scenarios by profit improvement"""
+
+    metrics_for_radar = [
+        'order_fulfillment_rate',
+        'on_time_delivery_rate',
+        'profit_improvement',
+        'avg_warehouse_utilization'
+    ]
+
+    fig = go.Figure()
+
+    # Select top 5 scenarios by profit (scores are precomputed in the KPI matrix)
+    top_scenarios = kpi_matrix.nsmallest(5, 'profit_improvement_rank')
+
+    for idx, row in top_scenarios.iterrows():
+        fig.add_trace(go.Scatterpolar(
+            r=[row[col + '_score'] for col in metrics_for_radar],
+            theta=['Fulfillment', 'On-Time', 'Profit', 'Utilization'],
+            fill='toself',
+            name=row['scenario_name'].replace('_', ' '),
+            line=dict(width=2.5),
+            opacity=0.7,
+            hovertemplate='<b>%{theta}</b><br>Score: %{r:.2f}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        polar=dict(
+            bgcolor='rgba(0,0,0,0)',
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1],
+                gridcolor='#37474f',
+                color='#b0bec5',
+                tickfont=dict(size=11)
+            ),
+            angularaxis=dict(
+                gridcolor='#37474f',
+                color='#e2e8f0',
+                tickfont=dict(size=12, color='#ffffff')
+            )
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        showlegend=True,
+        legend=dict(
+            bgcolor='rgba(38, 50, 56, 0.95)',
+            bordercolor='#546e7a',
+            borderwidth=2,
+            font=dict(size=11)
+        ),
+        height=500,
+        margin=dict(t=40, b=40, l=80, r=80)
+    )
+
+    return fig
+
+
+def build_capacity_panel(capacity_with_baseline):
+    """2x2 panel of KPIs across capacity expansion levels"""
+
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'Order Fulfillment Rate (%)',
+            'Total System Cost ($M)',
+            'Warehouse Utilization (%)',
+            'Profit Improvement ($M)'
+        ),
+        vertical_spacing=0.15,
+        horizontal_spacing=0.12
+    )
+
+    # Fulfillment
+    fig.add_trace(
+        go.Scatter(
+            x=capacity_with_baseline['capacity_multiplier'] * 100,
+            y=capacity_with_baseline['order_fulfillment_rate'] * 100,
+            mode='lines+markers',
+            marker=dict(size=12, color=COLORS['teal'], line=dict(width=2, color='#ffffff')),
+            line=dict(width=3, color=COLORS['teal']),
+            name='Fulfillment',
+            hovertemplate='Capacity: %{x}%<br>Fulfillment: %{y:.1f}%<extra></extra>'
+        ),
+        row=1, col=1
+    )
+
+    # Cost
+    fig.add_trace(
+        go.Scatter(
+            x=capacity_with_baseline['capacity_multiplier'] * 100,
+            y=capacity_with_baseline['total_cost'] / 1e6,
+            mode='lines+markers',
+            marker=dict(size=12, color=COLORS['coral'], line=dict(width=2, color='#ffffff')),
+            line=dict(width=3, color=COLORS['coral']),
+            name='Cost',
+            hovertemplate='Capacity: %{x}%<br>Cost: $%{y:.2f}M<extra></extra>'
+        ),
+        row=1, col=2
+    )
+
+    # Utilization
+    fig.add_trace(
+        go.Scatter(
+            x=capacity_with_baseline['capacity_multiplier'] * 100,
+            y=capacity_with_baseline['avg_warehouse_utilization'],
+            mode='lines+markers',
+            marker=dict(size=12, color=COLORS['purple'], line=dict(width=2, color='#ffffff')),
+            line=dict(width=3, color=COLORS['purple']),
+            name='Utilization',
+            hovertemplate='Capacity: %{x}%<br>Utilization: %{y:.1f}%<extra></extra>'
+        ),
+        row=2, col=1
+    )
+
+    # Profit
+    fig.add_trace(
+        go.Scatter(
+            x=capacity_with_baseline['capacity_multiplier'] * 100,
+            y=capacity_with_baseline['profit_improvement'] / 1e6,
+            mode='lines+markers',
+            marker=dict(size=12, color=COLORS['green'], line=dict(width=2, color='#ffffff')),
+            line=dict(width=3, color=COLORS['green']),
+            name='Profit',
+            hovertemplate='Capacity: %{x}%<br>Profit: $%{y:.2f}M<extra></extra>'
+        ),
+        row=2, col=2
+    )
+
+    # Update axes
+    fig.update_xaxes(title_text="Capacity Level (%)", row=1, col=1, gridcolor='#37474f')
+    fig.update_xaxes(title_text="Capacity Level (%)", row=1, col=2, gridcolor='#37474f')
+    fig.update_xaxes(title_text="Capacity Level (%)", row=2, col=1, gridcolor='#37474f')
+    fig.update_xaxes(title_text="Capacity Level (%)", row=2, col=2, gridcolor='#37474f')
+
+    fig.update_yaxes(gridcolor='#37474f', row=1, col=1)
+    fig.update_yaxes(gridcolor='#37474f', row=1, col=2)
+    fig.update_yaxes(gridcolor='#37474f', row=2, col=1)
+    fig.update_yaxes(gridcolor='#37474f', row=2, col=2)
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        height=700,
+        margin=dict(t=80, b=60, l=60, r=40),
+        showlegend=False
+    )
+
+    return fig
+
+
+PARETO_SERVICE_AXES = {
+    'Order Fulfillment': 'order_fulfillment_rate',
+    'On-Time Delivery': 'on_time_delivery_rate'
+}
+
+# On-time axis used when the cost vs on-time frontier points are included
+PARETO_VOLUME_AXIS = ('On-Time Share of Units', 'on_time_volume_rate')
+
+
+def build_pareto_frontier(frontier, service_col):
+    """Cost vs service scatter with the 2-D frontier line and 3-objective frontier highlighted"""
+
+    labels = {col: label for label, col in [*PARETO_SERVICE_AXES.items(), PARETO_VOLUME_AXIS]}
+    other_col = next(col for col in labels if col != service_col and col in frontier.columns)
+    pair_col = f'total_cost_vs_{service_col}'
+
+    dominated = frontier[~frontier['pareto_efficient']]
+    efficient = frontier[frontier['pareto_efficient']]
+    pair_front = frontier[frontier[pair_col]].sort_values('total_cost')
+
+    fig = go.Figure()
+
+    # WebGL traces keep large automatically generated sweeps interactive
+    fig.add_trace(go.Scattergl(
+        x=dominated['total_cost'] / 1e6,
+        y=dominated[service_col] * 100,
+        mode='markers',
+        marker=dict(size=7, color=COLORS['gray'], opacity=0.5),
+        name='Dominated',
+        text=dominated['scenario_name'],
+        customdata=dominated['pareto_rank'],
+        hovertemplate='<b>%{text}</b><br>Cost: $%{x:.2f}M<br>Service: %{y:.1f}%<br>Front: %{customdata}<extra></extra>'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=pair_front['total_cost'] / 1e6,
+        y=pair_front[service_col] * 100,
+        mode='lines',
+        line=dict(width=2, color=COLORS['gold'], dash='dash', shape='hv'),
+        name='Frontier (2 objectives)',
+        hoverinfo='skip'
+    ))
+
+    fig.add_trace(go.Scattergl(
+        x=efficient['total_cost'] / 1e6,
+        y=efficient[service_col] * 100,
+        mode='markers',
+        marker=dict(
+            size=12,
+            color=efficient[other_col] * 100,
+            colorscale='Viridis',
+            colorbar=dict(title=f'{labels[other_col]} (%)'),
+            line=dict(width=1.5, color='#ffffff')
+        ),
+        name='Pareto-efficient (3 objectives)',
+        text=efficient['scenario_name'],
+        hovertemplate='<b>%{text}</b><br>Cost: $%{x:.2f}M<br>Service: %{y:.1f}%<extra></extra>'
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title='Total Cost ($M) — lower is better', gridcolor='#37474f'),
+        yaxis=dict(title=f'{labels[service_col]} (%) — higher is better', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        legend=dict(
+            bgcolor='rgba(38, 50, 56, 0.9)',
+            bordercolor='#546e7a',
+            borderwidth=1,
+            orientation='h',
+            y=-0.2
+        ),
+        height=500,
+        margin=dict(t=40, b=80, l=60, r=40)
+    )
+
+    return fig
+
+
+def build_capacity_value(values):
+    """Pro-rata value of an extra m3 per warehouse, coloured by binding pairs"""
+
+    values = values.sort_values('value_per_m3_pro_rata', ascending=False)
+
+    fig = go.Figure(go.Bar(
+        x=values['warehouse_id'],
+        y=values['value_per_m3_pro_rata'],
+        marker=dict(
+            color=values['binding_pairs'],
+            colorscale=[[0, COLORS['teal']], [1, COLORS['coral']]],
+            colorbar=dict(title='Binding Pairs'),
+            line=dict(color='#ffffff', width=1)
+        ),
+        customdata=values[['binding_pairs', 'stocked_pairs', 'value_per_m3']],
+        hovertemplate='<b>%{x}</b><br>Value (pro rata): $%{y:,.0f} per m³/yr'
+                      '<br>Best product: $%{customdata[2]:,.0f} per m³/yr'
+                      '<br>Binding: %{customdata[0]} of %{customdata[1]} pairs<extra></extra>'
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title='Warehouse', gridcolor='#37474f'),
+        yaxis=dict(title='Cost Saving per Extra m³ ($/yr)', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        showlegend=False,
+        height=380,
+        margin=dict(t=30, b=60, l=60, r=30)
+    )
+
+    return fig
+
+
+def show_capacity_shadow_prices(data, capacity_scenarios, baseline):
+    """Marginal value of storage from the Baseline capacity duals"""
+
+    sensitivity = data['baseline']['sensitivity']
+    values = sensitivity['warehouses']
+
+    st.markdown("### 💲 Marginal Value of Capacity (Shadow Prices)")
+    st.caption(
+        "Capacity duals of the Baseline shipment LP with stocking fixed. Pro rata spreads an extra m³ over "
+        "every stocked product at the warehouse; best product puts it all behind the most constrained one. "
+        "Both hold only while the same constraints stay binding."
+    )
+
+    col1, col2 = st.columns([3, 2])
+
+    with col1:
+        fig = cached_figure(data, 'capacity_value', build_capacity_value, values,
+                            sources=(f'Baseline/{SENSITIVITY_WAREHOUSES_FILE}',))
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        # First-order estimate of each capacity scenario vs its re-optimized result
+        baseline_cost = baseline['total_cost'].values[0]
+        comparison = pd.DataFrame({
+            'Scenario': capacity_scenarios['scenario_name'].str.replace('_', ' '),
+            'Dual Estimate': [
+                -capacity_estimate(sensitivity['capacity'], multiplier - 1) / 1e6
+                for multiplier in capacity_scenarios['capacity_multiplier']
+            ],
+            'Re-solved': (baseline_cost - capacity_scenarios['total_cost']) / 1e6
+        }).sort_values('Dual Estimate')
+
+        st.markdown("**Cost Saving: Dual Estimate vs Re-solved Scenario**")
+        show_formatted_table(comparison, {'Dual Estimate': 'currency_m', 'Re-solved': 'currency_m'})
+
+        table = values[['warehouse_id', 'binding_pairs', 'value_per_m3_pro_rata', 'value_per_m3']].sort_values(
+            'value_per_m3_pro_rata', ascending=False
+        )
+        table.columns = ['Warehouse', 'Binding Pairs', 'Per m³ (Pro Rata)', 'Per m³ (Best Product)']
+        show_formatted_table(table, {
+            'Binding Pairs': 'units',
+            'Per m³ (Pro Rata)': 'currency',
+            'Per m³ (Best Product)': 'currency'
+        })
+
+
+def show_aggregate_estimates(data):
+    """Scenario costs from the product-cluster model with their error bounds"""
+
+    kpis = data['aggregate']['kpis']
+    estimates = data['aggregate']['estimates']
+    full_solved = 'full_cost' in estimates
+
+    st.markdown("## ⚡ Fast Aggregated Estimates")
+    st.caption(
+        f"Each scenario re-solved with {kpis['products']} products grouped into {kpis['clusters']} clusters "
+        f"(by category, volume and price profile). Cluster stocking decisions are applied to every member and "
+        f"SKU shipments re-optimized, so the estimate is a feasible plan: the optimum lies between the "
+        f"SKU-level LP bound and the estimate."
+    )
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Answer Time (All Scenarios)", f"{kpis['total_answer_seconds']:.1f}s",
+                  f"{kpis['total_full_solve_seconds']:.1f}s SKU-level" if full_solved else "SKU-level pending",
+                  delta_color="off")
+    with col2:
+        st.metric("Max Error Bound", format_percentage(kpis['max_error_bound_pct'] / 100, 2),
+                  "above the LP lower bound", delta_color="off")
+    with col3:
+        st.metric("Max Error vs Full Solve",
+                  format_percentage(kpis['max_estimate_error_pct'] / 100, 3) if full_solved else "—",
+                  "exact" if full_solved else "SKU-level pending", delta_color="off")
+
+    table = pd.DataFrame({
+        'Scenario': estimates['scenario_name'].str.replace('_', ' '),
+        'Estimate': estimates['estimated_total_cost'] / 1e6,
+        'Lower Bound': estimates['lower_bound'] / 1e6,
+        'Error Bound': estimates['error_bound_pct'],
+        'Answer (s)': estimates['answer_seconds']
+    })
+    formats = {
+        'Estimate': 'currency_m',
+        'Lower Bound': 'currency_m',
+        'Error Bound': 'percent_2',
+        'Answer (s)': '%.2f'
+    }
+    if full_solved:
+        table['Full Solve'] = estimates['full_cost'] / 1e6
+        table['Error'] = estimates['estimate_error_pct']
+        table['Full (s)'] = estimates['full_solve_seconds']
+        formats.update({'Full Solve': 'currency_m', 'Error': '%+.3f%%', 'Full (s)': '%.2f'})
+
+    show_formatted_table(table, formats)
+
+
+def show_run_diff(data):
+    """Added, removed and changed shipments / stocking / stockouts between two stored runs"""
+
+    scenarios = diff_scenarios(data)
+
+    st.markdown("## 🔀 Run-to-Run Diff")
+    st.caption(
+        "Plan tables of two runs joined on their keys (warehouse, region, product). Only rows that were added, "
+        "removed or changed are listed; tables with identical recorded checksums are skipped."
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        old = st.selectbox("Old run:", scenarios, format_func=lambda name: name.replace('_', ' '),
+                           key='run_diff_old')
+    with col2:
+        default = 'Increased_Capacity_20pct'
+        new = st.selectbox("New run:", scenarios, format_func=lambda name: name.replace('_', ' '),
+                           index=scenarios.index(default) if default in scenarios else 1, key='run_diff_new')
+
+    changes, summary = get_run_diff(data, old, new)
+    shipments = summary['shipments']
+    kpi_deltas = summary['kpi_deltas']
+
+    col1, col2, col3, col4 = st.columns(4)
+    if shipments.get('identical_checksum'):
+        col1.metric("Shipments", "Identical", "checksum match", delta_color="off")
+    else:
+        col1.metric("Shipments Added / Removed", f"+{shipments['added']:,} / −{shipments['removed']:,}",
+                    f"{shipments['changed']:,} changed", delta_color="off")
+        col2.metric("Units Moved", f"{shipments['quantity_moved']:,.0f}",
+                    f"{shipments['quantity_net_delta']:+,.0f} net", delta_color="off")
+    if 'total_cost' in kpi_deltas:
+        cost, transport = kpi_deltas['total_cost'], kpi_deltas.get('total_transportation_cost', 0)
+        col3.metric("Total Cost Δ", f"{'−' if cost < 0 else '+'}${abs(cost):,.0f}",
+                    f"{'−' if transport < 0 else '+'}${abs(transport):,.0f} transport", delta_color="off")
+    if 'on_time_delivery_rate' in kpi_deltas:
+        col4.metric("On-Time Δ", f"{kpi_deltas['on_time_delivery_rate'] * 100:+.2f} pp",
+                    f"{kpi_deltas.get('order_fulfillment_rate', 0) * 100:+.2f} pp fulfillment", delta_color="off")
+
+    counts = pd.DataFrame([
+        {'Table': name.title(), **{key: summary[name].get(key) for key in ['added', 'removed', 'changed', 'unchanged']}}
+        for name in DIFF_TABLES if not summary[name].get('identical_checksum')
+    ])
+    if counts.empty:
+        st.success("All plan tables are identical.")
+        return
+
+    counts.columns = ['Table', 'Added', 'Removed', 'Changed', 'Unchanged']
+    show_formatted_table(counts, {column: 'units' for column in ['Added', 'Removed', 'Changed', 'Unchanged']})
+
+    tabs = st.tabs(["🛣️ Lanes", "🚚 Shipments", "📦 Stocking", "⚠️ Stockouts"])
+
+    with tabs[0]:
+        if changes['shipments'] is not None and len(changes['shipments']):
+            lanes = lane_changes(changes['shipments'])
+            lanes.columns = ['Warehouse', 'Region', 'Products', 'Qty Change', 'Units Moved', 'Transport Cost Δ']
+            show_formatted_table(lanes, {
+                'Products': 'units',
+                'Qty Change': '%+,.0f',
+                'Units Moved': 'units',
+                'Transport Cost Δ': '$%+,.0f'
+            }, height=300)
+        else:
+            st.info("No shipment changes.")
+
+    for tab, name in zip(tabs[1:], DIFF_TABLES):
+        with tab:
+            table = changes[name]
+            if table is None or table.empty:
+                st.info(f"No {name} changes.")
+                continue
+            deltas = [column for column in table.columns if column.endswith('_delta')]
+            show_formatted_table(table, {
+                column: '%+,.2f' if column in deltas else '%,.2f'
+                for column in table.columns if column.startswith(('old_', 'new_')) or column in deltas
+            }, height=300)
+
 
 def show_comprehensive_scenario_comparison(data):
     """Enhanced scenario comparison with better visualizations"""
@@ -1631,8 +2692,9 @@ def show_comprehensive_scenario_comparison(data):
         'Higher_Service_Target_99pct'
     ]
 
-    # Filter to available scenarios
+    # Filter to available scenarios (plus any new ones the engine has written)
     available_scenarios = [s for s in all_scenarios if s in kpi_comparison['scenario_name'].values]
+    available_scenarios += [s for s in kpi_comparison['scenario_name'].unique() if s not in all_scenarios]
 
     # Overview section
     st.markdown(f"""
@@ -1656,10 +2718,13 @@ def show_comprehensive_scenario_comparison(data):
 
     col1, col2, col3, col4 = st.columns(4)
 
-    best_profit = kpi_comparison.loc[kpi_comparison['profit_improvement'].idxmax()]
-    best_fulfillment = kpi_comparison.loc[kpi_comparison['order_fulfillment_rate'].idxmax()]
-    lowest_cost = kpi_comparison.loc[kpi_comparison['total_cost'].idxmin()]
-    profit_range = kpi_comparison['profit_improvement'].max() - kpi_comparison['profit_improvement'].min()
+    kpi_matrix = get_kpi_matrix(data)
+    leaders = kpi_leaders(kpi_matrix)
+
+    best_profit = leaders['profit_improvement']
+    best_fulfillment = leaders['order_fulfillment_rate']
+    lowest_cost = leaders['total_cost']
+    profit_range = kpi_matrix['profit_improvement'].max() - kpi_matrix['profit_improvement'].min()
 
     with col1:
         st.markdown(f"""
@@ -1705,70 +2770,9 @@ def show_comprehensive_scenario_comparison(data):
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        # Enhanced radar chart with all scenarios
-        metrics_for_radar = [
-            'order_fulfillment_rate',
-            'on_time_delivery_rate',
-            'profit_improvement',
-            'avg_warehouse_utilization'
-        ]
-
-        # Normalize metrics
-        normalized_df = kpi_comparison.copy()
-        for col in metrics_for_radar:
-            if col == 'total_cost':
-                # Invert cost (lower is better)
-                normalized_df[col + '_norm'] = 1 - ((normalized_df[col] - normalized_df[col].min()) /
-                                                    (normalized_df[col].max() - normalized_df[col].min()))
-            else:
-                normalized_df[col + '_norm'] = ((normalized_df[col] - normalized_df[col].min()) /
-                                                (normalized_df[col].max() - normalized_df[col].min()))
-
-        fig = go.Figure()
-
-        # Select top 5 scenarios by profit
-        top_scenarios = normalized_df.nlargest(5, 'profit_improvement')
-
-        for idx, row in top_scenarios.iterrows():
-            fig.add_trace(go.Scatterpolar(
-                r=[row[col + '_norm'] for col in metrics_for_radar],
-                theta=['Fulfillment', 'On-Time', 'Profit', 'Utilization'],
-                fill='toself',
-                name=row['scenario_name'].replace('_', ' '),
-                line=dict(width=2.5),
-                opacity=0.7,
-                hovertemplate='<b>%{theta}</b><br>Score: %{r:.2f}<extra></extra>'
-            ))
-
-        fig.update_layout(
-            polar=dict(
-                bgcolor='rgba(0,0,0,0)',
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 1],
-                    gridcolor='#37474f',
-                    color='#b0bec5',
-                    tickfont=dict(size=11)
-                ),
-                angularaxis=dict(
-                    gridcolor='#37474f',
-                    color='#e2e8f0',
-                    tickfont=dict(size=12, color='#ffffff')
-                )
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', size=12),
-            showlegend=True,
-            legend=dict(
-                bgcolor='rgba(38, 50, 56, 0.95)',
-                bordercolor='#546e7a',
-                borderwidth=2,
-                font=dict(size=11)
-            ),
-            height=500,
-            margin=dict(t=40, b=40, l=80, r=80)
-        )
+        # Enhanced radar chart with the top scenarios
+        fig = cached_figure(data, 'top_scenarios_radar', build_top_scenarios_radar, kpi_matrix,
+                            sources=('scenario_comparison_kpis.csv',))
 
         st.plotly_chart(fig, use_container_width=True)
 
@@ -1811,6 +2815,83 @@ def show_comprehensive_scenario_comparison(data):
 
     st.markdown("---")
 
+    # Pareto frontier
+    st.markdown("## ⚖️ Cost vs Service Pareto Frontier")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        service_axis = st.radio("Service metric:", list(PARETO_SERVICE_AXES), horizontal=True)
+        service_col = PARETO_SERVICE_AXES[service_axis]
+
+        include_tradeoff = 'tradeoff' in data and st.checkbox(
+            f"Include {data['tradeoff']['kpis']['points']} cost vs on-time frontier points "
+            f"({data['tradeoff']['kpis']['method']})", value=True
+        )
+        frontier = get_frontier(data, include_tradeoff)
+        on_time_col = PARETO_VOLUME_AXIS[1] if include_tradeoff else 'on_time_delivery_rate'
+        if service_col == 'on_time_delivery_rate':
+            service_col = on_time_col
+
+        sources = ('scenario_comparison_kpis.csv',)
+        if include_tradeoff:
+            sources += (f'{TRADEOFF_DIR}/{TRADEOFF_FILE}',) + tuple(
+                f'{name}/shipments.csv' for name in data['kpi_comparison']['scenario_name']
+            )
+
+        fig = cached_figure(data, 'pareto_frontier', build_pareto_frontier, frontier, service_col,
+                            controls={'service': service_col, 'tradeoff': include_tradeoff},
+                            sources=sources)
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        if include_tradeoff:
+            tradeoff = data['tradeoff']['kpis']
+            st.caption(
+                f"OnTime_* points are KPI-only scenarios from warm-started re-solves with a rising floor on the "
+                f"on-time share of shipped units ({tradeoff['min_on_time_volume_rate']:.0%} → "
+                f"{tradeoff['max_on_time_volume_rate']:.0%}, ${tradeoff['min_cost'] / 1e6:.1f}M → "
+                f"${tradeoff['max_cost'] / 1e6:.1f}M). Late shipments are replaced by stockouts. With these "
+                f"points included, on-time is the share of shipped units for every scenario (not the share of "
+                f"shipment routes shown elsewhere)."
+            )
+
+    with col2:
+        efficient = frontier[frontier['pareto_efficient']].sort_values('total_cost')
+
+        st.markdown(f"""
+        <div class="stat-card">
+            <div class="label">Pareto-Efficient Scenarios</div>
+            <div class="value">{len(efficient)} / {len(frontier)}</div>
+            <div style="color: #b0bec5; font-size: 0.9rem; margin-top: 0.5rem;">
+                No scenario is cheaper and at least as good on fulfillment and on-time delivery
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        efficient_df = efficient[['scenario_name', 'total_cost', 'order_fulfillment_rate', on_time_col]].copy()
+        on_time_label = 'On-Time (Units)' if include_tradeoff else 'On-Time'
+        efficient_df.columns = ['Scenario', 'Total Cost', 'Fulfillment', on_time_label]
+        efficient_df['Scenario'] = efficient_df['Scenario'].str.replace('_', ' ')
+        efficient_df['Total Cost'] /= 1e6
+        efficient_df[['Fulfillment', on_time_label]] *= 100
+
+        show_formatted_table(efficient_df, {
+            'Total Cost': 'currency_m',
+            'Fulfillment': 'percent',
+            on_time_label: 'percent'
+        }, height=300)
+
+    st.markdown("---")
+
+    if 'aggregate' in data:
+        show_aggregate_estimates(data)
+        st.markdown("---")
+
+    if len(diff_scenarios(data)) >= 2:
+        show_run_diff(data)
+        st.markdown("---")
+
     # Detailed category analysis
     st.markdown("## 🔬 Detailed Category Analysis")
 
@@ -1834,93 +2915,8 @@ def show_comprehensive_scenario_comparison(data):
             capacity_with_baseline = capacity_with_baseline.sort_values('capacity_multiplier')
 
             # Enhanced multi-metric line chart
-            fig = make_subplots(
-                rows=2, cols=2,
-                subplot_titles=(
-                    'Order Fulfillment Rate (%)',
-                    'Total System Cost ($M)',
-                    'Warehouse Utilization (%)',
-                    'Profit Improvement ($M)'
-                ),
-                vertical_spacing=0.15,
-                horizontal_spacing=0.12
-            )
-
-            # Fulfillment
-            fig.add_trace(
-                go.Scatter(
-                    x=capacity_with_baseline['capacity_multiplier'] * 100,
-                    y=capacity_with_baseline['order_fulfillment_rate'] * 100,
-                    mode='lines+markers',
-                    marker=dict(size=12, color=COLORS['teal'], line=dict(width=2, color='#ffffff')),
-                    line=dict(width=3, color=COLORS['teal']),
-                    name='Fulfillment',
-                    hovertemplate='Capacity: %{x}%<br>Fulfillment: %{y:.1f}%<extra></extra>'
-                ),
-                row=1, col=1
-            )
-
-            # Cost
-            fig.add_trace(
-                go.Scatter(
-                    x=capacity_with_baseline['capacity_multiplier'] * 100,
-                    y=capacity_with_baseline['total_cost'] / 1e6,
-                    mode='lines+markers',
-                    marker=dict(size=12, color=COLORS['coral'], line=dict(width=2, color='#ffffff')),
-                    line=dict(width=3, color=COLORS['coral']),
-                    name='Cost',
-                    hovertemplate='Capacity: %{x}%<br>Cost: $%{y:.2f}M<extra></extra>'
-                ),
-                row=1, col=2
-            )
-
-            # Utilization
-            fig.add_trace(
-                go.Scatter(
-                    x=capacity_with_baseline['capacity_multiplier'] * 100,
-                    y=capacity_with_baseline['avg_warehouse_utilization'],
-                    mode='lines+markers',
-                    marker=dict(size=12, color=COLORS['purple'], line=dict(width=2, color='#ffffff')),
-                    line=dict(width=3, color=COLORS['purple']),
-                    name='Utilization',
-                    hovertemplate='Capacity: %{x}%<br>Utilization: %{y:.1f}%<extra></extra>'
-                ),
-                row=2, col=1
-            )
-
-            # Profit
-            fig.add_trace(
-                go.Scatter(
-                    x=capacity_with_baseline['capacity_multiplier'] * 100,
-                    y=capacity_with_baseline['profit_improvement'] / 1e6,
-                    mode='lines+markers',
-                    marker=dict(size=12, color=COLORS['green'], line=dict(width=2, color='#ffffff')),
-                    line=dict(width=3, color=COLORS['green']),
-                    name='Profit',
-                    hovertemplate='Capacity: %{x}%<br>Profit: $%{y:.2f}M<extra></extra>'
-                ),
-                row=2, col=2
-            )
-
-            # Update axes
-            fig.update_xaxes(title_text="Capacity Level (%)", row=1, col=1, gridcolor='#37474f')
-            fig.update_xaxes(title_text="Capacity Level (%)", row=1, col=2, gridcolor='#37474f')
-            fig.update_xaxes(title_text="Capacity Level (%)", row=2, col=1, gridcolor='#37474f')
-            fig.update_xaxes(title_text="Capacity Level (%)", row=2, col=2, gridcolor='#37474f')
-
-            fig.update_yaxes(gridcolor='#37474f', row=1, col=1)
-            fig.update_yaxes(gridcolor='#37474f', row=1, col=2)
-            fig.update_yaxes(gridcolor='#37474f', row=2, col=1)
-            fig.update_yaxes(gridcolor='#37474f', row=2, col=2)
-
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#e2e8f0', size=12),
-                height=700,
-                margin=dict(t=80, b=60, l=60, r=40),
-                showlegend=False
-            )
+            fig = cached_figure(data, 'capacity_panel', build_capacity_panel, capacity_with_baseline,
+                                sources=('scenario_comparison_kpis.csv',))
 
             st.plotly_chart(fig, use_container_width=True)
 
@@ -1969,6 +2965,9 @@ def show_comprehensive_scenario_comparison(data):
                 </div>
                 """, unsafe_allow_html=True)
 
+            if 'sensitivity' in data['baseline']:
+                show_capacity_shadow_prices(data, capacity_scenarios, baseline)
+
     with tab2:
         st.markdown("### Transportation Cost Sensitivity Analysis")
 
@@ -2172,12 +3171,11 @@ def show_comprehensive_scenario_comparison(data):
     with tab4:
         st.markdown("### Complete Scenario Comparison Table")
 
-        # Enhanced comparison table
-        comparison_df = kpi_comparison[kpi_comparison['scenario_name'].isin(available_scenarios)].copy()
-
-        # Add calculated columns
-        comparison_df['cost_efficiency'] = (comparison_df['profit_improvement'] /
-                                            comparison_df['total_cost'] * 100)
+        # Enhanced comparison table (derived columns come from the KPI matrix)
+        in_scope = kpi_matrix['scenario_name'].isin(available_scenarios)
+        comparison_df = kpi_comparison[in_scope.to_numpy()].join(
+            kpi_matrix.loc[in_scope, ['cost_efficiency', 'total_cost_delta_pct', 'pareto_efficient']]
+        )
 
         # Format for display
         display_df = comparison_df[[
@@ -2185,36 +3183,38 @@ def show_comprehensive_scenario_comparison(data):
             'order_fulfillment_rate',
             'on_time_delivery_rate',
             'total_cost',
+            'total_cost_delta_pct',
             'profit_improvement',
             'total_stockouts',
             'avg_warehouse_utilization',
-            'cost_efficiency'
+            'cost_efficiency',
+            'pareto_efficient'
         ]].copy()
 
         display_df.columns = [
-            'Scenario', 'Fulfillment', 'On-Time', 'Total Cost',
-            'Profit Δ', 'Stockouts', 'WH Util', 'Cost Efficiency'
+            'Scenario', 'Fulfillment', 'On-Time', 'Total Cost', 'Cost vs Baseline',
+            'Profit Δ', 'Stockouts', 'WH Util', 'Cost Efficiency', 'Pareto'
         ]
 
-        # Format values
-        display_df['Fulfillment'] = display_df['Fulfillment'].apply(lambda x: f"{x * 100:.1f}%")
-        display_df['On-Time'] = display_df['On-Time'].apply(lambda x: f"{x * 100:.1f}%")
-        display_df['Total Cost'] = display_df['Total Cost'].apply(lambda x: f"${x / 1e6:.2f}M")
-        display_df['Profit Δ'] = display_df['Profit Δ'].apply(
-            lambda x: f"${x / 1e6:.2f}M" if x >= 0 else f"-${abs(x) / 1e6:.2f}M")
-        display_df['Stockouts'] = display_df['Stockouts'].apply(lambda x: f"{x:,.0f}")
-        display_df['WH Util'] = display_df['WH Util'].apply(lambda x: f"{x:.1f}%")
-        display_df['Cost Efficiency'] = display_df['Cost Efficiency'].apply(lambda x: f"{x:.2f}%")
+        # Scale rates to % and money to $M for display
+        display_df[['Fulfillment', 'On-Time']] *= 100
+        display_df[['Total Cost', 'Profit Δ']] /= 1e6
 
         # Clean scenario names
         display_df['Scenario'] = display_df['Scenario'].str.replace('_', ' ')
 
-        st.dataframe(
-            display_df,
-            hide_index=True,
-            use_container_width=True,
-            height=400
-        )
+        show_formatted_table(display_df, {
+            'Fulfillment': 'percent',
+            'On-Time': 'percent',
+            'Total Cost': 'currency_m',
+            'Cost vs Baseline': 'percent_delta',
+            'Profit Δ': 'currency_m',
+            'Stockouts': 'units',
+            'WH Util': 'percent',
+            'Cost Efficiency': 'percent_2'
+        }, height=400)
+
+        st.caption("Pareto: no other scenario has lower total cost and equal-or-better fulfillment and on-time delivery.")
 
         # Download options
         col1, col2 = st.columns(2)
@@ -2258,6 +3258,276 @@ RECOMMENDATION: Prioritize carrier negotiations for 15-20% rate reduction.
 # PAGE 4: NETWORK VISUALIZATION
 # ============================================================================
 
+def build_network_map(nodes, edges, map_scope, projection, min_quantity, show_service_only, show_labels):
+    """Global network map of warehouses, regions and filtered routes"""
+
+    # Filter edges
+    filtered_edges = edges[edges['quantity'] >= min_quantity].copy()
+    if show_service_only:
+        filtered_edges = filtered_edges[filtered_edges['service_compliance'] > 0.5]
+
+    # Create global network visualization
+    fig = go.Figure()
+
+    # Add edges (routes) with better visibility
+    for idx, edge in filtered_edges.iterrows():
+        source_node = nodes[nodes['id'] == edge['source']].iloc[0]
+        target_node = nodes[nodes['id'] == edge['target']].iloc[0]
+
+        # Color based on service compliance
+        line_color = COLORS['green'] if edge['service_compliance'] > 0.5 else COLORS['orange']
+        line_width = max(1, np.log10(edge['quantity'] + 1) * 1.5)
+
+        # Add route line
+        fig.add_trace(go.Scattergeo(
+            lon=[source_node['longitude'], target_node['longitude']],
+            lat=[source_node['latitude'], target_node['latitude']],
+            mode='lines',
+            line=dict(width=line_width, color=line_color),
+            opacity=0.5,
+            hoverinfo='text',
+            text=f"Route: {edge['source']} → {edge['target']}<br>Volume: {edge['quantity']:,.0f} units<br>Cost: ${edge['cost']:,.0f}",
+            showlegend=False
+        ))
+
+    # Add warehouse nodes (larger, distinct)
+    wh_nodes = nodes[nodes['type'] == 'warehouse'].copy()
+    fig.add_trace(go.Scattergeo(
+        lon=wh_nodes['longitude'],
+        lat=wh_nodes['latitude'],
+        mode='markers+text' if show_labels else 'markers',
+        marker=dict(
+            size=18,
+            color=COLORS['teal'],
+            symbol='square',
+            line=dict(width=3, color=COLORS['white'])
+        ),
+        text=wh_nodes['label'] if show_labels else None,
+        textposition='top center',
+        textfont=dict(size=11, color=COLORS['white'], family='Arial Black'),
+        name='Warehouses',
+        hovertemplate='<b>%{text}</b><br>Lat: %{lat:.2f}<br>Lon: %{lon:.2f}<extra></extra>'
+    ))
+
+    # Add region nodes (smaller)
+    region_nodes = nodes[nodes['type'] == 'region'].copy()
+    fig.add_trace(go.Scattergeo(
+        lon=region_nodes['longitude'],
+        lat=region_nodes['latitude'],
+        mode='markers+text' if show_labels else 'markers',
+        marker=dict(
+            size=10,
+            color=COLORS['coral'],
+            symbol='circle',
+            line=dict(width=2, color=COLORS['white'])
+        ),
+        text=region_nodes['label'] if show_labels else None,
+        textposition='top center',
+        textfont=dict(size=9, color=COLORS['white']),
+        name='Regions',
+        hovertemplate='<b>%{text}</b><br>Lat: %{lat:.2f}<br>Lon: %{lon:.2f}<extra></extra>'
+    ))
+
+    # Configure map layout based on scope
+    geo_config = {
+        'world': dict(
+            scope='world',
+            projection_type=projection,
+            showland=True,
+            landcolor='#1a202c',
+            oceancolor='#0d1117',
+            showocean=True,
+            showcountries=True,
+            countrycolor='#546e7a',
+            coastlinecolor='#546e7a',
+            bgcolor='rgba(0,0,0,0)',
+            center=dict(lat=20, lon=0),
+            projection_scale=1
+        ),
+        'usa': dict(
+            scope='usa',
+            projection_type='albers usa',
+            showland=True,
+            landcolor='#1a202c',
+            bgcolor='rgba(0,0,0,0)',
+            showlakes=True,
+            lakecolor='#0d1117'
+        ),
+        'north america': dict(
+            scope='north america',
+            projection_type=projection,
+            showland=True,
+            landcolor='#1a202c',
+            bgcolor='rgba(0,0,0,0)',
+            coastlinecolor='#546e7a'
+        ),
+        'europe': dict(
+            scope='europe',
+            projection_type=projection,
+            showland=True,
+            landcolor='#1a202c',
+            bgcolor='rgba(0,0,0,0)',
+            coastlinecolor='#546e7a'
+        ),
+        'asia': dict(
+            scope='asia',
+            projection_type=projection,
+            showland=True,
+            landcolor='#1a202c',
+            bgcolor='rgba(0,0,0,0)',
+            coastlinecolor='#546e7a'
+        )
+    }
+
+    fig.update_layout(
+        geo=geo_config.get(map_scope, geo_config['world']),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        showlegend=True,
+        legend=dict(
+            bgcolor='rgba(38, 50, 56, 0.95)',
+            bordercolor='#546e7a',
+            borderwidth=2,
+            x=0.02,
+            y=0.98,
+            font=dict(size=12)
+        ),
+        height=750,
+        margin=dict(t=10, b=10, l=10, r=10)
+    )
+
+    return fig
+
+
+LANE_METRICS = {
+    'distance_km': ('Distance (km)', '%{z:,.0f} km'),
+    'unit_cost': ('Unit Cost ($)', '$%{z:,.2f}'),
+    'transit_time_days': ('Transit (days)', '%{z} days')
+}
+
+
+POOL_MOVES = {
+    'ban_lane': ('Avoid lane', COLORS['coral']),
+    'stock': ('Stock product', COLORS['teal']),
+    'unstock': ('Drop product', COLORS['gold'])
+}
+
+
+def pool_plan_label(plan):
+    """Short description of one solution-pool move"""
+    if plan['move'] == 'ban_lane':
+        target = f"{plan['warehouse_id']} → {plan['region']}"
+    else:
+        target = f"product {plan['product_id']:.0f} at {plan['warehouse_id']}"
+    return f"#{plan['plan_id']} · {POOL_MOVES[plan['move']][0]}: {target} (+${plan['cost_delta']:,.0f})"
+
+
+def build_solution_pool(plans, baseline_on_time):
+    """Cost increase vs on-time rate of every pooled alternative"""
+
+    fig = go.Figure()
+
+    for move, (label, color) in POOL_MOVES.items():
+        subset = plans[plans['move'] == move]
+        fig.add_trace(go.Scatter(
+            x=subset['cost_delta'],
+            y=subset['on_time_delivery_rate'] * 100,
+            mode='markers',
+            marker=dict(size=9, color=color, line=dict(width=1, color='#ffffff')),
+            name=label,
+            text=subset.apply(pool_plan_label, axis=1),
+            customdata=subset['changed_shipments'],
+            hovertemplate='%{text}<br>On-time: %{y:.2f}%<br>Shipments changed: %{customdata}<extra></extra>'
+        ))
+
+    fig.add_hline(y=baseline_on_time * 100, line_dash='dash', line_color=COLORS['gray'],
+                  annotation_text='Incumbent', annotation_position='right')
+
+    fig.update_layout(
+        xaxis=dict(title='Cost Increase vs Incumbent ($)', type='log', gridcolor='#37474f'),
+        yaxis=dict(title='On-Time Delivery (%)', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        legend=dict(orientation='h', y=-0.2),
+        height=400,
+        margin=dict(t=30, b=80, l=60, r=30)
+    )
+
+    return fig
+
+
+def show_solution_pool(data):
+    """Near-optimal alternatives to the Baseline plan and their shipment diffs"""
+
+    pool = data['baseline']['pool']
+    plans, diffs = pool['plans'], pool['diffs']
+    kpis = data['baseline']['kpis']
+
+    st.markdown("## 🧩 Alternative Plans")
+    st.caption(
+        f"{len(plans)} distinct plans within {plans['gap_pct'].max():.2f}% of the Baseline cost, each one move "
+        "away from it (avoid a lane, stock or drop a product). Only the shipments that differ are stored."
+    )
+
+    fig = cached_figure(data, 'solution_pool', build_solution_pool, plans, kpis['on_time_delivery_rate'],
+                        sources=(f'Baseline/{POOL_FILE}', 'Baseline/kpis.json'))
+    st.plotly_chart(fig, use_container_width=True)
+
+    plan_ids = plans['plan_id'].tolist()
+    labels = dict(zip(plan_ids, plans.apply(pool_plan_label, axis=1)))
+    plan_id = st.selectbox("Alternative plan:", plan_ids, format_func=labels.get)
+    plan = plans[plans['plan_id'] == plan_id].iloc[0]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Cost", f"${plan['total_cost'] / 1e6:.2f}M", f"+${plan['cost_delta']:,.0f}", delta_color="off")
+    col2.metric("Fulfillment", format_percentage(plan['order_fulfillment_rate'], 2),
+                f"{(plan['order_fulfillment_rate'] - kpis['order_fulfillment_rate']) * 100:+.2f} pp", delta_color="off")
+    col3.metric("On-Time", format_percentage(plan['on_time_delivery_rate'], 2),
+                f"{(plan['on_time_delivery_rate'] - kpis['on_time_delivery_rate']) * 100:+.2f} pp", delta_color="off")
+    col4.metric("Shipments Changed", f"{plan['changed_shipments']}", f"{plan['units_moved']:,.0f} units", delta_color="off")
+
+    changes = diffs[diffs['plan_id'] == plan_id].assign(
+        change=lambda df: df['quantity'] - df['incumbent_quantity']
+    )[['warehouse_id', 'region', 'product_id', 'incumbent_quantity', 'quantity', 'change']]
+    changes.columns = ['Warehouse', 'Region', 'Product', 'Baseline Qty', 'Alternative Qty', 'Change']
+
+    show_formatted_table(changes.sort_values('Change'), {
+        'Baseline Qty': 'units',
+        'Alternative Qty': 'units',
+        'Change': '%+,.0f'
+    }, height=300)
+
+
+def build_lane_matrix_heatmap(lanes, metric):
+    """Warehouse x region heatmap of one lane estimate"""
+
+    title, value_format = LANE_METRICS[metric]
+    grid = lanes.pivot(index='warehouse_id', columns='region', values=metric)
+
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=grid.columns,
+        y=grid.index,
+        colorscale=[[0, COLORS['teal']], [0.5, COLORS['gold']], [1, COLORS['coral']]],
+        colorbar=dict(title=title),
+        hovertemplate=f'%{{y}} → %{{x}}<br>{value_format}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title='Delivery Region', tickangle=-45),
+        yaxis=dict(title='Warehouse'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        height=360,
+        margin=dict(t=30, b=120, l=80, r=30)
+    )
+
+    return fig
+
+
 def show_network_visualization(data):
     """Interactive global network map with zoom controls"""
 
@@ -2351,140 +3621,17 @@ def show_network_visualization(data):
         )
 
     with col_left:
-        # Filter edges
-        filtered_edges = edges[edges['quantity'] >= min_quantity].copy()
-        if show_service_only:
-            filtered_edges = filtered_edges[filtered_edges['service_compliance'] > 0.5]
-
-        # Create global network visualization
-        fig = go.Figure()
-
-        # Add edges (routes) with better visibility
-        for idx, edge in filtered_edges.iterrows():
-            source_node = nodes[nodes['id'] == edge['source']].iloc[0]
-            target_node = nodes[nodes['id'] == edge['target']].iloc[0]
-
-            # Color based on service compliance
-            line_color = COLORS['green'] if edge['service_compliance'] > 0.5 else COLORS['orange']
-            line_width = max(1, np.log10(edge['quantity'] + 1) * 1.5)
-
-            # Add route line
-            fig.add_trace(go.Scattergeo(
-                lon=[source_node['longitude'], target_node['longitude']],
-                lat=[source_node['latitude'], target_node['latitude']],
-                mode='lines',
-                line=dict(width=line_width, color=line_color),
-                opacity=0.5,
-                hoverinfo='text',
-                text=f"Route: {edge['source']} → {edge['target']}<br>Volume: {edge['quantity']:,.0f} units<br>Cost: ${edge['cost']:,.0f}",
-                showlegend=False
-            ))
-
-        # Add warehouse nodes (larger, distinct)
-        wh_nodes = nodes[nodes['type'] == 'warehouse'].copy()
-        fig.add_trace(go.Scattergeo(
-            lon=wh_nodes['longitude'],
-            lat=wh_nodes['latitude'],
-            mode='markers+text' if show_labels else 'markers',
-            marker=dict(
-                size=18,
-                color=COLORS['teal'],
-                symbol='square',
-                line=dict(width=3, color=COLORS['white'])
-            ),
-            text=wh_nodes['label'] if show_labels else None,
-            textposition='top center',
-            textfont=dict(size=11, color=COLORS['white'], family='Arial Black'),
-            name='Warehouses',
-            hovertemplate='<b>%{text}</b><br>Lat: %{lat:.2f}<br>Lon: %{lon:.2f}<extra></extra>'
-        ))
-
-        # Add region nodes (smaller)
-        region_nodes = nodes[nodes['type'] == 'region'].copy()
-        fig.add_trace(go.Scattergeo(
-            lon=region_nodes['longitude'],
-            lat=region_nodes['latitude'],
-            mode='markers+text' if show_labels else 'markers',
-            marker=dict(
-                size=10,
-                color=COLORS['coral'],
-                symbol='circle',
-                line=dict(width=2, color=COLORS['white'])
-            ),
-            text=region_nodes['label'] if show_labels else None,
-            textposition='top center',
-            textfont=dict(size=9, color=COLORS['white']),
-            name='Regions',
-            hovertemplate='<b>%{text}</b><br>Lat: %{lat:.2f}<br>Lon: %{lon:.2f}<extra></extra>'
-        ))
-
-        # Configure map layout based on scope
-        geo_config = {
-            'world': dict(
-                scope='world',
-                projection_type=projection,
-                showland=True,
-                landcolor='#1a202c',
-                oceancolor='#0d1117',
-                showocean=True,
-                showcountries=True,
-                countrycolor='#546e7a',
-                coastlinecolor='#546e7a',
-                bgcolor='rgba(0,0,0,0)',
-                center=dict(lat=20, lon=0),
-                projection_scale=1
-            ),
-            'usa': dict(
-                scope='usa',
-                projection_type='albers usa',
-                showland=True,
-                landcolor='#1a202c',
-                bgcolor='rgba(0,0,0,0)',
-                showlakes=True,
-                lakecolor='#0d1117'
-            ),
-            'north america': dict(
-                scope='north america',
-                projection_type=projection,
-                showland=True,
-                landcolor='#1a202c',
-                bgcolor='rgba(0,0,0,0)',
-                coastlinecolor='#546e7a'
-            ),
-            'europe': dict(
-                scope='europe',
-                projection_type=projection,
-                showland=True,
-                landcolor='#1a202c',
-                bgcolor='rgba(0,0,0,0)',
-                coastlinecolor='#546e7a'
-            ),
-            'asia': dict(
-                scope='asia',
-                projection_type=projection,
-                showland=True,
-                landcolor='#1a202c',
-                bgcolor='rgba(0,0,0,0)',
-                coastlinecolor='#546e7a'
-            )
-        }
-
-        fig.update_layout(
-            geo=geo_config.get(map_scope, geo_config['world']),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e2e8f0', size=12),
-            showlegend=True,
-            legend=dict(
-                bgcolor='rgba(38, 50, 56, 0.95)',
-                bordercolor='#546e7a',
-                borderwidth=2,
-                x=0.02,
-                y=0.98,
-                font=dict(size=12)
-            ),
-            height=750,
-            margin=dict(t=10, b=10, l=10, r=10)
+        fig = cached_figure(
+            data, 'network_map', build_network_map, nodes, edges,
+            map_scope, projection, min_quantity, show_service_only, show_labels,
+            controls={
+                'map_scope': map_scope,
+                'projection': projection,
+                'min_quantity': min_quantity,
+                'show_service_only': show_service_only,
+                'show_labels': show_labels
+            },
+            sources=('network_nodes.csv', 'network_edges.csv')
         )
 
         st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True, 'scrollZoom': True})
@@ -2504,6 +3651,36 @@ def show_network_visualization(data):
     </div>
     """, unsafe_allow_html=True)
 
+    # Lane distance matrix
+    st.markdown("## 📏 Lane Distance Matrix")
+
+    rate_cards = load_rate_cards()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        rate_card = st.selectbox("Rate card:", list(rate_cards), format_func=str.title)
+    with col2:
+        lane_metric = st.radio("Show:", list(LANE_METRICS), horizontal=True,
+                               format_func=lambda m: LANE_METRICS[m][0])
+
+    lanes = get_lane_matrix(data).lanes(rate_cards[rate_card])
+
+    fig = cached_figure(data, 'lane_matrix', build_lane_matrix_heatmap, lanes, lane_metric,
+                        controls={'rate_card': rate_card, 'metric': lane_metric},
+                        sources=('network_nodes.csv',))
+    st.plotly_chart(fig, use_container_width=True)
+
+    card = rate_cards[rate_card]
+    st.caption(
+        f"Great-circle distances from warehouse and region coordinates. {rate_card.title()} card: "
+        f"${card['base_cost']:.2f} + ${card['cost_per_km']:.3f}/km per unit, "
+        f"{card['handling_days']} handling day(s) + 1 day per {card['km_per_day']:,.0f} km. "
+        f"{lanes['on_time'].mean():.0%} of lanes meet the 3-day target."
+    )
+
+    if 'pool' in data['baseline']:
+        show_solution_pool(data)
+
 
 # ============================================================================
 # PAGE 5: INSIGHTS & RECOMMENDATIONS
@@ -2515,6 +3692,163 @@ def show_network_visualization(data):
 # Replace entire show_insights_recommendations() function
 # ============================================================================
 
+def build_transit_histogram(shipments, weighted=False):
+    """Transit time histogram binned with NumPy so only bin counts reach the browser"""
+
+    transit = shipments['transit_time_days'].to_numpy()
+    weights = shipments['quantity'].to_numpy() if weighted else None
+    bins = histogram_bins(transit, bins=unit_bin_edges(transit), weights=weights)
+    y_title = 'Units Shipped' if weighted else 'Number of Routes'
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=bins['bin_center'],
+        y=bins['count'],
+        width=bins['width'],
+        customdata=bins[['bin_left', 'bin_right']],
+        marker=dict(
+            color=bins['bin_center'],
+            colorscale=[
+                [0, COLORS['green']],
+                [0.4, COLORS['teal']],
+                [0.6, COLORS['orange']],
+                [1, COLORS['coral']]
+            ],
+            line=dict(color='#1a1d29', width=1.5)
+        ),
+        hovertemplate=f'%{{customdata[0]:.1f}}-%{{customdata[1]:.1f}} days<br>{y_title}: %{{y:,.0f}}<extra></extra>'
+    ))
+
+    fig.add_vline(
+        x=3,
+        line_dash="dash",
+        line_color=COLORS['green'],
+        line_width=3,
+        annotation_text="3-Day Target"
+    )
+
+    fig.update_layout(
+        xaxis=dict(title='Transit Time (Days)', gridcolor='#37474f'),
+        yaxis=dict(title=y_title, gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=13),
+        height=350,
+        bargap=0,
+        showlegend=False
+    )
+
+    return fig
+
+
+def build_facility_map(sites, nodes):
+    """Existing warehouses, demand regions and candidate sites (opened sites sized by throughput)"""
+
+    fig = go.Figure()
+
+    regions = nodes[nodes['type'] == 'region']
+    fig.add_trace(go.Scattergeo(
+        lat=regions['latitude'], lon=regions['longitude'], text=regions['id'],
+        mode='markers', name='Demand Regions',
+        marker=dict(size=8, color=COLORS['orange'], symbol='circle'),
+        hovertemplate='%{text}<extra></extra>'
+    ))
+
+    warehouses = nodes[nodes['type'] == 'warehouse']
+    fig.add_trace(go.Scattergeo(
+        lat=warehouses['latitude'], lon=warehouses['longitude'], text=warehouses['id'],
+        mode='markers', name='Existing Warehouses',
+        marker=dict(size=12, color=COLORS['teal'], symbol='square'),
+        hovertemplate='%{text}<extra></extra>'
+    ))
+
+    closed = sites[sites['open'] == 0]
+    fig.add_trace(go.Scattergeo(
+        lat=closed['warehouse_latitude'], lon=closed['warehouse_longitude'],
+        customdata=closed[['warehouse_id', 'fixed_operating_cost']],
+        mode='markers', name='Candidates (not opened)',
+        marker=dict(size=5, color=COLORS['gray'], opacity=0.6),
+        hovertemplate='%{customdata[0]}<br>Fixed cost: $%{customdata[1]:,.0f}<extra></extra>'
+    ))
+
+    opened = sites[sites['open'] == 1]
+    fig.add_trace(go.Scattergeo(
+        lat=opened['warehouse_latitude'], lon=opened['warehouse_longitude'],
+        customdata=opened[['warehouse_id', 'throughput_units', 'regions_served']],
+        mode='markers', name='Opened Sites',
+        marker=dict(
+            size=12 + 20 * opened['throughput_units'] / max(opened['throughput_units'].max(), 1),
+            color=COLORS['gold'], symbol='star', line=dict(color='#1a1d29', width=1)
+        ),
+        hovertemplate='%{customdata[0]}<br>Throughput: %{customdata[1]:,.0f} units'
+                      '<br>Serves: %{customdata[2]}<extra></extra>'
+    ))
+
+    fig.update_geos(
+        projection_type='natural earth',
+        showland=True, landcolor='#263238',
+        showocean=True, oceancolor='#1a1d29',
+        showcountries=True, countrycolor='#37474f',
+        bgcolor='rgba(0,0,0,0)'
+    )
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        legend=dict(bgcolor='rgba(38, 50, 56, 0.8)', bordercolor='#546e7a', borderwidth=1),
+        height=450,
+        margin=dict(t=10, b=10, l=10, r=10)
+    )
+
+    return fig
+
+
+def show_facility_location(data):
+    """Candidate distribution centres chosen jointly with the allocation"""
+
+    facility = data['facility']
+    fl_kpis = facility['kpis']
+    sites = facility['sites']
+
+    st.markdown("#### 🏗️ Regional Distribution Centers: Facility-Location Model")
+    st.caption(
+        f"{fl_kpis['candidates']} candidate sites evaluated jointly with the allocation; "
+        f"{fl_kpis['candidate_lanes_kept']:,} of {fl_kpis['candidate_lanes']:,} candidate lanes kept "
+        f"within {fl_kpis['max_km']:,.0f} km ({fl_kpis['rate_card']} rate card). "
+        f"{fl_kpis['optimization_status']} in {fl_kpis['solve_time_seconds']:.0f}s."
+    )
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sites Opened", f"{fl_kpis['sites_opened']}",
+                f"${fl_kpis['total_fixed_cost'] / 1e3:,.0f}K fixed / year", delta_color="off")
+    col2.metric("Total Cost", f"${fl_kpis['total_cost'] / 1e6:.2f}M",
+                f"-${fl_kpis['cost_saving_vs_baseline'] / 1e6:.2f}M vs Baseline", delta_color="inverse")
+    col3.metric("Fulfillment", format_percentage(fl_kpis['order_fulfillment_rate']),
+                f"{(fl_kpis['order_fulfillment_rate'] - data['baseline']['kpis']['order_fulfillment_rate']) * 100:+.2f} pp")
+    col4.metric("On-Time Routes", format_percentage(fl_kpis['on_time_delivery_rate']))
+    st.caption(
+        f"Of the saving, ${fl_kpis['stockout_saving_vs_baseline'] / 1e6:.2f}M is stockout penalties avoided with "
+        f"the new sites' stock and ${fl_kpis['operating_saving_vs_baseline'] / 1e6:.2f}M is transport, holding "
+        f"and fixed cost."
+    )
+
+    fig = cached_figure(data, 'facility_map', build_facility_map, sites, data['network_nodes'],
+                        sources=('Facility_Location/candidate_sites.csv', 'network_nodes.csv'))
+    st.plotly_chart(fig, use_container_width=True)
+
+    opened = sites[sites['open'] == 1][['warehouse_id', 'warehouse_region', 'storage_capacity_m3',
+                                         'fixed_operating_cost', 'throughput_units', 'utilization_pct',
+                                         'regions_served']].copy()
+    opened.columns = ['Site', 'Near', 'Storage', 'Fixed Cost', 'Throughput', 'Utilization', 'Regions Served']
+
+    show_formatted_table(opened, {
+        'Storage': 'm3',
+        'Fixed Cost': 'currency',
+        'Throughput': 'units',
+        'Utilization': 'percent'
+    })
+
+
 def show_insights_recommendations(data):
     """Redesigned insights with Streamlit native components"""
 
@@ -2745,7 +4079,10 @@ def show_insights_recommendations(data):
 
         st.info("**Solution Strategy:**")
         st.write("• Identify high-demand regions >5 days transit")
-        st.write("• Add 2-3 regional distribution centers")
+        if 'facility' in data:
+            st.write(f"• Add {data['facility']['kpis']['sites_opened']} regional distribution centers (facility-location model)")
+        else:
+            st.write("• Add 2-3 regional distribution centers")
         st.write("• Implement zone-based shipping")
         st.write("• Optimize carrier selection by region")
 
@@ -2758,40 +4095,17 @@ def show_insights_recommendations(data):
         shipments = data['baseline']['shipments']
 
         if len(shipments) > 0:
-            fig = go.Figure()
-
-            fig.add_trace(go.Histogram(
-                x=shipments['transit_time_days'],
-                nbinsx=20,
-                marker=dict(
-                    color=shipments['transit_time_days'],
-                    colorscale=[
-                        [0, COLORS['green']],
-                        [0.4, COLORS['teal']],
-                        [0.6, COLORS['orange']],
-                        [1, COLORS['coral']]
-                    ],
-                    line=dict(color='#1a1d29', width=1.5)
-                )
-            ))
-
-            fig.add_vline(
-                x=3,
-                line_dash="dash",
-                line_color=COLORS['green'],
-                line_width=3,
-                annotation_text="3-Day Target"
+            weighting = st.radio(
+                "Count by:",
+                options=['Routes', 'Units shipped'],
+                horizontal=True,
+                help="Weight each shipment route by its quantity"
             )
+            weighted = weighting == 'Units shipped'
 
-            fig.update_layout(
-                xaxis=dict(title='Transit Time (Days)', gridcolor='#37474f'),
-                yaxis=dict(title='Number of Routes', gridcolor='#37474f'),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#e2e8f0', size=13),
-                height=350,
-                showlegend=False
-            )
+            fig = cached_figure(data, 'transit_histogram', build_transit_histogram, shipments, weighted,
+                                controls={'weighted': weighted},
+                                sources=('Baseline/shipments.csv',))
 
             st.plotly_chart(fig, use_container_width=True)
 
@@ -2803,6 +4117,9 @@ def show_insights_recommendations(data):
         else:
             st.info("Shipment data not available")
 
+    if 'facility' in data:
+        show_facility_location(data)
+
     st.markdown("---")
 
     # Priority 3: Capacity
@@ -2860,7 +4177,13 @@ def show_insights_recommendations(data):
         st.markdown("#### 📈 Growth Projection")
 
         years = [0, 1, 2, 3, 4, 5]
-        growth_rate = 0.10
+        if 'forecast' in data:
+            forecast = data['forecast']
+            growth_rate = (1 + forecast['implied_growth']) ** (forecast['horizon'] / (forecast['horizon'] + forecast['lead'])) - 1
+            growth_source = f"Exponential-smoothing forecast ({forecast['level']} level, {forecast['series']:,} series)"
+        else:
+            growth_rate = data['metadata']['model_assumptions']['demand_growth_rate']
+            growth_source = "Flat CAGR from analysis metadata"
         current_demand = kpis['total_demand']
 
         projected_demand = [current_demand * ((1 + growth_rate) ** year) for year in years]
@@ -2896,6 +4219,7 @@ def show_insights_recommendations(data):
         )
 
         st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{growth_source}: {growth_rate:.1%} per year")
 
     st.markdown("---")
 
@@ -3007,6 +4331,87 @@ def show_insights_recommendations(data):
 # PAGE 6: TECHNICAL DOCUMENTATION
 # ============================================================================
 
+def build_saa_distribution(distribution, plans, metric):
+    """Overlaid, server-binned distributions of one KPI across demand scenarios for several plans"""
+
+    scale, title = (1e6, 'Total Cost ($M)') if metric == 'total_cost' else (0.01, 'Order Fulfillment (%)')
+    values = distribution[metric].to_numpy() / scale
+    edges = np.histogram_bin_edges(values, bins=30)
+    plan_colors = [COLORS['gray'], COLORS['teal'], COLORS['gold'], COLORS['coral'], COLORS['purple']]
+
+    fig = go.Figure()
+
+    for color, plan in zip(plan_colors, plans):
+        bins = histogram_bins(values[(distribution['plan'] == plan).to_numpy()], bins=edges)
+        fig.add_trace(go.Bar(
+            x=bins['bin_center'],
+            y=bins['count'],
+            width=bins['width'],
+            name=plan.replace('_', ' '),
+            marker=dict(color=color, line=dict(color='#1a1d29', width=1)),
+            opacity=0.7,
+            hovertemplate=f'{plan}<br>{title}: %{{x:,.2f}}<br>Scenarios: %{{y}}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        barmode='overlay',
+        xaxis=dict(title=title, gridcolor='#37474f'),
+        yaxis=dict(title='Demand Scenarios', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        legend=dict(bgcolor='rgba(38, 50, 56, 0.9)', bordercolor='#546e7a', borderwidth=1),
+        height=380,
+        bargap=0,
+        margin=dict(t=30, b=60, l=60, r=30)
+    )
+
+    return fig
+
+
+def build_rolling_horizon(plan):
+    """Stacked cost per committed period with the fulfillment rate on a secondary axis"""
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    for col, name, color in [
+        ('total_transportation_cost', 'Transportation', COLORS['teal']),
+        ('total_holding_cost', 'Holding', COLORS['gold']),
+        ('total_stockout_cost', 'Stockout', COLORS['coral'])
+    ]:
+        fig.add_trace(go.Bar(
+            x=plan['period'],
+            y=plan[col] / 1e6,
+            name=name,
+            marker=dict(color=color),
+            hovertemplate=f'Period %{{x}}<br>{name}: $%{{y:.2f}}M<extra></extra>'
+        ), secondary_y=False)
+
+    fig.add_trace(go.Scatter(
+        x=plan['period'],
+        y=plan['order_fulfillment_rate'] * 100,
+        name='Fulfillment',
+        mode='lines+markers',
+        line=dict(color=COLORS['purple'], width=2),
+        hovertemplate='Period %{x}<br>Fulfillment: %{y:.2f}%<extra></extra>'
+    ), secondary_y=True)
+
+    fig.update_layout(
+        barmode='stack',
+        xaxis=dict(title='Period', gridcolor='#37474f'),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e2e8f0', size=12),
+        legend=dict(bgcolor='rgba(38, 50, 56, 0.9)', bordercolor='#546e7a', borderwidth=1),
+        height=400,
+        margin=dict(t=30, b=60, l=60, r=60)
+    )
+    fig.update_yaxes(title_text='Cost ($M)', gridcolor='#37474f', secondary_y=False)
+    fig.update_yaxes(title_text='Fulfillment (%)', showgrid=False, secondary_y=True)
+
+    return fig
+
+
 def show_technical_documentation(data):
     """Mathematical formulations and technical details"""
 
@@ -3056,13 +4461,63 @@ def show_technical_documentation(data):
            - Penalized in objective function
         """)
 
-        metadata = data['metadata']
-        st.markdown(f"""
-        <div class="stat-card">
-            <div class="label">Total Decision Variables</div>
-            <div class="value">{metadata['data_source']['warehouses'] * len(data['demand_enriched']['delivery_region'].unique()) * metadata['data_source']['products']:,}</div>
-        </div>
-        """, unsafe_allow_html=True)
+        sizes = get_model_size(data)
+        dense = sizes['lanes']['dense']
+
+        col1, col2, col3 = st.columns(3)
+        for col, label, count, note in [
+            (col1, "Dense x[i,j,p] (I × J × P)", dense['x'], f"{dense['variables']:,} variables in total"),
+            (col2, "Sparse x: reachable, demand-bearing", sizes['lanes']['sparse']['x'],
+             f"{sizes['lanes']['sparse']['variables']:,} variables in total"),
+            (col3, "Sparse x: stocked pairs only", sizes['stocked_only']['sparse']['x'],
+             f"{sizes['stocked_only']['sparse']['variables']:,} variables in total")
+        ]:
+            with col:
+                st.markdown(f"""
+                <div class="stat-card">
+                    <div class="label">{label}</div>
+                    <div class="value">{count:,}</div>
+                </div>
+                """, unsafe_allow_html=True)
+                st.caption(note)
+
+        st.caption(
+            f"x[i,j,p] is only generated for observed warehouse → region lanes into the "
+            f"{sizes['lanes']['sparse']['s']:,} region/product pairs with demand "
+            f"({dense['x'] / sizes['lanes']['sparse']['x']:.1f}× fewer than dense). "
+            f"The default model keeps lanes from warehouses without an inventory record as uncapacitated supply. "
+            f"Restricting to pairs with flow capacity (stocked_only) cuts x "
+            f"{dense['x'] / sizes['stocked_only']['sparse']['x']:.1f}×."
+        )
+
+        if 'presolve' in data:
+            presolve = data['presolve']
+            kpis = presolve['kpis']
+
+            st.markdown("#### Presolve")
+            report = presolve['report'].rename(columns={
+                'step': 'Reduction',
+                'rows_removed': 'Rows Removed',
+                'columns_removed': 'Columns Removed',
+                'coefficients_tightened': 'Big-M Tightened',
+                'rows': 'Rows',
+                'columns': 'Columns'
+            })
+            show_formatted_table(report, {
+                'Rows Removed': 'units', 'Columns Removed': 'units', 'Big-M Tightened': 'units',
+                'Rows': 'units', 'Columns': 'units'
+            })
+
+            caption = (
+                f"Presolve shrinks the model from {kpis['original_rows']:,} × {kpis['original_columns']:,} "
+                f"to {kpis['rows']:,} × {kpis['columns']:,} (rows × columns) before CBC sees it."
+            )
+            if 'presolved_total_cost' in kpis:
+                caption += (
+                    f" Both models solve to ${kpis['presolved_total_cost'] / 1e6:.2f}M "
+                    f"({kpis['original_seconds']:.1f}s original, {kpis['presolved_seconds']:.1f}s presolved)."
+                )
+            st.caption(caption)
 
     # Objective function
     with st.expander("🎯 Objective Function", expanded=True):
@@ -3174,8 +4629,42 @@ def show_technical_documentation(data):
         s[j,p] ≥ 0      ∀ j∈J, p∈P
         y[i,p] ∈ {0,1}  ∀ i∈I, p∈P
         ```
+
+        **6. Strengthened Formulation (optional)**
+
+        `build_model(..., strengthen=True)` adds valid inequalities that tighten the LP relaxation
+        without changing the optimum:
+        ```
+        x[i,j,p] ≤ min(demand[j,p], flow_capacity[i,p]) × y[i,p]              (disaggregated linking)
+        ∑ x[i,j,p] + ∑ max(u[i] − λ, 0) × (1 − y[i,p]) ≤ demand[j,p]          (flow cover)
+        i∈C         i∈C
+        ```
+        Where `C` is the set of capacitated lanes into a demand point, `u[i]` the linking bound
+        and `λ = ∑ u[i] − demand[j,p] > 0`.
         """)
 
+        if 'formulation' in data:
+            benchmark = data['formulation']['benchmark']
+
+            table = benchmark[['instance', 'formulation', 'binaries', 'rows', 'root_gap_pct',
+                               'solve_time_seconds', 'optimization_status']].copy()
+            table['instance'] = table['instance'].str.replace('_', ' ')
+            table.columns = ['Instance', 'Formulation', 'Binaries', 'Rows', 'Root Gap', 'Solve Time (s)', 'Status']
+            show_formatted_table(table, {
+                'Binaries': 'units',
+                'Rows': 'units',
+                'Root Gap': '%.3f%%',
+                'Solve Time (s)': '%.1f'
+            })
+
+            times = benchmark.pivot(index='instance', columns='formulation', values='solve_time_seconds')
+            speedup = times['plain'] / times['strengthened']
+            st.caption(
+                f"Root gap = best integer cost vs LP relaxation before CBC adds cuts. Synthetic instances copy "
+                f"every product with noise on demand, capacity and holding cost. The strengthened formulation "
+                f"solves {speedup.min():.1f}–{speedup.max():.1f}× faster despite its extra rows."
+            )
+
     # Parameters
     with st.expander("📋 Model Parameters & Assumptions", expanded=False):
         st.markdown("""
@@ -3229,6 +4718,93 @@ def show_technical_documentation(data):
         **Total Economic Impact:** $500-750 per stockout unit
         """)
 
+    # Stochastic demand (SAA)
+    if 'stochastic' in data:
+        with st.expander("🎲 Stochastic Demand (Sample Average Approximation)", expanded=False):
+            saa = data['stochastic']
+            saa_kpis = saa['kpis']
+
+            st.markdown(f"""
+            Demand at each region/product is sampled from a normal distribution
+            (mean `total_demand_units`, sd `demand_std_dev`). Stocking `y[i,p]` is decided
+            first; shipments and stockouts are re-optimized for every demand scenario.
+            {saa_kpis['replications']} SAA problems of {saa_kpis['samples_per_replication']} scenarios each
+            were solved in parallel and every candidate plan was evaluated on
+            {saa_kpis['evaluation_samples']} out-of-sample scenarios.
+            """)
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Expected Cost", f"${saa_kpis['expected_total_cost'] / 1e6:.2f}M",
+                        f"sd ${saa_kpis['total_cost_std'] / 1e6:.2f}M", delta_color="off")
+            col2.metric("Cost P5 – P95",
+                        f"${saa_kpis['cost_percentiles']['p5'] / 1e6:.1f}–{saa_kpis['cost_percentiles']['p95'] / 1e6:.1f}M")
+            col3.metric("Expected Fulfillment", format_percentage(saa_kpis['expected_fulfillment_rate']),
+                        f"P5 {format_percentage(saa_kpis['fulfillment_percentiles']['p5'])}", delta_color="off")
+            col4.metric("Value of Stochastic Solution", f"${saa_kpis['value_of_stochastic_solution']:,.0f}",
+                        f"SAA gap ≈ ${saa_kpis['saa_gap_estimate'] / 1e6:.2f}M" if saa_kpis.get('saa_bound_valid')
+                        else "no valid SAA bound (a replication stopped early)", delta_color="off")
+
+            metric = st.radio("Distribution:", ['total_cost', 'order_fulfillment_rate'], horizontal=True,
+                              format_func=lambda m: 'Total Cost' if m == 'total_cost' else 'Fulfillment Rate')
+            plans = ['Deterministic', saa_kpis['chosen_plan']]
+
+            fig = cached_figure(data, 'saa_distribution', build_saa_distribution,
+                                saa['distribution'], plans, metric,
+                                controls={'metric': metric},
+                                sources=('Stochastic_SAA/saa_distribution.csv', 'Stochastic_SAA/saa_candidates.csv',
+                                         'Stochastic_SAA/kpis.json'))
+
+            st.plotly_chart(fig, use_container_width=True)
+
+            candidates = saa['candidates'][['plan', 'saa_objective', 'expected_cost', 'cost_p5', 'cost_p95',
+                                            'expected_fulfillment', 'pairs_stocked', 'solve_seconds']].copy()
+            candidates.columns = ['Plan', 'SAA Objective', 'Expected Cost', 'Cost P5', 'Cost P95',
+                                  'Fulfillment', 'Pairs Stocked', 'Solve (s)']
+            candidates[['SAA Objective', 'Expected Cost', 'Cost P5', 'Cost P95']] /= 1e6
+            candidates['Fulfillment'] *= 100
+
+            show_formatted_table(candidates, {
+                'SAA Objective': 'currency_m',
+                'Expected Cost': 'currency_m',
+                'Cost P5': 'currency_m',
+                'Cost P95': 'currency_m',
+                'Fulfillment': 'percent_2',
+                'Pairs Stocked': 'units'
+            })
+
+    # Multi-period rolling horizon
+    if 'rolling' in data:
+        with st.expander("🗓️ Multi-Period Rolling Horizon", expanded=False):
+            rolling = data['rolling']
+            rh_kpis = rolling['kpis']
+            windows = rolling['windows']
+
+            st.markdown(f"""
+            The year is split into {rh_kpis['periods']} periods with inventory carried between them
+            (`inv[t] = inv[t-1] + replenish[t] - shipments[t]`). Windows of {rh_kpis['window']} periods
+            are solved in turn; the first {rh_kpis['step']} are committed and their ending inventory
+            opens the next window. Each window is warm-started from the previous solution.
+            """)
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Plan Cost", f"${rh_kpis['total_cost'] / 1e6:.2f}M")
+            col2.metric("Fulfillment", format_percentage(rh_kpis['order_fulfillment_rate']))
+            col3.metric("Windows Solved", f"{rh_kpis['windows_solved']}",
+                        f"{rh_kpis['warm_started_windows']} warm-started", delta_color="off")
+            col4.metric("Solve Time", f"{rh_kpis['total_solve_seconds']:.0f}s",
+                        f"+ {rh_kpis['total_build_seconds']:.0f}s model build", delta_color="off")
+
+            fig = cached_figure(data, 'rolling_horizon', build_rolling_horizon, rolling['plan'],
+                                sources=('Rolling_Horizon/period_plan.csv',))
+
+            st.plotly_chart(fig, use_container_width=True)
+
+            log = windows[['window_start', 'window_end', 'committed_periods', 'status',
+                           'objective', 'warm_started', 'solve_seconds']].copy()
+            log.columns = ['From', 'To', 'Committed', 'Status', 'Objective', 'Warm Start', 'Solve (s)']
+
+            show_formatted_table(log, {'Objective': 'currency'})
+
     # Solution methodology
     with st.expander("🔧 Solution Methodology", expanded=False):
         st.markdown("""
@@ -3440,44 +5016,41 @@ def show_validation_logs(data):
     # Results files viewer
     st.markdown("## 📁 Generated Analysis Files")
 
-    results_dir = Path('./results/')
+    # File list and sizes come from the results watcher; nothing is opened
+    # until a download is clicked
+    file_sizes = {relpath: stamp[0] for relpath, stamp in data['file_versions'].items()}
 
-    if results_dir.exists():
-        # List all result files
-        csv_files = list(results_dir.glob('*.csv'))
-        json_files = list(results_dir.glob('*.json'))
+    if file_sizes:
+        csv_files = sorted(p for p in file_sizes if '/' not in p and p.endswith('.csv'))
+        json_files = sorted(p for p in file_sizes if '/' not in p and p.endswith('.json'))
 
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("### CSV Data Files")
 
-            for csv_file in sorted(csv_files):
-                file_size = csv_file.stat().st_size / 1024  # KB
-
-                with open(csv_file, 'rb') as f:
-                    st.download_button(
-                        label=f"📄 {csv_file.name} ({file_size:.1f} KB)",
-                        data=f,
-                        file_name=csv_file.name,
-                        mime="text/csv",
-                        key=csv_file.name
-                    )
+            for csv_file in csv_files:
+                st.download_button(
+                    label=f"📄 {csv_file} ({file_sizes[csv_file] / 1024:.1f} KB)",
+                    data=partial(read_result_bytes, csv_file),
+                    file_name=csv_file,
+                    mime="text/csv",
+                    key=csv_file,
+                    on_click="ignore"
+                )
 
         with col2:
             st.markdown("### JSON Metadata Files")
 
-            for json_file in sorted(json_files):
-                file_size = json_file.stat().st_size / 1024  # KB
-
-                with open(json_file, 'rb') as f:
-                    st.download_button(
-                        label=f"📄 {json_file.name} ({file_size:.1f} KB)",
-                        data=f,
-                        file_name=json_file.name,
-                        mime="application/json",
-                        key=json_file.name
-                    )
+            for json_file in json_files:
+                st.download_button(
+                    label=f"📄 {json_file} ({file_sizes[json_file] / 1024:.1f} KB)",
+                    data=partial(read_result_bytes, json_file),
+                    file_name=json_file,
+                    mime="application/json",
+                    key=json_file,
+                    on_click="ignore"
+                )
 
         st.markdown(f"""
         <div class="info-box">
@@ -3488,6 +5061,45 @@ def show_validation_logs(data):
         </div>
         """, unsafe_allow_html=True)
 
+        # Bundle export across scenario folders
+        st.markdown("### 📦 Bundle Export")
+
+        groups = sorted({group_of(p) for p in file_sizes}, key=lambda g: (g != SHARED_GROUP, g != 'Baseline', g))
+
+        col1, col2, col3 = st.columns([2, 2, 1])
+
+        with col1:
+            selected_groups = st.multiselect(
+                "Scenarios:",
+                groups,
+                default=[g for g in groups if g in (SHARED_GROUP, 'Baseline')],
+                help=f"'{SHARED_GROUP}' holds the cross-scenario tables written directly to results/"
+            )
+
+        table_names = sorted({Path(p).name for p in file_sizes if group_of(p) in selected_groups})
+
+        with col2:
+            selected_tables = st.multiselect("Tables:", table_names, default=table_names)
+
+        with col3:
+            bundle_format = st.radio("Format:", list(BUNDLE_FORMATS), horizontal=True)
+
+        bundle_files = select_files(file_sizes, selected_groups, selected_tables)
+        raw_size = sum(file_sizes[p] for p in bundle_files)
+        mime, extension = BUNDLE_FORMATS[bundle_format]
+
+        st.caption(f"{len(bundle_files)} files · {raw_size / 1024 / 1024:,.2f} MB uncompressed")
+
+        st.download_button(
+            label=f"📥 Download bundle ({bundle_format})",
+            data=partial(bundle_file, RESULTS_DIR, bundle_files, bundle_format),
+            file_name=f"warehouse_results{extension}",
+            mime=mime,
+            key="results_bundle",
+            disabled=not bundle_files,
+            on_click="ignore"
+        )
+
 
 # ============================================================================
 # PAGE 7: ABOUT TEAM
@@ -3721,8 +5333,9 @@ def show_about_team(data):
 def main():
     """Main application entry point - UPDATED"""
 
-    # Load data
-    data = load_all_results()
+    # Load data (only files changed since the last run are re-read)
+    watcher = refresh_results()
+    data = load_all_results(watcher.version) if RESULTS_DIR.exists() else None
 
     if data is None:
         st.error("""
@@ -3737,6 +5350,10 @@ def main():
         """)
         st.stop()
 
+    st.session_state['results_version'] = data['version']
+
+    render_start = time.perf_counter()
+
     # Create sidebar and get selected page
     page = create_sidebar(data)
 
@@ -3758,6 +5375,9 @@ def main():
     elif page == "👥 About Team":
         show_about_team(data)
 
+    show_profiling_panel(time.perf_counter() - render_start)
+    watch_results()
+
 if __name__ == "__main__":
     main()
 